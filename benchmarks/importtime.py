@@ -0,0 +1,70 @@
+"""Hold the start of the eei command to its import time budget.
+
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --repeat 10
+
+Runs every command of benchmarks/importtime_budget.json with python -X importtime
+from the repository root, and adds up the time spent importing the modules a bare
+interpreter does not import. Fails when a command exceeds its budget or imports one
+of the heavy modules, which only the scripts of the subcommands may import.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+BUDGET_FILE = os.path.join(BENCHMARKS_DIR, 'importtime_budget.json')
+
+
+def import_times(args):
+    """Self import time in microseconds of every module imported by `python -X importtime args`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT_DIR, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_time)
+    return times
+
+
+def measure(args, baseline, repeat):
+    """Fastest total import time of the modules `args` imports beyond `baseline`, and those modules."""
+    runs = []
+    for _ in range(repeat):
+        times = import_times(['-m', 'eei'] + args)
+        runs.append({name: time for name, time in times.items() if name not in baseline})
+    fastest = min(runs, key=lambda modules: sum(modules.values()))
+    return sum(fastest.values()) / 1000, fastest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the eei command against its budget.")
+    parser.add_argument('--repeat', type=int, default=5, help="runs of every command; the fastest is reported")
+    parser.add_argument('--slowest', type=int, default=5, help="slowest modules to list per command")
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+    baseline = set(import_times(['-c', 'pass']))
+
+    failed = False
+    print(f"{'command':<24}{'imports':>10}{'budget':>10}")
+    for name, command in budget['commands'].items():
+        total_ms, modules = measure(command['args'], baseline, args.repeat)
+        heavy = sorted({module.split('.')[0] for module in modules} & set(budget['heavy_modules']))
+        over = total_ms > command['budget_ms']
+        failed |= over or bool(heavy)
+        print(f"{name:<24}{total_ms:>8.1f}ms{command['budget_ms']:>8}ms{'  OVER BUDGET' if over else ''}")
+        if heavy:
+            print(f"  imports {', '.join(heavy)}")
+        for module, time in sorted(modules.items(), key=lambda item: -item[1])[:args.slowest]:
+            print(f"  {module:<30}{time / 1000:>8.1f}ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Time the index calculation and the statistics on a synthetic universe.
+
+    python benchmarks/run.py --scale small
+    python benchmarks/run.py --tokens 2000 --quarters 40 --repeat 1
+    python benchmarks/run.py --scale small --resolution hourly
+    python benchmarks/run.py --scale medium --compare benchmarks/results/<earlier run>.json
+
+The universe is generated once per scale and seed under benchmarks/data. Every run
+is recorded as JSON under benchmarks/results, with the timings and the environment
+they were measured in.
+"""
+import os
+import io
+import sys
+import json
+import shutil
+import time
+import platform
+import argparse
+import subprocess
+import contextlib
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+from eei.bootstrap import bootstrap_metrics
+from eei.correlation import correlation_matrix
+from eei.descriptive import describe_index, index_history_frame, read_risk_free_rate_data
+from eei.engine import compute_index_history, get_rebalancing_periods, validate_period_timestamps
+from eei.family import compute_index_family
+from eei.parallel import compute_index_history_parallel
+from eei.resolution import DAY, RESOLUTIONS, file_suffix, get_resolution, prices_dir_for
+from eei.rolling import rolling_measures
+from eei.store import convert_price_tree, store_dir_for
+from eei.weighting import get_weighting_scheme
+
+sys.path.insert(0, BENCHMARKS_DIR)
+from synthetic import SCALES, generate_universe
+
+DATA_DIR = os.path.join(BENCHMARKS_DIR, 'data')
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+
+def measure(function, repeat):
+    """Run `function` `repeat` times, discarding its output and progress bars, and return (wall times, last result)."""
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            started = time.perf_counter()
+            result = function()
+            times.append(time.perf_counter() - started)
+    return times, result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def run_benchmarks(index_folder, risk_free_file, tokens, repeat, resolution, workers):
+    data_dir = os.path.join(index_folder, 'data')
+    snapshots_dir = os.path.join(data_dir, 'index_snapshots')
+    prices_dir = prices_dir_for(data_dir, resolution)
+    step = resolution.step
+    cw, ew = get_weighting_scheme('cw'), get_weighting_scheme('ew')
+    timings = {}
+
+    timings['load_periods'], rebalancing_periods = measure(lambda: get_rebalancing_periods(prices_dir), repeat)
+    store_dir = store_dir_for(prices_dir)
+
+    def convert():
+        shutil.rmtree(store_dir, ignore_errors=True)
+        return convert_price_tree(prices_dir, store_dir)
+    timings['convert_store'], _ = measure(convert, 1)
+    timings['load_periods_store'], _ = measure(lambda: get_rebalancing_periods(prices_dir, store_dir), repeat)
+
+    def validate_all():
+        return all(validate_period_timestamps(panel, folder, start_ts, end_ts)
+                   for folder, start_ts, end_ts, panel in rebalancing_periods)
+    timings['validate_period_timestamps'], _ = measure(validate_all, repeat)
+
+    timings['compute_index_history_cw'], cw_history = measure(
+        lambda: compute_index_history(rebalancing_periods, snapshots_dir, cw, step=step), repeat)
+    timings['compute_index_history_ew'], _ = measure(
+        lambda: compute_index_history(rebalancing_periods, snapshots_dir, ew, step=step), repeat)
+    timings['compute_index_history_cw_parallel'], _ = measure(
+        lambda: compute_index_history_parallel(rebalancing_periods, prices_dir, snapshots_dir, cw, step=step,
+                                               max_workers=workers), repeat)
+
+    # Six indices like the published family, for the correlations
+    counts = sorted({max(1, tokens // 3), max(1, 2 * tokens // 3), tokens})
+    period_panels = [(folder, panel) for folder, _, _, panel in rebalancing_periods]
+    timings['compute_index_family'], family = measure(
+        lambda: compute_index_family(period_panels, snapshots_dir, counts, [cw, ew], step=step), repeat)
+
+    index_history = index_history_frame(cw_history)
+    risk_free_rate = read_risk_free_rate_data(risk_free_file)
+    timings['descriptive_statistics'], _ = measure(
+        lambda: describe_index(index_history, risk_free_rate, resolution.periods_per_year), repeat)
+
+    index_data = pd.concat({f'{name}-{count}': index_history_frame(history)['index_value']
+                            for (name, count), history in family.items()}, axis=1)
+    timings['inferential_correlations'], _ = measure(lambda: correlation_matrix(index_data), repeat)
+
+    # 30, 90 and 365 days of every family index, betas to the first one
+    windows = [days * DAY // step for days in (30, 90, 365)]
+    risk_free_yields = risk_free_rate['yield'].reindex(index_data.index, method='ffill')
+    timings['rolling_measures'], _ = measure(
+        lambda: rolling_measures(index_data, risk_free_yields, windows, index_data.columns[0], resolution.periods_per_year),
+        repeat)
+
+    # 1,000 stationary bootstrap resamples of the family returns
+    returns = index_data.pct_change().iloc[1:].to_numpy()
+    timings['bootstrap_metrics'], _ = measure(
+        lambda: bootstrap_metrics(returns, risk_free_yields.to_numpy()[1:], 1000, max_workers=workers), repeat)
+
+    return {name: {'runs': times, 'min': min(times), 'median': float(np.median(times))} for name, times in timings.items()}
+
+
+def compare(results, baseline):
+    print(f"\n{'benchmark':<36}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>12}{result['min']:>11.4f}s{'-':>9}")
+        else:
+            print(f"{name:<36}{before['min']:>11.4f}s{result['min']:>11.4f}s{result['min'] / before['min']:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the index calculation and statistics on synthetic data.")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--tokens', type=int, help="constituents per snapshot (overrides --scale)")
+    parser.add_argument('--quarters', type=int, help="number of quarterly rebalancing periods (overrides --scale)")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='daily')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="runs of every benchmark; the fastest is reported")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes of the parallel calculation")
+    parser.add_argument('--regenerate', action='store_true', help="write the synthetic universe again")
+    parser.add_argument('--output', help="result file, default benchmarks/results/<time>-<tokens>x<quarters>.json")
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    tokens, quarters = SCALES[args.scale]
+    tokens = args.tokens or tokens
+    quarters = args.quarters or quarters
+    resolution = get_resolution(args.resolution)
+
+    universe_dir = os.path.join(DATA_DIR, f'{tokens}x{quarters}{file_suffix(resolution)}-seed{args.seed}')
+    index_folder = os.path.join(universe_dir, 'index-synthetic')
+    generate_seconds = None
+    if args.regenerate or not os.path.isdir(index_folder):
+        print(f"Generating {tokens} tokens x {quarters} quarters in {universe_dir}")
+        started = time.perf_counter()
+        generate_universe(universe_dir, tokens, quarters, args.seed, resolution=resolution)
+        generate_seconds = time.perf_counter() - started
+
+    results = run_benchmarks(index_folder, os.path.join(universe_dir, 'risk-free-rate', 'risk_free_rate.csv'),
+                             tokens, args.repeat, resolution, args.workers)
+    for name, result in results.items():
+        print(f"{name:<36}{result['min']:>10.4f}s (median {result['median']:.4f}s)")
+
+    created = datetime.now(timezone.utc)
+    record = {
+        'created': created.isoformat(timespec='seconds'),
+        'universe': {'tokens': tokens, 'quarters': quarters, 'resolution': resolution.name, 'seed': args.seed,
+                     'generate_seconds': generate_seconds},
+        'repeat': args.repeat,
+        'workers': args.workers,
+        'environment': environment(),
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{created:%Y%m%dT%H%M%S}-{tokens}x{quarters}{file_suffix(resolution)}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
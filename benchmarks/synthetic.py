@@ -0,0 +1,158 @@
+"""Synthetic market universe in the layout of an index folder, for benchmarks.
+
+Writes
+
+    <out>/index-synthetic/data/index_snapshots/<period>.csv
+    <out>/index-synthetic/data/prices/<period>/<token>.csv     (prices_hourly for hourly data)
+    <out>/risk-free-rate/risk_free_rate.csv
+
+Prices follow a one-factor model: every token loads on a common market return and
+adds fat-tailed idiosyncratic noise, so index returns are correlated the way crypto
+assets are. Supplies are Pareto distributed, giving the skewed market caps that make
+cw and ew indices differ. Each snapshot ranks the universe by market cap on the
+period start, so constituents churn between periods, and a small share of points is
+missing from the price files. Prices are daily, or hourly with --resolution hourly.
+
+    python benchmarks/synthetic.py --scale medium --out benchmarks/data/medium
+"""
+import os
+import sys
+import csv
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.resolution import DAY, RESOLUTIONS, get_resolution, prices_dir_for
+
+QUARTER_DAYS = 91
+FIRST_PERIOD = 1609632000  # 2021-01-03, the first rebalancing of the real indices
+
+# (constituents, quarters) of the predefined scales
+SCALES = {
+    'small': (30, 9),
+    'medium': (300, 20),
+    'large': (2000, 40),
+}
+
+SNAPSHOT_FIELDS = ["Rank", "Name", "Symbol", "Coingecko ID", "Market Cap", "Price", "Circulating Supply",
+                   "volume (24h)", "% 1h", "% 24h", "% 7d"]
+
+
+def simulate_universe(universe_size, points, seed=0, step=DAY):
+    """Prices and market caps of `universe_size` tokens every `step` seconds, as (points x tokens) arrays."""
+    rng = np.random.default_rng(seed)
+    # Daily drift and volatilities, scaled to the step
+    scale = step / DAY
+    market = rng.normal(0.0005 * scale, 0.035 * np.sqrt(scale), points)
+    beta = rng.uniform(0.6, 1.6, universe_size)
+    volatility = rng.uniform(0.02, 0.08, universe_size) * np.sqrt(scale)
+    # Student-t noise with 4 degrees of freedom, scaled to unit variance
+    noise = rng.standard_t(4, (points, universe_size)) / np.sqrt(2)
+    log_returns = market[:, None] * beta + noise * volatility
+    log_returns[0] = 0
+
+    prices = rng.lognormal(0, 2, universe_size) * np.exp(np.cumsum(log_returns, axis=0))
+    supply = (rng.pareto(1.2, universe_size) + 1) * 1e6
+    return prices, prices * supply, supply
+
+
+def token_ids(universe_size):
+    return [f"token-{number:05d}" for number in range(universe_size)]
+
+
+def write_snapshot(snapshot_file, ranked_tokens, prices, market_caps, supply):
+    with open(snapshot_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SNAPSHOT_FIELDS)
+        for rank, (token_id, price, market_cap, circulating) in enumerate(zip(ranked_tokens, prices, market_caps, supply), 1):
+            symbol = token_id.replace("token-", "T")
+            writer.writerow([rank, token_id.title(), symbol, token_id, f"${market_cap:,.2f}", f"${price:,.2f}",
+                             f"{circulating:,.0f} {symbol}", f"${market_cap * 0.05:,.2f}", "0,00%", "0,00%", "0,00%"])
+
+
+def write_price_file(price_file, timestamps, prices, market_caps, keep):
+    with open(price_file, "w") as f:
+        f.write("timestamp,price,market_cap\n")
+        f.writelines(f"{timestamp * 1000},{price!r},{market_cap!r}\n"
+                     for timestamp, price, market_cap, kept in zip(timestamps, prices.tolist(), market_caps.tolist(), keep)
+                     if kept)
+
+
+def write_risk_free_rate(risk_free_file, first_ts, days, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    # Yield in percent, drifting slowly like a treasury bill rate
+    yields = np.clip(0.05 + np.cumsum(rng.normal(0, 0.01, days)), 0, None)
+    dates = np.datetime64(first_ts, 's').astype('datetime64[D]') + np.arange(days)
+    with open(risk_free_file, "w") as f:
+        f.write("Date,yield\n")
+        f.writelines(f"{date},{value!r}\n" for date, value in zip(dates.astype(str), yields.tolist()))
+
+
+def generate_universe(out_dir, tokens=30, quarters=9, seed=0, churn=0.25, missing_rate=0.002, resolution=None):
+    """Write snapshots of `tokens` constituents and their price files for `quarters` periods.
+
+    The universe holds `churn` more tokens than an index snapshot, so membership changes
+    between periods. Price files go to the prices folder of `resolution` (daily by
+    default). Returns the index folder.
+    """
+    resolution = resolution or get_resolution()
+    rng = np.random.default_rng(seed + 2)
+    universe_size = max(tokens, int(round(tokens * (1 + churn))))
+    period_points = QUARTER_DAYS * DAY // resolution.step
+    points = quarters * period_points + 1
+    prices, market_caps, supply = simulate_universe(universe_size, points, seed, resolution.step)
+    ids = np.array(token_ids(universe_size))
+    timestamps = FIRST_PERIOD + resolution.step * np.arange(points)
+
+    index_folder = os.path.join(out_dir, "index-synthetic")
+    snapshots_dir = os.path.join(index_folder, "data", "index_snapshots")
+    prices_dir = prices_dir_for(os.path.join(index_folder, "data"), resolution)
+    os.makedirs(snapshots_dir, exist_ok=True)
+
+    for quarter in range(quarters):
+        first = quarter * period_points
+        last = first + period_points
+        period = str(np.datetime64(int(timestamps[first]), 's').astype('datetime64[D]'))
+
+        ranked = np.argsort(-market_caps[first], kind="stable")[:tokens]
+        write_snapshot(os.path.join(snapshots_dir, f"{period}.csv"), ids[ranked], prices[first, ranked],
+                       market_caps[first, ranked], supply[ranked])
+
+        period_dir = os.path.join(prices_dir, period)
+        os.makedirs(period_dir, exist_ok=True)
+        period_timestamps = timestamps[first:last + 1]
+        for token in ranked:
+            # Both period ends are always present, the timestamps of a period are validated on them
+            keep = rng.random(len(period_timestamps)) >= missing_rate
+            keep[0] = keep[-1] = True
+            write_price_file(os.path.join(period_dir, f"{ids[token]}.csv"), period_timestamps,
+                             prices[first:last + 1, token], market_caps[first:last + 1, token], keep)
+
+    risk_free_dir = os.path.join(out_dir, "risk-free-rate")
+    os.makedirs(risk_free_dir, exist_ok=True)
+    write_risk_free_rate(os.path.join(risk_free_dir, "risk_free_rate.csv"), FIRST_PERIOD, quarters * QUARTER_DAYS + 1, seed)
+
+    return index_folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic market universe in the layout of an index folder.")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--tokens', type=int, help="constituents per snapshot (overrides --scale)")
+    parser.add_argument('--quarters', type=int, help="number of quarterly rebalancing periods (overrides --scale)")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='daily')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="output folder, default benchmarks/data/<tokens>x<quarters>")
+    args = parser.parse_args()
+
+    tokens, quarters = SCALES[args.scale]
+    tokens = args.tokens or tokens
+    quarters = args.quarters or quarters
+    out_dir = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', f'{tokens}x{quarters}')
+
+    index_folder = generate_universe(out_dir, tokens, quarters, args.seed, resolution=get_resolution(args.resolution))
+    print(f"Wrote {tokens} tokens x {quarters} quarters of {args.resolution} prices to {index_folder}")
+
+
+if __name__ == '__main__':
+    main()
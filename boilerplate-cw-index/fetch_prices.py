@@ -1,91 +1,56 @@
 import os
-import csv
-import requests
-from datetime import datetime, timedelta
-from tqdm import tqdm
+import sys
 import shutil
+import argparse
 import configparser
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.coingecko import CACHE_DIR, CoinGeckoClient
+from eei.fetch import REBALANCING_PERIODS, fetch_prices, print_error
+from eei.resolution import get_resolution, prices_dir_for
+
 config = configparser.ConfigParser()
 config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
 config.read(config_path)
 
 API_KEY = config['COINGECKO']['api_key']
-API_URL = 'https://pro-api.coingecko.com/api/v3'
+# Requests per minute allowed by the CoinGecko Pro API plan, shared by all workers
+CALLS_PER_MINUTE = config.getint('COINGECKO', 'calls_per_minute', fallback=500)
+MAX_WORKERS = config.getint('COINGECKO', 'max_workers', fallback=8)
+CACHE_DIR = config.get('COINGECKO', 'cache_dir', fallback=CACHE_DIR)
+API_URL = config.get('COINGECKO', 'api_url', fallback=None)
 INDEX_FOLDER = config['INDEX']['index_folder']
+RESOLUTION = get_resolution(config.get('INDEX', 'resolution', fallback='daily'))
 INDEX_SNAPSHOT_DIR = os.path.join(INDEX_FOLDER, 'data/index_snapshots')
-PRICES_DIR = os.path.join(INDEX_FOLDER, 'data/prices')
-
-# Delete the prices folder if it exists
-if os.path.exists(PRICES_DIR):
-    shutil.rmtree(PRICES_DIR)
-
-# Create the prices folder
-os.makedirs(PRICES_DIR, exist_ok=True)
-
-# Function to print text in red
-def print_error(text):
-    print(f"\033[1;31m{text}\033[0m\n")
-
-# Function to fetch historical data for a token
-def fetch_token_data(token_id, from_timestamp, to_timestamp):
-    url = f'{API_URL}/coins/{token_id}/market_chart/range'
-    params = {
-        'vs_currency': 'usd',
-        'from': from_timestamp,
-        'to': to_timestamp,
-        'interval': 'daily',
-        'x_cg_pro_api_key': API_KEY
-    }
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error fetching data for {token_id}: {response.status_code}")
-        return None
+# Daily prices go to data/prices, other resolutions to e.g. data/prices_hourly
+PRICES_DIR = prices_dir_for(os.path.join(INDEX_FOLDER, 'data'), RESOLUTION)
 
-# Hardcoded timestamps for the rebalancing periods
-rebalancing_periods = [
-    ('2021-01-03', 1609632000, 1617494400),
-    ('2021-04-04', 1617494400, 1625356800),
-    ('2021-07-04', 1625356800, 1633219200),
-    ('2021-10-03', 1633219200, 1641081600),
-    ('2022-01-02', 1641081600, 1648944000),
-    ('2022-04-03', 1648944000, 1656806400),
-    ('2022-07-03', 1656806400, 1664668800),
-    ('2022-10-02', 1664668800, 1672531200),
-    ('2023-01-01', 1672531200, 1680393600)
-]
 
-progress_bar = tqdm(rebalancing_periods, desc="Fetching prices", bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}")
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the price data of every index snapshot constituent.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="delete all price data and fetch everything again, bypassing the response cache")
+    args = parser.parse_args()
 
-for period_start, from_timestamp, to_timestamp in progress_bar:
-    snapshot_file = f'{period_start}.csv'
-    
-    snapshot_folder = os.path.join(PRICES_DIR, snapshot_file[:-4])
-    os.makedirs(snapshot_folder, exist_ok=True)
+    # Only missing or incomplete price files are fetched, unless a full refresh is requested
+    if args.refresh and os.path.exists(PRICES_DIR):
+        shutil.rmtree(PRICES_DIR)
 
-    with open(os.path.join(INDEX_SNAPSHOT_DIR, snapshot_file), 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            token_id = row['Coingecko ID']
+    # Create the prices folder
+    os.makedirs(PRICES_DIR, exist_ok=True)
 
-            # Check if the token's price data file already exists in the snapshot_folder
-            token_file = os.path.join(snapshot_folder, f"{token_id}.csv")
-            if os.path.exists(token_file):
-                continue
+    client = CoinGeckoClient(API_KEY, api_url=API_URL, calls_per_minute=CALLS_PER_MINUTE, pool_size=MAX_WORKERS,
+                             cache_dir=CACHE_DIR, refresh=args.refresh)
+    failures = fetch_prices(client, INDEX_SNAPSHOT_DIR, PRICES_DIR, REBALANCING_PERIODS, max_workers=MAX_WORKERS,
+                            resolution=RESOLUTION)
+    print(client.summary())
 
-            token_data = fetch_token_data(token_id, from_timestamp, to_timestamp)
+    if failures:
+        print_error(f"Failed to fetch {len(failures)} constituent price files, rerun to retry them:")
+        for period_start, token_id, reason in failures:
+            print(f"  {period_start} {token_id}: {reason}")
+        sys.exit(1)
 
-            if token_data and token_data['prices']:
-                with open(token_file, 'w', newline='') as token_csv:
-                    writer = csv.writer(token_csv)
-                    writer.writerow(['timestamp', 'price', 'market_cap'])
 
-                    for data_point in token_data['prices']:
-                        timestamp, price = data_point
-                        market_cap = [x[1] for x in token_data['market_caps'] if x[0] == timestamp][0]
-                        writer.writerow([timestamp, price, market_cap])
-            else:
-                print_error(f"\nWarning: No price data for {token_id}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
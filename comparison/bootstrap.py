@@ -0,0 +1,41 @@
+import os
+import sys
+import argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.assets import BENCHMARKS, load_benchmark, load_index_history, load_risk_free_rate
+from eei.bootstrap import METHODS, bootstrap_comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals of the metrics of index-cw-30 and "
+                                                 "the benchmarks, and tests of their differences.")
+    parser.add_argument('--resamples', type=int, default=10000)
+    parser.add_argument('--method', choices=METHODS, default='stationary',
+                        help="blocks of random (stationary) or fixed (block) length")
+    parser.add_argument('--block-length', type=float, default=10, help="mean block length in days")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="processes for the resamples")
+    args = parser.parse_args()
+    block_length = args.block_length if args.method == 'stationary' else int(args.block_length)
+
+    # Read risk-free rate data
+    risk_free_rate = load_risk_free_rate() / 100  # Convert to decimal
+
+    # Read asset data, the series are compared on the days all of them have
+    assets = {'index-cw-30': load_index_history('index-cw-30'), **{name: load_benchmark(name) for name in BENCHMARKS}}
+    prices = pd.concat(assets, axis=1).sort_index().dropna()
+    risk_free_yields = risk_free_rate.reindex(prices.index, method='ffill')
+
+    metrics_df, differences_df = bootstrap_comparison(prices, risk_free_yields, args.resamples, block_length,
+                                                      args.method, args.confidence, args.seed, args.workers)
+    print(differences_df.to_string(index=False))
+
+    metrics_df.to_csv('comparison/bootstrap_metrics.csv', index=False)
+    differences_df.to_csv('comparison/bootstrap_differences.csv', index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,18 @@
 import os
+import sys
+import argparse
 import pandas as pd
 import numpy as np
 
-def read_asset_history(file_path, index_column, date_format=None, unit=None):
-    asset_history = pd.read_csv(file_path)
-    asset_history[index_column] = pd.to_datetime(asset_history[index_column], format=date_format, unit=unit)
-    asset_history.set_index(index_column, inplace=True)
-    return asset_history
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.assets import load_benchmark, load_index_history, load_risk_free_rate
+
 
 def align_risk_free_rate(asset_history, risk_free_rate):
     aligned_risk_free_rate = risk_free_rate.reindex(asset_history.index, method='ffill')
     return aligned_risk_free_rate
 
+
 def calculate_summary_statistics(asset_history, aligned_risk_free_rate):
     daily_returns = asset_history.pct_change().dropna()
     adjusted_daily_returns = daily_returns.subtract(aligned_risk_free_rate['yield'], axis=0)
@@ -27,33 +28,42 @@ def calculate_summary_statistics(asset_history, aligned_risk_free_rate):
     }
     return summary_statistics
 
-# Read risk-free rate data
-risk_free_rate_file_path = 'risk-free-rate/risk_free_rate.csv'
-risk_free_rate = pd.read_csv(risk_free_rate_file_path, parse_dates=['Date'], index_col='Date')
-risk_free_rate['yield'] = risk_free_rate['yield'] / 100  # Convert to decimal
-
-# Read asset data
-index_history = read_asset_history('index-cw-30/data/index_history.csv', 'timestamp', unit='s')
-bitcoin_history = read_asset_history('comparison/data/bitcoin_prices.csv', 'timestamp', unit='s')
-ethereum_history = read_asset_history('comparison/data/ethereum_prices.csv', 'timestamp', unit='s')
-dpi_history = read_asset_history('comparison/data/dpi_prices.csv', 'timestamp', unit='s')
-crix_history = read_asset_history('comparison/data/crix_prices.csv', 'Effective date', date_format='%d.%m.%y')
 
 def normalize_prices(asset_history):
     return asset_history / asset_history.iloc[0]
 
-# Calculate summary statistics for each asset
-results = []
-assets = {'index-cw-30': index_history, 'bitcoin': bitcoin_history, 'ethereum': ethereum_history, 'dpi': dpi_history, 'crix': crix_history}
-
-for asset, asset_history in assets.items():
-    asset_history = asset_history.dropna()
-    asset_history = normalize_prices(asset_history)
-    aligned_risk_free_rate = align_risk_free_rate(asset_history, risk_free_rate)
-    summary_statistics = calculate_summary_statistics(asset_history, aligned_risk_free_rate)
-    result = {'index': asset, **summary_statistics}
-    results.append(result)
-
-# Save the results in a dataframe and export to a CSV file
-results_df = pd.DataFrame(results)
-results_df.to_csv('comparison/descriptive_statistics.csv', index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate the descriptive statistics of index-cw-30 and the benchmarks.")
+    parser.parse_args()
+
+    # Read risk-free rate data
+    risk_free_rate = load_risk_free_rate().to_frame()
+    risk_free_rate['yield'] = risk_free_rate['yield'] / 100  # Convert to decimal
+
+    # Read asset data
+    index_history = load_index_history('index-cw-30').to_frame()
+    bitcoin_history = load_benchmark('bitcoin').to_frame()
+    ethereum_history = load_benchmark('ethereum').to_frame()
+    dpi_history = load_benchmark('dpi').to_frame()
+    crix_history = load_benchmark('crix').to_frame()
+
+    # Calculate summary statistics for each asset
+    results = []
+    assets = {'index-cw-30': index_history, 'bitcoin': bitcoin_history, 'ethereum': ethereum_history, 'dpi': dpi_history, 'crix': crix_history}
+
+    for asset, asset_history in assets.items():
+        asset_history = asset_history.dropna()
+        asset_history = normalize_prices(asset_history)
+        aligned_risk_free_rate = align_risk_free_rate(asset_history, risk_free_rate)
+        summary_statistics = calculate_summary_statistics(asset_history, aligned_risk_free_rate)
+        result = {'index': asset, **summary_statistics}
+        results.append(result)
+
+    # Save the results in a dataframe and export to a CSV file
+    results_df = pd.DataFrame(results)
+    results_df.to_csv('comparison/descriptive_statistics.csv', index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from eei.cli import main
+
+sys.exit(main())
@@ -0,0 +1,127 @@
+"""One loader for the price and index series of the analysis scripts.
+
+Every series is parsed by the reader of its file format into a float64 Series on a
+DatetimeIndex, and kept as a binary copy in .cache/assets, keyed by the absolute path
+of the CSV with its size and mtime. Later loads of an unchanged file, in any script,
+read the copy and skip CSV and date parsing; within one process a series is only
+loaded once.
+"""
+import os
+import hashlib
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+from eei.resolution import get_resolution, index_history_file_for
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT_DIR, '.cache', 'assets')
+CACHE_VERSION = 2
+
+# `path` is relative to the repository root, `reader` one of READERS
+AssetSource = namedtuple('AssetSource', ['path', 'reader'])
+
+
+def read_index_csv(path):
+    data = pd.read_csv(path, usecols=['timestamp', 'index_value'])
+    return pd.to_datetime(data['timestamp'], unit='s'), data['index_value']
+
+
+def read_coingecko_csv(path):
+    data = pd.read_csv(path, usecols=['timestamp', 'price'])
+    return pd.to_datetime(data['timestamp'], unit='s'), data['price']
+
+
+def read_crix_csv(path):
+    data = pd.read_csv(path)
+    return pd.to_datetime(data['Effective date'], format='%d.%m.%y'), data.iloc[:, 1]
+
+
+def read_risk_free_rate_csv(path):
+    # The yield in percent, as in the file
+    data = pd.read_csv(path, usecols=['Date', 'yield'])
+    return pd.to_datetime(data['Date'], format='%Y-%m-%d'), data['yield']
+
+
+READERS = {
+    'index': read_index_csv,
+    'coingecko': read_coingecko_csv,
+    'crix': read_crix_csv,
+    'risk_free_rate': read_risk_free_rate_csv,
+}
+
+BENCHMARKS = {
+    'bitcoin': AssetSource('comparison/data/bitcoin_prices.csv', 'coingecko'),
+    'ethereum': AssetSource('comparison/data/ethereum_prices.csv', 'coingecko'),
+    'dpi': AssetSource('comparison/data/dpi_prices.csv', 'coingecko'),
+    'crix': AssetSource('comparison/data/crix_prices.csv', 'crix'),
+}
+RISK_FREE_RATE = AssetSource('risk-free-rate/risk_free_rate.csv', 'risk_free_rate')
+
+# Series loaded by this process, by cache key
+_loaded = {}
+
+
+def cache_file_for(path, cache_dir=None):
+    digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir or CACHE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}-{digest}.npz")
+
+
+def read_cache(cache_file, key):
+    try:
+        with np.load(cache_file) as cached:
+            if cached['key'].tolist() != key:
+                return None
+            return cached['dates'], cached['values']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cache(cache_file, key, dates, values):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # Written next to the cache file and renamed, so readers never see half of it; chart
+    # workers may write the same series at once, so every process has its own file
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_file, key=np.array(key), dates=dates, values=values)
+    os.replace(tmp_file, cache_file)
+
+
+def load_series(path, reader, name=None, cache_dir=None):
+    """Return the series in the CSV at `path`, read by READERS[`reader`], as a float64
+    Series on a sorted DatetimeIndex without missing values."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = [str(CACHE_VERSION), reader, str(stat.st_size), str(stat.st_mtime_ns)]
+    memo_key = (path, *key)
+    if memo_key not in _loaded:
+        cache_file = cache_file_for(path, cache_dir)
+        cached = read_cache(cache_file, key)
+        if cached is None:
+            dates, values = READERS[reader](path)
+            series = pd.Series(pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64),
+                               index=pd.DatetimeIndex(dates)).dropna().sort_index()
+            dates, values = series.index.to_numpy(dtype='datetime64[ns]'), series.to_numpy()
+            write_cache(cache_file, key, dates, values)
+        else:
+            dates, values = cached
+        _loaded[memo_key] = (dates, values)
+
+    dates, values = _loaded[memo_key]
+    # A new Series each time, callers may modify theirs
+    return pd.Series(values.copy(), index=pd.DatetimeIndex(dates), name=name)
+
+
+def load_index_history(folder, resolution=None):
+    """The index values of the index folder `folder`, named after it."""
+    history_file = index_history_file_for(os.path.join(folder, 'data'), resolution or get_resolution())
+    return load_series(history_file, 'index', name=os.path.basename(os.path.normpath(folder)))
+
+
+def load_benchmark(name):
+    source = BENCHMARKS[name]
+    return load_series(os.path.join(ROOT_DIR, source.path), source.reader, name=name)
+
+
+def load_risk_free_rate(path=None):
+    """The daily risk-free yield in percent, from risk-free-rate/risk_free_rate.csv by default."""
+    return load_series(path or os.path.join(ROOT_DIR, RISK_FREE_RATE.path), RISK_FREE_RATE.reader, name='yield')
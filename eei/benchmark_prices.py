@@ -0,0 +1,109 @@
+"""Daily benchmark prices shared by every index folder, kept in comparison/data.
+
+plot.py compares each index with Ethereum and Bitcoin over the same range. Their
+prices are read from comparison/data/<name>_prices.csv first, and only the days
+before or after what a file holds are requested from CoinGecko and added to it, so
+plotting needs no network access once the files cover the range.
+"""
+import os
+import pandas as pd
+
+from eei.assets import ROOT_DIR, load_series
+from eei.fetch import fetch_market_chart, last_complete_timestamp
+from eei.ingest import clip_columns, ingest_market_chart
+from eei.manifest import write_atomic
+from eei.resolution import DAY, get_resolution
+
+STORE_DIR = os.path.join(ROOT_DIR, 'comparison', 'data')
+# Coingecko IDs stored under another name
+STORE_NAMES = {'defipulse-index': 'dpi'}
+
+
+def store_file_for(token_id, store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, f"{STORE_NAMES.get(token_id, token_id)}_prices.csv")
+
+
+def seconds(index):
+    return index.as_unit('s').asi8
+
+
+def line_terminator(path):
+    # Rewritten files keep their line endings, the files in comparison/data end lines with CRLF
+    try:
+        with open(path, 'rb') as f:
+            return '\r\n' if f.readline().endswith(b'\r\n') else '\n'
+    except OSError:
+        return '\n'
+
+
+def format_rows(prices, terminator):
+    rows = pd.DataFrame({'timestamp': seconds(prices.index), 'price': prices.to_numpy()})
+    return rows.to_csv(header=False, index=False, lineterminator=terminator)
+
+
+def write_store_file(store_file, head, tail):
+    """Add prices before and after those of a price file, leaving its rows as they are."""
+    terminator = line_terminator(store_file)
+    rows = []
+    if os.path.exists(store_file):
+        with open(store_file, newline='') as f:
+            rows = f.readlines()[1:]
+        if rows and not rows[-1].endswith('\n'):
+            rows[-1] += terminator
+
+    def write(f):
+        f.write(f"timestamp,price{terminator}")
+        f.write(format_rows(head, terminator))
+        f.writelines(rows)
+        f.write(format_rows(tail, terminator))
+
+    os.makedirs(os.path.dirname(store_file), exist_ok=True)
+    write_atomic(store_file, write)
+
+
+def missing_ranges(timestamps, from_timestamp, to_timestamp):
+    """The parts of [from, to] before the first and after the last of the stored `timestamps`."""
+    if not len(timestamps):
+        return [(from_timestamp, to_timestamp)]
+    ranges = []
+    if from_timestamp < timestamps[0]:
+        ranges.append((from_timestamp, int(timestamps[0]) - DAY))
+    if to_timestamp > timestamps[-1]:
+        ranges.append((int(timestamps[-1]) + DAY, to_timestamp))
+    return ranges
+
+
+def fetch_benchmark_prices(client, token_id, from_timestamp, to_timestamp):
+    token_data = fetch_market_chart(client, token_id, from_timestamp, to_timestamp, get_resolution('daily'))
+    columns = clip_columns(ingest_market_chart(token_data).columns, from_timestamp, to_timestamp)
+    return pd.Series(columns['price'], index=pd.to_datetime(columns['timestamp'] // 1000, unit='s'))
+
+
+def load_benchmark_prices(token_id, from_timestamp, to_timestamp, client=None, store_dir=None, now=None):
+    """Daily prices of `token_id` over [from, to] (in seconds), as a Series on a DatetimeIndex.
+
+    Days the store does not hold are fetched with `client` and saved to it first;
+    without a client the stored prices are returned as they are. Days that have not
+    ended yet are never requested.
+    """
+    store_file = store_file_for(token_id, store_dir)
+    if os.path.exists(store_file):
+        stored = load_series(store_file, 'coingecko')
+    else:
+        stored = pd.Series(dtype=float, index=pd.DatetimeIndex([], dtype='datetime64[ns]'))
+    to_timestamp = min(to_timestamp, last_complete_timestamp(now))
+
+    ranges = missing_ranges(seconds(stored.index), from_timestamp, to_timestamp) if client is not None else []
+    fetched = [fetch_benchmark_prices(client, token_id, *missing) for missing in ranges if missing[0] <= missing[1]]
+    fetched = [prices for prices in fetched if len(prices)]
+    if fetched:
+        prices = pd.concat(fetched)
+        if len(stored):
+            head, tail = prices[prices.index < stored.index[0]], prices[prices.index > stored.index[-1]]
+        else:
+            head, tail = prices.iloc[:0], prices
+        write_store_file(store_file, head, tail)
+        stored = pd.concat([head, stored, tail])
+
+    timestamps = seconds(stored.index)
+    return stored[(timestamps >= from_timestamp) & (timestamps <= to_timestamp)].rename(token_id)
@@ -0,0 +1,142 @@
+"""Bootstrap confidence intervals and difference tests of risk-adjusted performance.
+
+The returns of all series are resampled together, row by row, so every resample keeps
+their cross-correlation. Rows are drawn in blocks to keep the serial dependence of
+daily crypto returns: blocks of a fixed length (moving block bootstrap) or of a
+geometric length with the given mean (stationary bootstrap, Politis and Romano, 1994).
+
+A batch of resamples is one (series x resamples x periods) array, and the metrics
+of comparison/descriptive.py are computed along its period axis, so each batch takes
+a few array operations. Batches are spread over a process pool, each with its own
+random stream from one seed, so the results do not depend on the number of workers.
+"""
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+METHODS = ('stationary', 'block')
+METRICS = ('sharpe_ratio', 'sortino_ratio', 'max_drawdown')
+
+# Resamples per task, bounds the memory of a batch
+BATCH_SIZE = 250
+
+
+def resample_indices(rng, periods, resamples, block_length, method='stationary'):
+    """Row indices of `resamples` resamples of `periods` rows, as a (resamples x periods) array.
+
+    Every block starts at a random row and continues with the rows after it, wrapping
+    around at the end.
+    """
+    positions = np.arange(periods)
+    starts = rng.integers(0, periods, (resamples, periods))
+    if method == 'stationary':
+        new_block = rng.random((resamples, periods)) < 1 / block_length
+    elif method == 'block':
+        new_block = np.broadcast_to(positions % block_length == 0, (resamples, periods))
+    else:
+        raise ValueError(f"Unknown bootstrap method {method!r}, expected one of {', '.join(METHODS)}")
+
+    block_start = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1)
+    return (np.take_along_axis(starts, block_start, axis=1) + positions - block_start) % periods
+
+
+def moments(values, included, count):
+    """Mean and sample standard deviation (ddof=1, like pandas) of the `included` values along the last axis."""
+    values = np.where(included, values, 0) if included is not None else values
+    total = values.sum(axis=-1)
+    squares = np.einsum('...i,...i->...', values, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        return mean, np.sqrt(np.maximum(squares - total * mean, 0) / (count - 1))
+
+
+def performance_metrics(returns, risk_free_yields):
+    """Sharpe and Sortino ratios and maximum drawdown, as in comparison/descriptive.py.
+
+    `returns` is an array with the periods on its last axis and `risk_free_yields` the
+    yields of those periods, subtracted from every return. Returns a dict of arrays
+    of the other axes.
+    """
+    periods = returns.shape[-1]
+    adjusted_returns = returns - risk_free_yields
+    mean, std = moments(adjusted_returns, None, periods)
+    downside = adjusted_returns < 0
+    _, downside_std = moments(adjusted_returns, downside, downside.sum(axis=-1))
+
+    # Drawdowns of the prices the returns compound to, starting from one
+    prices = np.cumprod(1 + returns, axis=-1)
+    peaks = np.maximum(np.maximum.accumulate(prices, axis=-1), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'sharpe_ratio': mean / std,
+            'sortino_ratio': mean / downside_std,
+            'max_drawdown': 1 - (prices / peaks).min(axis=-1),
+        }
+
+
+def bootstrap_task(returns, risk_free_yields, resamples, block_length, method, seed):
+    rng = np.random.default_rng(seed)
+    indices = resample_indices(rng, len(returns), resamples, block_length, method)
+    # (series x resamples x periods), the periods of a resample next to each other in memory
+    metrics = performance_metrics(returns.T[:, indices], risk_free_yields[indices])
+    return {metric: values.T for metric, values in metrics.items()}
+
+
+def bootstrap_metrics(returns, risk_free_yields, resamples=10000, block_length=10, method='stationary', seed=0,
+                      max_workers=1):
+    """Metrics of `resamples` bootstrap resamples of the rows of `returns` (a periods x series array).
+
+    Returns a dict of (resamples x series) arrays.
+    """
+    batches = [BATCH_SIZE] * (resamples // BATCH_SIZE) + ([resamples % BATCH_SIZE] if resamples % BATCH_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    tasks = [(returns, risk_free_yields, size, block_length, method, batch_seed) for size, batch_seed in zip(batches, seeds)]
+
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(bootstrap_task, *zip(*tasks)))
+    else:
+        results = [bootstrap_task(*task) for task in tasks]
+    return {metric: np.concatenate([result[metric] for result in results]) for metric in METRICS}
+
+
+def bootstrap_comparison(prices, risk_free_yields, resamples=10000, block_length=10, method='stationary',
+                         confidence=0.95, seed=0, max_workers=1):
+    """Confidence intervals of the metrics of every column of `prices`, and of their
+    differences between every pair of columns with the p-value of no difference.
+
+    `prices` are the aligned series without missing values and `risk_free_yields` the
+    yields of statistics/descriptive.py (in decimal) on the same index. The intervals
+    are percentile intervals; the p-values are the share of resampled differences,
+    centered on the observed one, that lie further from it than zero does. Returns
+    (metrics, differences) DataFrames.
+    """
+    returns = prices.pct_change().iloc[1:]
+    values = returns.to_numpy(dtype=float)
+    yields = np.asarray(risk_free_yields, dtype=float)[1:]
+    estimates = performance_metrics(values.T, yields)
+    resampled = bootstrap_metrics(values, yields, resamples, block_length, method, seed, max_workers)
+    quantiles = [(1 - confidence) / 2, (1 + confidence) / 2]
+
+    metrics = []
+    for metric in METRICS:
+        lower, upper = np.nanquantile(resampled[metric], quantiles, axis=0)
+        for column, name in enumerate(prices.columns):
+            metrics.append({'series': name, 'metric': metric, 'estimate': estimates[metric][column],
+                            'ci_lower': lower[column], 'ci_upper': upper[column]})
+
+    differences = []
+    pairs = list(combinations(range(len(prices.columns)), 2))
+    first, second = np.array(pairs, dtype=int).reshape(-1, 2).T
+    for metric in METRICS:
+        estimate = estimates[metric][first] - estimates[metric][second]
+        resampled_differences = resampled[metric][:, first] - resampled[metric][:, second]
+        lower, upper = np.nanquantile(resampled_differences, quantiles, axis=0)
+        p_values = np.mean(np.abs(resampled_differences - estimate) >= np.abs(estimate), axis=0)
+        for pair, (i, j) in enumerate(pairs):
+            differences.append({'series': prices.columns[i], 'other': prices.columns[j], 'metric': metric,
+                                'difference': estimate[pair], 'ci_lower': lower[pair], 'ci_upper': upper[pair],
+                                'p_value': p_values[pair]})
+
+    return pd.DataFrame(metrics), pd.DataFrame(differences)
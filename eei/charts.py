@@ -0,0 +1,276 @@
+"""Render every chart of the repository in one process, or a small process pool.
+
+    python -m eei.charts                  charts/indices.png, charts/comparison_normalized.png
+                                          and <index folder>/<index folder>_chart.png
+    python -m eei.charts --workers 2 --force
+
+Matplotlib runs on the Agg backend and is imported once per process. Series with
+more points than the saved figure is wide in pixels are decimated with
+Largest-Triangle-Three-Buckets (Steinarsson, 2013), which keeps the peaks and
+troughs a line plot shows. A chart is only drawn again when one of its input files,
+the source of its drawer or of the helpers in SHARED_CODE, or its settings changed
+since it was last saved; the fingerprints are kept in .cache/charts/manifest.json.
+Bump CHART_VERSION for changes outside of that code, e.g. to the series loaders.
+"""
+import os
+import sys
+import glob
+import json
+import inspect
+import hashlib
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eei.assets import BENCHMARKS, ROOT_DIR, load_benchmark, load_index_history
+from eei.benchmark_prices import load_benchmark_prices, store_file_for
+from eei.manifest import write_atomic
+from eei.resolution import get_resolution, index_history_file_for
+
+# Bump when a chart changes outside of the fingerprinted code, so existing charts are drawn again
+CHART_VERSION = 1
+SAVE_DPI = 300
+MANIFEST_FILE = os.path.join(ROOT_DIR, '.cache', 'charts', 'manifest.json')
+
+# Range of the Bitcoin and Ethereum prices of the index charts
+BENCHMARK_RANGE = (1609632000, 1680393600)
+
+INDEX_FOLDERS = ['index-cw-10', 'index-cw-20', 'index-cw-30', 'index-ew-10', 'index-ew-20', 'index-ew-30']
+
+# `draw` names a function of DRAWERS called with `args`, `inputs` are the files it reads
+ChartJob = namedtuple('ChartJob', ['output', 'draw', 'args', 'inputs'])
+
+
+def lttb(x, y, threshold):
+    """Indices of `threshold` points of (x, y) chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; of every bucket in between the point forming
+    the largest triangle with the point kept before and the mean of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 1 < threshold - 2:
+            next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def decimate(series, max_points):
+    """`series` without missing values, reduced to `max_points` points if it has more."""
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    # Days since the first point, datetimes in nanoseconds would lose precision in the areas
+    days = (series.index - series.index[0]) / np.timedelta64(1, 'D')
+    return series.iloc[lttb(np.asarray(days), series.to_numpy(), max_points)]
+
+
+def max_points(fig):
+    return int(fig.get_figwidth() * SAVE_DPI)
+
+
+def set_date_ticks(ax, index):
+    import pandas as pd
+    xticks = pd.date_range(start=index.min(), end=index.max(), freq='18W')
+    ax.set_xticks(xticks)
+    ax.set_xticklabels([d.date().strftime('%m/%d/%Y') for d in xticks])
+
+
+def draw_indices(plt, folders, resolution_name):
+    """charts/indices.png: every index of the family."""
+    import pandas as pd
+    resolution = get_resolution(resolution_name)
+    all_indices_data = pd.concat([load_index_history(folder, resolution) for folder in folders], axis=1)
+
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=200)
+    colors = ['green', 'orange', 'blue', 'red', 'purple', 'brown']
+    for i, column in enumerate(all_indices_data.columns):
+        color = colors[i % 3] if 'cw' in column else colors[i % 3 + 3]
+        series = decimate(all_indices_data[column], max_points(fig))
+        ax.plot(series.index, series, label=column, color=color)
+
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Index Value")
+    set_date_ticks(ax, all_indices_data.index)
+    return fig
+
+
+def draw_benchmarks(plt, index_folder, labels):
+    """charts/comparison_normalized.png: an index and the benchmarks, from one on their first day."""
+    import pandas as pd
+    all_data = pd.concat([load_index_history(index_folder)] + [load_benchmark(name).rename(label)
+                                                               for name, label in labels.items()], axis=1)
+    normalized_data = all_data / all_data.apply(lambda column: column.dropna().iloc[0])
+
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=200)
+    colors = ['blue', 'orange', 'green', 'purple', 'red']
+    for i, column in enumerate(normalized_data.columns):
+        series = decimate(normalized_data[column], max_points(fig))
+        ax.plot(series.index, series, label=column, color=colors[i % len(colors)])
+
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Normalised Prices")
+    set_date_ticks(ax, normalized_data.index)
+    return fig
+
+
+def draw_index(plt, index_folder, resolution_name):
+    """<index folder>_chart.png of plot.py: the index with Ethereum and Bitcoin normalized to 100."""
+    index_history = load_index_history(index_folder, get_resolution(resolution_name))
+    # From the benchmark store only, plot.py fetches the days it is missing
+    ethereum_prices = load_benchmark_prices('ethereum', *BENCHMARK_RANGE)
+    bitcoin_prices = load_benchmark_prices('bitcoin', *BENCHMARK_RANGE)
+
+    fig, ax = plt.subplots(figsize=(16, 9), dpi=200)
+    points = max_points(fig)
+    index_history = decimate(index_history, points)
+    ethereum_prices = decimate(100 * ethereum_prices / ethereum_prices.iloc[0], points)
+    bitcoin_prices = decimate(100 * bitcoin_prices / bitcoin_prices.iloc[0], points)
+    ax.plot(index_history.index, index_history, color='blue', label="Crypto Index")
+    ax.plot(ethereum_prices.index, ethereum_prices, color='black', label="Normalized Ethereum Price")
+    ax.plot(bitcoin_prices.index, bitcoin_prices, color='red', label="Normalized Bitcoin Price")
+
+    ax.set_title("Crypto Index, Normalized Ethereum Price, and Normalized Bitcoin Price")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Index Value")
+    ax.legend()
+    return fig
+
+
+DRAWERS = {
+    'indices': draw_indices,
+    'benchmarks': draw_benchmarks,
+    'index': draw_index,
+}
+
+# Helpers of the drawers, their source is part of every chart fingerprint
+SHARED_CODE = [lttb, decimate, max_points, set_date_ticks]
+
+# Matplotlib settings of the charts in the charts folder
+CHARTS_RC = {'font.family': 'Times New Roman', 'font.size': 12}
+DRAWER_RC = {'indices': CHARTS_RC, 'benchmarks': CHARTS_RC, 'index': {}}
+
+
+def indices_job(folders=INDEX_FOLDERS, resolution=None):
+    resolution = resolution or get_resolution()
+    folders = [os.path.join(ROOT_DIR, folder) for folder in folders]
+    return ChartJob(os.path.join(ROOT_DIR, 'charts', 'indices.png'), 'indices', (list(folders), resolution.name),
+                    [index_history_file_for(os.path.join(folder, 'data'), resolution) for folder in folders])
+
+
+def benchmarks_job(index_folder='index-cw-30', labels=None):
+    labels = labels or {'bitcoin': 'bitcoin', 'dpi': 'dpi', 'ethereum': 'ethereum', 'crix': 'Royalton CRIX Crypto Index'}
+    index_folder = os.path.join(ROOT_DIR, index_folder)
+    inputs = [index_history_file_for(os.path.join(index_folder, 'data'), get_resolution())]
+    inputs += [os.path.join(ROOT_DIR, BENCHMARKS[name].path) for name in labels]
+    return ChartJob(os.path.join(ROOT_DIR, 'charts', 'comparison_normalized.png'), 'benchmarks', (index_folder, labels),
+                    inputs)
+
+
+def index_job(index_folder, resolution=None):
+    resolution = resolution or get_resolution()
+    index_folder = os.path.join(ROOT_DIR, index_folder)
+    name = os.path.basename(os.path.normpath(index_folder))
+    inputs = [index_history_file_for(os.path.join(index_folder, 'data'), resolution),
+              store_file_for('ethereum'), store_file_for('bitcoin')]
+    return ChartJob(os.path.join(index_folder, f"{name}_chart.png"), 'index', (index_folder, resolution.name), inputs)
+
+
+def default_jobs():
+    """The charts of the charts folder, and the plot.py chart of every index folder."""
+    index_folders = sorted(os.path.dirname(os.path.dirname(path))
+                           for path in glob.glob(os.path.join(ROOT_DIR, 'index-*', 'data', 'index_history.csv')))
+    return [indices_job(), benchmarks_job()] + [index_job(folder) for folder in index_folders]
+
+
+def code_fingerprint(draw):
+    source = ''.join(inspect.getsource(function) for function in [DRAWERS[draw]] + SHARED_CODE)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def job_fingerprint(job):
+    inputs = {}
+    for path in job.inputs:
+        stat = os.stat(path)
+        inputs[os.path.abspath(path)] = [stat.st_size, stat.st_mtime_ns]
+    return {'version': CHART_VERSION, 'code': code_fingerprint(job.draw), 'rc': DRAWER_RC[job.draw],
+            'dpi': SAVE_DPI, 'args': json.loads(json.dumps(job.args)), 'inputs': inputs}
+
+
+def read_manifest(manifest_file=MANIFEST_FILE):
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_job(job):
+    """Draw one chart and save it, in the calling process."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    with plt.rc_context(DRAWER_RC[job.draw]):
+        fig = DRAWERS[job.draw](plt, *job.args)
+        fig.savefig(job.output, dpi=SAVE_DPI, bbox_inches='tight')
+    plt.close(fig)
+    return job.output
+
+
+def render_charts(jobs, max_workers=1, force=False, manifest_file=MANIFEST_FILE):
+    """Render the charts whose inputs changed since they were saved, return their output files."""
+    manifest = read_manifest(manifest_file)
+    fingerprints = {os.path.abspath(job.output): job_fingerprint(job) for job in jobs}
+    stale = [job for job in jobs
+             if force or not os.path.exists(job.output)
+             or manifest.get(os.path.abspath(job.output)) != fingerprints[os.path.abspath(job.output)]]
+
+    if max_workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(stale))) as executor:
+            rendered = list(executor.map(render_job, stale))
+    else:
+        rendered = [render_job(job) for job in stale]
+
+    if rendered:
+        # Fingerprints as they were before drawing, a file changed meanwhile is drawn again next time
+        manifest.update({os.path.abspath(output): fingerprints[os.path.abspath(output)] for output in rendered})
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+        write_atomic(manifest_file, lambda f: json.dump(manifest, f, indent=1))
+    return rendered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the charts of the indices and the benchmarks.")
+    parser.add_argument('--workers', type=int, default=1, help="processes to render the charts with")
+    parser.add_argument('--force', action='store_true', help="render every chart, changed or not")
+    args = parser.parse_args(argv)
+
+    jobs = default_jobs()
+    rendered = render_charts(jobs, args.workers, args.force)
+    for output in rendered:
+        print(f"Saved {os.path.relpath(output)}")
+    print(f"{len(rendered)} of {len(jobs)} charts rendered, the others are up to date")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""The eei command, run from the repository root as python -m eei.
+
+    python -m eei check boilerplate-cw-index
+    python -m eei snapshot <index folder with config.ini>
+    python -m eei fetch <index folder with config.ini> --refresh
+    python -m eei calculate family --workers 4
+    python -m eei stats rolling --windows 30 90
+    python -m eei compare bootstrap --resamples 1000
+    python -m eei chart --force
+
+Every subcommand runs the script the README describes, in this process. This module
+only imports the standard library: pandas, numpy, matplotlib and requests are
+imported by the script a subcommand runs, so --help and config checks return at
+once. benchmarks/importtime.py holds the import time to a budget.
+"""
+import os
+import sys
+import argparse
+
+from eei.config import is_family, validate_config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts next to the config.ini of an index folder and of the family folder, by subcommand
+INDEX_SCRIPTS = {
+    'snapshot': 'index_snapshot_generator.py',
+    'fetch': 'fetch_prices.py',
+    'calculate': 'calculate_index.py',
+}
+FAMILY_SCRIPTS = {
+    'snapshot': 'index_snapshot_generator.py',
+    'calculate': 'calculate_indices.py',
+}
+STATISTICS_SCRIPTS = ['descriptive', 'inferential', 'rolling']
+COMPARISON_SCRIPTS = ['descriptive', 'inferential', 'bootstrap']
+# Subcommands that request data from Coingecko
+NEEDS_API_KEY = {'snapshot', 'fetch'}
+
+
+def run_script(path, argv):
+    """Run the script at `path` as __main__ with the arguments `argv`."""
+    import runpy
+    # The script's folder comes first on the import path, as with python <script>
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    sys.argv = [path] + list(argv)
+    runpy.run_path(path, run_name='__main__')
+
+
+def config_folder(folder):
+    return os.path.dirname(folder) if folder.endswith('.ini') else folder
+
+
+def needs_api_key(args):
+    return not args.offline if args.command == 'check' else args.command in NEEDS_API_KEY
+
+
+def config_script(args):
+    """The script of `args.command` next to the config of `args.folder`."""
+    family = is_family(args.config)
+    scripts = FAMILY_SCRIPTS if family else INDEX_SCRIPTS
+    if args.command not in scripts:
+        raise ValueError(f"There is no {args.command} step for {args.folder}, "
+                         f"run it with the config of the index with the most constituents")
+    if family and getattr(args, 'append', False):
+        raise ValueError(f"--append only applies to a single index, {args.folder} is always calculated in full")
+    return os.path.join(config_folder(args.folder), scripts[args.command])
+
+
+def check(args):
+    print(f"{args.folder}: config is valid")
+
+
+def snapshot(args):
+    run_script(args.script_path, [])
+
+
+def fetch(args):
+    run_script(args.script_path, ['--refresh'] if args.refresh else [])
+
+
+def calculate(args):
+    run_script(args.script_path, (['--append'] if args.append else [])
+               + (['--workers', str(args.workers)] if args.workers else []))
+
+
+def stats(args):
+    run_script(os.path.join(ROOT_DIR, 'statistics', f"{args.script}.py"), args.args)
+
+
+def compare(args):
+    run_script(os.path.join(ROOT_DIR, 'comparison', f"{args.script}.py"), args.args)
+
+
+def chart(args):
+    from eei.charts import main as render
+    render((['--workers', str(args.workers)] if args.workers else []) + (['--force'] if args.force else []))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='eei', description="Build, analyse and chart the Ethereum Ecosystem Index. "
+                                     "Run from the repository root.")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+    folder_help = "folder of the config.ini and the scripts, e.g. a copy of boilerplate-cw-index, or family"
+
+    command = commands.add_parser('check', help="check the config.ini of an index folder or of the family")
+    command.add_argument('folder', help=folder_help)
+    command.add_argument('--offline', action='store_true', help="do not require a Coingecko API key")
+    command.set_defaults(run=check)
+
+    command = commands.add_parser('snapshot', help="generate the index snapshots")
+    command.add_argument('folder', help=folder_help)
+    command.set_defaults(run=snapshot)
+
+    command = commands.add_parser('fetch', help="fetch the prices of the snapshot constituents")
+    command.add_argument('folder', help=folder_help)
+    command.add_argument('--refresh', action='store_true',
+                         help="delete all price data and fetch everything again, bypassing the response cache")
+    command.set_defaults(run=fetch)
+
+    command = commands.add_parser('calculate', help="calculate the index history, or the histories of the family")
+    command.add_argument('folder', help=folder_help)
+    command.add_argument('--append', action='store_true',
+                         help="only calculate the timestamps after the last run, unless earlier inputs changed")
+    command.add_argument('--workers', type=int,
+                         help="processes to calculate the rebalancing periods in (to convert the price store in, "
+                         "for the family)")
+    command.set_defaults(run=calculate)
+
+    command = commands.add_parser('stats', help="run a statistics script, the arguments after it are passed on")
+    command.add_argument('script', choices=STATISTICS_SCRIPTS)
+    command.add_argument('args', nargs=argparse.REMAINDER, help="arguments of the script, see --help after it")
+    command.set_defaults(run=stats)
+
+    command = commands.add_parser('compare', help="run a comparison script, the arguments after it are passed on")
+    command.add_argument('script', choices=COMPARISON_SCRIPTS)
+    command.add_argument('args', nargs=argparse.REMAINDER, help="arguments of the script, see --help after it")
+    command.set_defaults(run=compare)
+
+    command = commands.add_parser('chart', help="render the charts whose inputs changed")
+    command.add_argument('--workers', type=int, help="processes to render the charts with")
+    command.add_argument('--force', action='store_true', help="render every chart, changed or not")
+    command.set_defaults(run=chart)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Configs are checked before a script imports anything heavy
+    if 'folder' in args:
+        try:
+            args.config = validate_config(args.folder, api_key=needs_api_key(args))
+            if args.command in INDEX_SCRIPTS:
+                args.script_path = config_script(args)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+    args.run(args)
+    return 0
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = 'https://pro-api.coingecko.com/api/v3'
+CACHE_DIR = '.cache/coingecko'
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Coin metadata such as categories changes over time, refresh it daily
+COIN_CACHE_TTL = 86400
+# Ranges ending less than a day ago can still be revised
+OPEN_RANGE_CACHE_TTL = 3600
+DAY = 86400
+
+
+class CoinGeckoError(Exception):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `calls_per_minute` requests with bursts of `burst`."""
+
+    def __init__(self, calls_per_minute, burst=1):
+        self.rate = calls_per_minute / 60
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, without waiting."""
+        with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self):
+        with self.lock:
+            self.refill()
+            # Reserve a token, possibly going into debt, and wait outside the lock until it is paid off
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """On-disk cache of API responses keyed by base URL, endpoint and parameters.
+
+    Responses of different servers, such as the real API and eei.standin, never
+    answer for each other even when they share a cache folder.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, api_url=API_URL):
+        self.cache_dir = cache_dir
+        self.api_url = api_url
+
+    def path(self, endpoint, params):
+        key = hashlib.sha256(json.dumps([self.api_url, endpoint, params or {}], sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def get(self, endpoint, params, ttl=None):
+        """Return the cached response, or None if missing or older than `ttl` seconds (None never expires)."""
+        path = self.path(endpoint, params)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl is not None and time.time() - entry['fetched_at'] > ttl:
+            return None
+        return entry['data']
+
+    def set(self, endpoint, params, data):
+        path = self.path(endpoint, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'api_url': self.api_url, 'endpoint': endpoint, 'params': params, 'fetched_at': time.time(),
+                 'data': data}
+        # Unique temporary name so concurrent writers of the same key do not clash
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+def cache_ttl(endpoint, params):
+    """How long a response stays valid: forever for closed historical ranges."""
+    if endpoint.endswith('/market_chart/range'):
+        return None if int(params['to']) <= time.time() - DAY else OPEN_RANGE_CACHE_TTL
+    if endpoint.startswith('coins/'):
+        return COIN_CACHE_TTL
+    return 0
+
+
+class CoinGeckoClient:
+    """CoinGecko Pro API client with keep-alive connection pooling, a shared rate limit,
+    retries with jittered exponential backoff and an on-disk response cache.
+    Safe to use from several threads.
+
+    `stats` counts network requests by outcome, cache hits and retries; every
+    successful request uses one credit of the plan's monthly quota. With `refresh`,
+    cached responses are ignored and overwritten by fresh ones.
+    """
+
+    def __init__(self, api_key, api_url=None, calls_per_minute=500, pool_size=8, max_retries=5,
+                 backoff=1.0, max_backoff=60.0, timeout=30, cache_dir=CACHE_DIR, refresh=False):
+        # COINGECKO_API_URL points every script at another server, such as python -m eei.standin
+        self.api_url = (api_url or os.environ.get('COINGECKO_API_URL') or API_URL).rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(calls_per_minute, burst=pool_size)
+        self.cache = ResponseCache(cache_dir, self.api_url) if cache_dir else None
+        self.refresh = refresh
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers['x-cg-pro-api-key'] = api_key
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def count(self, stat):
+        with self.stats_lock:
+            self.stats[stat] += 1
+
+    def retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, path, params=None):
+        url = f'{self.api_url}/{path}'
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                reason, response = str(error), None
+                self.count('connection_errors')
+            else:
+                self.count(f'http_{response.status_code}')
+                if response.status_code == 200:
+                    self.count('credits_used')
+                    return response.json()
+                reason = f'HTTP {response.status_code}'
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+
+            if attempt < self.max_retries:
+                self.count('retries')
+                time.sleep(self.retry_delay(attempt, response))
+
+        raise CoinGeckoError(f'{path}: {reason}')
+
+    def get(self, path, params=None):
+        ttl = cache_ttl(path, params)
+        if self.cache is not None and ttl != 0 and not self.refresh:
+            data = self.cache.get(path, params, ttl)
+            if data is not None:
+                self.count('cache_hits')
+                return data
+
+        data = self.request(path, params)
+        if self.cache is not None and ttl != 0:
+            self.cache.set(path, params, data)
+        return data
+
+    def coin(self, coingecko_id):
+        return self.get(f'coins/{coingecko_id}')
+
+    def market_chart_range(self, token_id, from_timestamp, to_timestamp, interval='daily'):
+        # Without an interval CoinGecko picks the granularity from the length of the range
+        params = {
+            'vs_currency': 'usd',
+            'from': from_timestamp,
+            'to': to_timestamp,
+        }
+        if interval is not None:
+            params['interval'] = interval
+        return self.get(f'coins/{token_id}/market_chart/range', params)
+
+    def key_usage(self):
+        # Plan limits and monthly credits used so far, as reported by the API (never cached)
+        return self.request('key')
+
+    def summary(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        requests_made = sum(count for stat, count in stats.items() if stat.startswith('http_')) + stats.get('connection_errors', 0)
+        return (f"CoinGecko: {requests_made} requests, {stats.get('cache_hits', 0)} cache hits, "
+                f"{stats.get('retries', 0)} retries, {stats.get('http_429', 0)} rate limited, "
+                f"{stats.get('credits_used', 0)} credits used")
@@ -0,0 +1,91 @@
+"""Checks of the config.ini files of the index folders and of the family.
+
+Only the standard library is used, so a config can be checked before any script
+imports pandas or numpy. The weighting scheme names are checked when the index is
+calculated, the registry of eei.weighting imports numpy.
+"""
+import os
+import configparser
+
+from eei.resolution import RESOLUTIONS
+
+# The boilerplate values still to be replaced, e.g. "fill in the index folder name here"
+PLACEHOLDER = "fill in"
+
+
+def read_config(folder):
+    """The config.ini of `folder`, or of the config file `folder` itself."""
+    config_path = folder if folder.endswith('.ini') else os.path.join(folder, 'config.ini')
+    if not os.path.isfile(config_path):
+        raise ValueError(f"No config file at {config_path}")
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    return config
+
+
+def is_family(config):
+    return config.has_section('FAMILY')
+
+
+def check_value(config, section, option, problems, parse=str, condition=None, expected=None, required=True):
+    if not config.has_option(section, option):
+        if required:
+            problems.append(f"[{section}] {option} is missing")
+        return None
+    value = config.get(section, option)
+    if PLACEHOLDER in value:
+        problems.append(f"[{section}] {option} is not filled in")
+        return None
+    try:
+        parsed = parse(value)
+    except ValueError:
+        problems.append(f"[{section}] {option} = {value} is not {expected}")
+        return None
+    if condition is not None and not condition(parsed):
+        problems.append(f"[{section}] {option} = {value} is not {expected}")
+    return parsed
+
+
+def config_problems(config, api_key=True):
+    """Everything wrong with `config`, as a list of messages. The Coingecko API key is
+    only needed by the scripts that request data."""
+    problems = []
+    resolution = "one of " + ", ".join(RESOLUTIONS)
+    if is_family(config):
+        check_value(config, 'FAMILY', 'constituent_counts', problems,
+                    lambda value: [int(count) for count in value.split(',')],
+                    lambda counts: all(count > 0 for count in counts), "a list of positive numbers")
+        check_value(config, 'FAMILY', 'weighting_schemes', problems,
+                    lambda value: [scheme.strip() for scheme in value.split(',')], all, "a list of weighting schemes")
+        check_value(config, 'FAMILY', 'index_folder_pattern', problems,
+                    condition=lambda pattern: '{scheme}' in pattern and '{count}' in pattern,
+                    expected="a folder name with {scheme} and {count}")
+        check_value(config, 'FAMILY', 'resolution', problems, condition=RESOLUTIONS.__contains__, expected=resolution,
+                    required=False)
+    elif config.has_section('INDEX'):
+        check_value(config, 'INDEX', 'index_folder', problems, condition=bool, expected="a folder name")
+        check_value(config, 'INDEX', 'index_constituents_number', problems, int, lambda count: count > 0,
+                    "a positive number")
+        check_value(config, 'INDEX', 'weighting_scheme', problems, condition=bool, expected="a weighting scheme")
+        check_value(config, 'INDEX', 'weight_cap', problems, float, lambda cap: 0 < cap <= 1,
+                    "a number between 0 and 1", required=False)
+        check_value(config, 'INDEX', 'resolution', problems, condition=RESOLUTIONS.__contains__, expected=resolution,
+                    required=False)
+    else:
+        problems.append("there is neither an [INDEX] nor a [FAMILY] section")
+
+    if api_key:
+        check_value(config, 'COINGECKO', 'api_key', problems, condition=bool, expected="an API key")
+    for option in ['calls_per_minute', 'max_workers']:
+        check_value(config, 'COINGECKO', option, problems, int, lambda count: count > 0, "a positive number",
+                    required=False)
+    return problems
+
+
+def validate_config(folder, api_key=True):
+    """Read the config of `folder` and raise a ValueError listing its problems, if any."""
+    config = read_config(folder)
+    problems = config_problems(config, api_key)
+    if problems:
+        raise ValueError(f"Invalid config of {folder}:\n  " + "\n  ".join(problems))
+    return config
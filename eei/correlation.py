@@ -0,0 +1,93 @@
+"""Correlation matrices and their p-values in closed form.
+
+The correlations of all series come from one matrix product of their standardized
+values, and the p-values from the t-test of zero correlation that scipy.stats.pearsonr
+and spearmanr use, so hundreds of series take no more than a few array operations
+instead of a scipy call per pair.
+
+Correlations are of price levels or of returns, Pearson or Spearman (Pearson of the
+ranks). Missing values drop their rows from every series (listwise), or with
+`pairwise` only from the pairs they belong to, as pandas does. Returns are taken
+between the rows a pair has in common, so series with gaps, such as CRIX without
+weekends, are compared over the same periods.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+from scipy.stats import rankdata
+
+METHODS = ('pearson', 'spearman')
+
+
+def complete_correlations(values, method='pearson'):
+    """Correlation matrix of the columns of a (rows x series) array without missing values."""
+    if method == 'spearman':
+        values = rankdata(values, axis=0)
+    centered = values - values.mean(axis=0)
+    norms = np.sqrt((centered ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlations = centered.T @ centered / np.outer(norms, norms)
+    # Exactly one for every series that varies, rounding can leave it a few ulps off
+    np.fill_diagonal(correlations, np.where(norms > 0, 1.0, np.nan))
+    return np.clip(correlations, -1, 1)
+
+
+def correlation_p_values(correlations, observations):
+    """Two-sided p-values of the correlations of `observations` pairs of values."""
+    degrees_of_freedom = observations - 2
+    if degrees_of_freedom < 1:
+        return np.full(correlations.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = correlations * np.sqrt(degrees_of_freedom / ((1 - correlations) * (1 + correlations)))
+    return 2 * stdtr(degrees_of_freedom, -np.abs(t))
+
+
+def correlation_matrix(data, method='pearson', returns=False, pairwise=False):
+    """Return the correlation and p-value DataFrames of the columns of `data`.
+
+    With `returns` the correlations are of simple returns instead of the values.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method {method!r}, expected one of {', '.join(METHODS)}")
+
+    values = data.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    if pairwise:
+        # Series missing the same rows have their complete rows in common
+        masks, groups = np.unique(valid, axis=1, return_inverse=True)
+        groups = groups.ravel()
+    else:
+        masks, groups = valid.all(axis=1)[:, None], np.zeros(values.shape[1], dtype=int)
+
+    correlations = np.full((values.shape[1],) * 2, np.nan)
+    p_values = np.full((values.shape[1],) * 2, np.nan)
+    for first in range(masks.shape[1]):
+        for second in range(first, masks.shape[1]):
+            rows = masks[:, first] & masks[:, second]
+            first_columns = np.flatnonzero(groups == first)
+            second_columns = np.flatnonzero(groups == second) if second != first else np.array([], dtype=int)
+            columns = np.concatenate([first_columns, second_columns])
+
+            block = values[np.ix_(rows, columns)]
+            if returns:
+                block = block[1:] / block[:-1] - 1
+            block_correlations = complete_correlations(block, method)
+            block_p_values = correlation_p_values(block_correlations, len(block))
+
+            if second == first:
+                correlations[np.ix_(columns, columns)] = block_correlations
+                p_values[np.ix_(columns, columns)] = block_p_values
+            else:
+                # Only the pairs across both groups, those within a group have more rows in common
+                cross = np.ix_(first_columns, second_columns)
+                transposed = np.ix_(second_columns, first_columns)
+                across = (slice(None, len(first_columns)), slice(len(first_columns), None))
+                correlations[cross] = block_correlations[across]
+                p_values[cross] = block_p_values[across]
+                correlations[transposed] = block_correlations[across].T
+                p_values[transposed] = block_p_values[across].T
+
+    # A series is not tested against itself, pandas reports a p-value of one there
+    np.fill_diagonal(p_values, 1.0)
+    return (pd.DataFrame(correlations, index=data.columns, columns=data.columns),
+            pd.DataFrame(p_values, index=data.columns, columns=data.columns))
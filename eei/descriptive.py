@@ -0,0 +1,85 @@
+"""Descriptive statistics of an index history, as in statistics/descriptive_statistics.csv.
+
+The index history is a DataFrame with an index_value column on a DatetimeIndex,
+the risk-free rate one with the yield in decimal in a yield column.
+"""
+import numpy as np
+import pandas as pd
+
+from eei.assets import load_risk_free_rate
+
+
+def read_risk_free_rate_data(file_path=None):
+    risk_free_rate = load_risk_free_rate(file_path).to_frame()
+    risk_free_rate['yield'] = risk_free_rate['yield'] / 100  # Convert to decimal
+    return risk_free_rate
+
+def align_risk_free_rate(index_history, risk_free_rate):
+    aligned_risk_free_rate = risk_free_rate.reindex(index_history.index, method='ffill')
+    return aligned_risk_free_rate
+
+def calculate_total_return(index_history):
+    initial_value = index_history['index_value'].iloc[0]
+    final_value = index_history['index_value'].iloc[-1]
+    total_return = (final_value / initial_value) - 1
+    return total_return
+
+def calculate_summary_statistics(index_history):
+    daily_returns = index_history['index_value'].pct_change().dropna()
+    summary_statistics = {
+        'mean': daily_returns.mean(),
+        'median': daily_returns.median(),
+        'std': daily_returns.std(),
+    }
+    return summary_statistics
+
+def calculate_performance_measures(index_history, risk_free_rate):
+    daily_returns = index_history['index_value'].pct_change().dropna()
+    daily_risk_free_rate = risk_free_rate.loc[daily_returns.index, 'yield']
+    
+    # Adjust daily returns for the risk-free rate
+    adjusted_daily_returns = daily_returns - daily_risk_free_rate
+
+    sharpe_ratio = adjusted_daily_returns.mean() / adjusted_daily_returns.std()
+    sortino_ratio = adjusted_daily_returns.mean() / adjusted_daily_returns[adjusted_daily_returns < 0].std()
+
+    drawdowns = 1 - index_history['index_value'] / index_history['index_value'].cummax()
+    max_drawdown = drawdowns.max()
+
+    performance_measures = {
+        'sharpe_ratio': sharpe_ratio,
+        'sortino_ratio': sortino_ratio,
+        'max_drawdown': max_drawdown,
+    }
+    return performance_measures
+
+def calculate_annualized_measures(index_history, risk_free_rate, periods_per_year):
+    returns = index_history['index_value'].pct_change().dropna()
+    # The yields are annual rates, spread them over the periods of a year
+    adjusted_returns = returns - risk_free_rate.loc[returns.index, 'yield'] / periods_per_year
+    annualization_factor = np.sqrt(periods_per_year)
+
+    annualized_measures = {
+        'annualized_return': (1 + calculate_total_return(index_history)) ** (periods_per_year / len(returns)) - 1,
+        'annualized_volatility': returns.std() * annualization_factor,
+        'annualized_sharpe_ratio': adjusted_returns.mean() / adjusted_returns.std() * annualization_factor,
+    }
+    return annualized_measures
+
+
+def describe_index(index_history, risk_free_rate, periods_per_year=365):
+    """Every statistic of the index history, in the columns of descriptive_statistics.csv."""
+    aligned_risk_free_rate = align_risk_free_rate(index_history, risk_free_rate)
+    return {
+        'total_return': calculate_total_return(index_history),
+        **calculate_summary_statistics(index_history),
+        **calculate_performance_measures(index_history, aligned_risk_free_rate),
+        **calculate_annualized_measures(index_history, aligned_risk_free_rate, periods_per_year),
+    }
+
+
+def index_history_frame(index_history_df):
+    """The (timestamp, index_value) rows of an index history, on a DatetimeIndex."""
+    index_history = pd.Series(index_history_df['index_value'].to_numpy(dtype=np.float64),
+                              index=pd.to_datetime(index_history_df['timestamp'].to_numpy(), unit='s'))
+    return index_history.dropna().sort_index().to_frame('index_value')
@@ -0,0 +1,245 @@
+import os
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+from eei.panel import load_period_panel
+from eei.store import load_period
+
+DAY = 86400
+
+# A chain-linked rebalancing period: its position in the list of periods, its divisor
+# and the index values it contributes to the history
+LinkedPeriod = namedtuple("LinkedPeriod", ["period_index", "divisor", "timestamps", "index_values"])
+
+
+def get_rebalancing_period_folders(prices_dir):
+    folders = sorted([folder for folder in os.listdir(prices_dir) if os.path.isdir(os.path.join(prices_dir, folder))])
+    return folders
+
+
+def get_period_timestamps(panel, period_folder):
+    if not panel.tokens:
+        print(f"Warning: No price files found in {period_folder}")
+        return None
+
+    if panel.first_ts[0] is None:
+        print(f"Warning: Price data is empty for {panel.tokens[0]}.csv")
+        return None
+
+    start_ts = panel.first_ts[0] // 1000  # Convert to seconds
+    end_ts = panel.last_ts[0] // 1000  # Convert to seconds
+
+    return start_ts, end_ts
+
+
+def validate_period_timestamps(panel, period_folder, start_ts, end_ts):
+    for token_id, first_ts, last_ts in zip(panel.tokens, panel.first_ts, panel.last_ts):
+        if first_ts is None:
+            print(f"Warning: Price data is empty for {token_id}.csv")
+            continue
+
+        if first_ts // 1000 != start_ts or last_ts // 1000 != end_ts:
+            print(f"Error: Timestamps in {token_id}.csv do not match the period timestamps")
+            return False
+
+    return True
+
+
+def load_period_panels(prices_dir, store_dir=None):
+    """Load every rebalancing period as {period_folder: panel}, parsing each price file once.
+
+    With a `store_dir`, periods whose CSVs are unchanged are memory-mapped from the
+    columnar store instead, and changed ones are converted into it.
+    """
+    panels = {}
+    for period_folder in get_rebalancing_period_folders(prices_dir):
+        period_path = os.path.join(prices_dir, period_folder)
+        if store_dir is None:
+            panels[period_folder] = load_period_panel(period_path)
+        else:
+            panels[period_folder] = load_period(period_path, os.path.join(store_dir, period_folder))
+    return panels
+
+
+def get_rebalancing_periods(prices_dir, store_dir=None):
+    """Load and validate every rebalancing period, see load_period_panels.
+    Returns a list of (period_folder, start_ts, end_ts, panel) tuples.
+    """
+    return validate_rebalancing_periods(load_period_panels(prices_dir, store_dir))
+
+
+def validate_rebalancing_periods(panels):
+    """The (period_folder, start_ts, end_ts, panel) tuples of the valid panels of
+    {period_folder: panel}, in the order of the period folders."""
+    rebalancing_periods = []
+
+    for period_folder in sorted(panels):
+        panel = panels[period_folder]
+        timestamps = get_period_timestamps(panel, period_folder)
+        if timestamps is None:
+            continue
+
+        start_ts, end_ts = timestamps
+        if not validate_period_timestamps(panel, period_folder, start_ts, end_ts):
+            continue
+
+        rebalancing_periods.append((period_folder, start_ts, end_ts, panel))
+
+    return rebalancing_periods
+
+
+def get_snapshot_data(snapshots_dir, start_date, snapshots=None):
+    # Snapshots already in memory come as {start_date: snapshot DataFrame}, instead of a folder
+    if snapshots is not None:
+        snapshot = snapshots.get(start_date)
+        if snapshot is None:
+            print(f"Error: No snapshot for {start_date}")
+        return snapshot
+
+    snapshot_file = os.path.join(snapshots_dir, f"{start_date}.csv")
+    if not os.path.exists(snapshot_file):
+        print(f"Error: {snapshot_file} not found")
+        return None
+
+    snapshot = pd.read_csv(snapshot_file)
+    return snapshot
+
+
+def period_grid(start_ts, end_ts, step=DAY):
+    # Every step from the period start, plus the period end used for chain-linking
+    return list(range(start_ts, end_ts, step)) + [end_ts]
+
+
+def cumulative_weighted_sums(panel, field, weights):
+    """Running sums of field * weights over the tokens of every row, skipping absent cells.
+
+    Column k holds the total of the first k + 1 constituents. The cumulative sum adds
+    tokens left to right in snapshot order, so results are bit-for-bit identical to
+    accumulating them one by one.
+    """
+    terms = np.where(panel.present, panel.field(field) * weights, 0.0)
+    return np.cumsum(terms, axis=1)
+
+
+def weighted_sum(panel, field, weights):
+    if len(panel) == 0:
+        return np.zeros(len(panel.timestamps))
+    return cumulative_weighted_sums(panel, field, weights)[:, -1]
+
+
+def report_missing_prices(panel, start_date):
+    missing_days = (~panel.present).sum(axis=0)
+    for token_id, first_ts, missing in zip(panel.tokens, panel.first_ts, missing_days):
+        if first_ts is None:
+            print(f"Warning: No price data for {token_id} in {start_date}")
+        elif missing:
+            print(f"Warning: No price data for {token_id} at {missing} timestamps in {start_date}")
+
+
+def compute_divisor(total_0, target_price=None):
+    if target_price is None:
+        divisor = total_0 / 100
+    else:
+        divisor = total_0 / target_price
+
+    return divisor
+
+
+def link_periods(period_totals, initial_index_value=100):
+    """Scale each period's unnormalized totals so that it starts where the previous one ended.
+
+    `period_totals` holds one (grid, totals) pair per rebalancing period, or None for
+    periods without a snapshot. Yields a LinkedPeriod for every period with a usable
+    divisor; only the last period keeps its end, which is the next period's start.
+    """
+    target_price = initial_index_value
+    total_periods = len(period_totals)
+
+    for period_index, period in enumerate(period_totals):
+        if period is None:
+            continue
+
+        grid, totals = period
+        divisor = compute_divisor(float(totals[0]), target_price)
+        if divisor == 0:
+            target_price = None
+            continue
+
+        values = totals / divisor
+        is_last_period = (period_index == total_periods - 1)
+        if is_last_period:
+            yield LinkedPeriod(period_index, divisor, grid, values)
+        else:
+            target_price = float(values[-1])
+            yield LinkedPeriod(period_index, divisor, grid[:-1], values[:-1])
+
+
+def chain_link(period_totals, initial_index_value=100):
+    """Chain-link the (grid, totals) pairs of the rebalancing periods into an index history."""
+    timestamps = []
+    index_values = []
+
+    for linked_period in link_periods(period_totals, initial_index_value):
+        timestamps.extend(linked_period.timestamps)
+        index_values.extend(linked_period.index_values)
+
+    index_history_df = pd.DataFrame({"timestamp": timestamps, "index_value": index_values})
+    return index_history_df
+
+
+def compute_period(panel, previous_panel, snapshot, start_date, start_ts, end_ts, scheme, step=DAY):
+    """Unnormalized totals of one rebalancing period, independent of every other period
+    except for the price history some weighting schemes use.
+
+    Returns the (grid, totals) pair and the (constituents, weights) of the rebalance.
+    """
+    grid = period_grid(start_ts, end_ts, step)
+    constituents = panel.select(snapshot["Coingecko ID"].tolist()).on_grid(grid)
+    report_missing_prices(constituents, start_date)
+
+    weights = scheme.get_weights(constituents, previous_panel)
+    return (grid, weighted_sum(constituents, scheme.field, weights)), (constituents.tokens, weights)
+
+
+def compute_period_totals(rebalancing_periods, snapshots_dir, scheme, step=DAY, snapshots=None):
+    """Unnormalized totals of every rebalancing period, ready for chain_link.
+
+    `scheme` is a WeightingScheme from eei.weighting. Its weights are computed once
+    per rebalance and applied to the scheme's field of every constituent. The
+    snapshots are read from `snapshots_dir`, or taken from `snapshots` (see
+    get_snapshot_data). Returns the (grid, totals) pairs and the (constituents,
+    weights) of every rebalance, both None for periods without a snapshot.
+    """
+    period_totals = []
+    rebalances = []
+    previous_panel = None
+
+    for start_date, start_ts, end_ts, panel in rebalancing_periods:
+        snapshot = get_snapshot_data(snapshots_dir, start_date, snapshots)
+        period_history, previous_panel = previous_panel, panel
+        if snapshot is None:
+            period_totals.append(None)
+            rebalances.append(None)
+            continue
+
+        totals, rebalance = compute_period(panel, period_history, snapshot, start_date, start_ts, end_ts, scheme, step)
+        period_totals.append(totals)
+        rebalances.append(rebalance)
+
+    return period_totals, rebalances
+
+
+def compute_index_history(rebalancing_periods, snapshots_dir, scheme, initial_index_value=100, step=DAY,
+                          snapshots=None):
+    """Chain-link the index over the rebalancing periods.
+
+    The index has a value every `step` seconds, e.g. eei.resolution.HOUR for an
+    hourly index.
+    """
+    period_totals, _ = compute_period_totals(rebalancing_periods, snapshots_dir, scheme, step, snapshots)
+    return chain_link(period_totals, initial_index_value)
+
+
+def save_index_history(index_history_df, filename):
+    index_history_df.to_csv(filename, index=False)
@@ -0,0 +1,70 @@
+import numpy as np
+
+from eei.engine import (DAY, chain_link, cumulative_weighted_sums, get_snapshot_data, period_grid,
+                        report_missing_prices, validate_rebalancing_periods, weighted_sum)
+
+
+def compute_index_family(period_panels, snapshots_dir, constituent_counts, schemes, initial_index_value=100,
+                         step=DAY):
+    """Compute every (scheme, N) index of a family in one pass over the price data.
+
+    `period_panels` are the unvalidated (period_folder, panel) pairs of the largest
+    index, see load_period_panels. The snapshots in `snapshots_dir` must rank at
+    least max(constituent_counts) tokens; the top-N index uses the first N of them.
+    Each count validates a period against the price files of its own top N tokens,
+    as calculate_index.py does in the top-N index folder, so a bad price file only
+    drops the period from the indices it is a constituent of.
+
+    Each period is aligned once per group of counts sharing its timestamps. Whenever
+    a scheme's top-N weights are a prefix of its weights for the group's largest N
+    (as with cw), the top-N totals are read off the shared running sums instead of
+    being summed again. Index values are `step` seconds apart.
+
+    Returns {(scheme name, N): index history DataFrame}.
+    """
+    largest_count = max(constituent_counts)
+    period_totals = {(scheme.name, count): [] for scheme in schemes for count in constituent_counts}
+    previous_panels = dict.fromkeys(constituent_counts)
+
+    for start_date, panel in period_panels:
+        snapshot = get_snapshot_data(snapshots_dir, start_date)
+        if snapshot is None:
+            # Without a snapshot the top N are unknown, so all counts go by every file
+            if validate_rebalancing_periods({start_date: panel}):
+                for totals in period_totals.values():
+                    totals.append(None)
+                previous_panels = dict.fromkeys(constituent_counts, panel)
+            continue
+
+        ranked = snapshot["Coingecko ID"].tolist()[:largest_count]
+        period_counts = {}
+        for count in constituent_counts:
+            top_tokens = set(ranked[:count])
+            own_files = [token_id for token_id in panel.tokens if token_id in top_tokens]
+            validated = validate_rebalancing_periods({start_date: panel.select(own_files)})
+            if validated:
+                _, start_ts, end_ts, _ = validated[0]
+                period_counts.setdefault((start_ts, end_ts), []).append(count)
+
+        for (start_ts, end_ts), counts in period_counts.items():
+            grid = period_grid(start_ts, end_ts, step)
+            union = panel.select(ranked[:max(counts)]).on_grid(grid)
+            report_missing_prices(union, start_date)
+
+            for scheme in schemes:
+                shared_weights = scheme.get_weights(union, previous_panels[max(counts)])
+                shared_sums = cumulative_weighted_sums(union, scheme.field, shared_weights)
+
+                for count in counts:
+                    constituents = union.head(count)
+                    weights = scheme.get_weights(constituents, previous_panels[count])
+                    if len(constituents) and np.array_equal(weights, shared_weights[:len(constituents)]):
+                        totals = shared_sums[:, len(constituents) - 1]
+                    else:
+                        totals = weighted_sum(constituents, scheme.field, weights)
+                    period_totals[(scheme.name, count)].append((grid, totals))
+
+            for count in counts:
+                previous_panels[count] = panel
+
+    return {key: chain_link(totals, initial_index_value) for key, totals in period_totals.items()}
@@ -0,0 +1,262 @@
+import os
+import csv
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+from eei.coingecko import CoinGeckoError
+from eei.ingest import (RESPONSE_FIELDS, append_price_file, clip_columns, format_dropped, ingest_market_chart,
+                        write_price_file)
+from eei.manifest import PriceManifest
+from eei.resolution import get_resolution
+
+DAY = 86400
+
+# Hardcoded timestamps for the rebalancing periods
+REBALANCING_PERIODS = [
+    ('2021-01-03', 1609632000, 1617494400),
+    ('2021-04-04', 1617494400, 1625356800),
+    ('2021-07-04', 1625356800, 1633219200),
+    ('2021-10-03', 1633219200, 1641081600),
+    ('2022-01-02', 1641081600, 1648944000),
+    ('2022-04-03', 1648944000, 1656806400),
+    ('2022-07-03', 1656806400, 1664668800),
+    ('2022-10-02', 1664668800, 1672531200),
+    ('2023-01-01', 1672531200, 1680393600)
+]
+
+# A price file to fetch: the whole period from period_from, or only the days after
+# from_timestamp appended to the existing file when `extend` is set
+FetchJob = namedtuple('FetchJob', ['period_start', 'token_id', 'period_from', 'from_timestamp', 'to_timestamp',
+                                   'token_file', 'extend'])
+# One market chart request of a token over [from_timestamp, to_timestamp], sliced into its jobs
+FetchRequest = namedtuple('FetchRequest', ['token_id', 'from_timestamp', 'to_timestamp', 'jobs'])
+
+
+# Function to print text in red
+def print_error(text):
+    print(f"\033[1;31m{text}\033[0m\n")
+
+
+def read_snapshot_token_ids(snapshot_file):
+    with open(snapshot_file, 'r') as csvfile:
+        reader = csv.DictReader(csvfile)
+        return [row['Coingecko ID'] for row in reader]
+
+
+def last_complete_timestamp(now=None, step=DAY):
+    # Start of the current UTC day (or hour at hourly resolution): later points of an open period are not final yet
+    now = time.time() if now is None else now
+    return int(now) // step * step
+
+
+def plan_fetches(snapshots_dir, prices_dir, rebalancing_periods, manifest, now=None, step=DAY):
+    """List the price files that are missing, changed or incomplete.
+
+    Files recorded in the manifest with an unchanged checksum are skipped when they
+    cover the requested range, and only extended with the missing days otherwise.
+    """
+    latest = last_complete_timestamp(now, step)
+    jobs = []
+    for period_start, from_timestamp, to_timestamp in rebalancing_periods:
+        if from_timestamp > latest:
+            continue
+        to_timestamp = min(to_timestamp, latest)
+
+        snapshot_folder = os.path.join(prices_dir, period_start)
+        os.makedirs(snapshot_folder, exist_ok=True)
+
+        for token_id in read_snapshot_token_ids(os.path.join(snapshots_dir, f'{period_start}.csv')):
+            token_file = os.path.join(snapshot_folder, f"{token_id}.csv")
+            entry = manifest.verify(period_start, token_id, token_file)
+            if entry is None and os.path.exists(token_file) and manifest.get(period_start, token_id) is None:
+                entry = manifest.adopt(period_start, token_id, token_file, from_timestamp)
+
+            if entry is not None and entry['from'] == from_timestamp:
+                if entry['to'] >= to_timestamp:
+                    continue
+                if entry['last_timestamp'] is not None:
+                    jobs.append(FetchJob(period_start, token_id, from_timestamp, entry['last_timestamp'] // 1000 + 1,
+                                         to_timestamp, token_file, True))
+                    continue
+
+            jobs.append(FetchJob(period_start, token_id, from_timestamp, from_timestamp, to_timestamp, token_file, False))
+    return jobs
+
+
+def group_fetches(jobs):
+    """Merge the jobs of each token over adjacent or overlapping ranges into one request.
+
+    A token that leaves the index and returns later gets a request per run of
+    periods, so the days in between are never downloaded. Returns a list of
+    FetchRequest; each job later takes its own slice of the response.
+    """
+    requests = []
+    # Position in `requests` of the latest request of every token
+    latest = {}
+    for job in sorted(jobs, key=lambda job: job.from_timestamp):
+        position = latest.get(job.token_id)
+        if position is not None and job.from_timestamp <= requests[position].to_timestamp + 1:
+            request = requests[position]
+            request.jobs.append(job)
+            requests[position] = request._replace(to_timestamp=max(request.to_timestamp, job.to_timestamp))
+        else:
+            latest[job.token_id] = len(requests)
+            requests.append(FetchRequest(job.token_id, job.from_timestamp, job.to_timestamp, [job]))
+    return requests
+
+
+def span_chunks(from_timestamp, to_timestamp, max_span=None):
+    # Consecutive ranges covering [from, to], each spanning at most max_span seconds
+    if max_span is None:
+        return [(from_timestamp, to_timestamp)]
+    chunks = []
+    while from_timestamp <= to_timestamp:
+        chunk_end = min(from_timestamp + max_span - 1, to_timestamp)
+        chunks.append((from_timestamp, chunk_end))
+        from_timestamp = chunk_end + 1
+    return chunks
+
+
+def fetch_market_chart(client, token_id, from_timestamp, to_timestamp, resolution):
+    """Request a token's market chart over [from, to] at the given resolution.
+
+    Sub-daily data is only served for short ranges, so longer spans are requested in
+    pieces and merged into a single response. Sub-daily points are stamped around
+    the full hour, so the range is widened by half a step on both ends; the points
+    are clipped again once they are snapped onto the grid.
+    """
+    if resolution.step < DAY:
+        from_timestamp -= resolution.step // 2
+        to_timestamp += resolution.step // 2
+    token_data = {key: [] for key, _ in RESPONSE_FIELDS}
+    for chunk_from, chunk_to in span_chunks(from_timestamp, to_timestamp, resolution.max_span):
+        chunk = client.market_chart_range(token_id, chunk_from, chunk_to, resolution.interval) or {}
+        for key in token_data:
+            token_data[key].extend(chunk.get(key) or [])
+    return token_data
+
+
+def store_job(manifest, job, columns):
+    # Write or extend one period's price file from a token's full response, return a failure reason or None
+    columns = clip_columns(columns, job.from_timestamp, job.to_timestamp)
+    if len(columns['timestamp']):
+        if job.extend:
+            append_price_file(job.token_file, columns)
+        else:
+            write_price_file(job.token_file, columns)
+    elif not job.extend:
+        return "no price data"
+    # An extension without new points (e.g. a delisted token) still covers the range, so it is not planned again
+    manifest.record(job.period_start, job.token_id, job.token_file, job.period_from, job.to_timestamp)
+    return None
+
+
+def run_fetches(requests, client, resolution, max_workers, store):
+    """Send the FetchRequests of group_fetches concurrently and hand each of their
+    jobs with the token's ingested columns to `store(job, columns)`, which
+    returns a failure reason or None. Returns the (period, token, reason) failures.
+    """
+    failures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_market_chart, client, request.token_id, request.from_timestamp, request.to_timestamp,
+                            resolution): (request.token_id, request.jobs)
+            for request in requests
+        }
+        progress_bar = tqdm(as_completed(futures), total=len(futures), desc="Fetching prices", bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}")
+
+        try:
+            for future in progress_bar:
+                token_id, token_jobs = futures[future]
+                try:
+                    token_data = future.result()
+                except CoinGeckoError as error:
+                    print_error(f"\nError fetching data for {token_id}: {error}")
+                    failures.extend((job.period_start, token_id, str(error)) for job in token_jobs)
+                    continue
+
+                ingested = ingest_market_chart(token_data, resolution.step)
+                if ingested.dropped:
+                    print_error(f"\nWarning: Dropped points for {token_id}: {format_dropped(ingested.dropped)}")
+
+                for job in token_jobs:
+                    reason = store(job, ingested.columns)
+                    if reason is not None:
+                        print_error(f"\nWarning: No price data for {token_id} in {job.period_start}")
+                        failures.append((job.period_start, token_id, reason))
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print_error("\nInterrupted, rerun to resume from the files fetched so far")
+            raise
+
+    return failures
+
+
+def fetch_prices(client, snapshots_dir, prices_dir, rebalancing_periods=REBALANCING_PERIODS, max_workers=8, now=None,
+                 resolution=None):
+    """Fetch the missing price files of every snapshot constituent concurrently.
+
+    Each distinct token is requested once per run of consecutive missing periods,
+    and the response is sliced into the per-period files. Requests share the
+    client's rate limit and connection pool. Every finished file is recorded in the
+    prices folder's manifest, which is saved once the run ends, failed or
+    interrupted too, so a rerun resumes where it stopped. `resolution` (eei.resolution, daily by default) sets the spacing of the
+    points; keep each resolution in its own prices folder. Returns the (period,
+    token, reason) of every constituent that could not be fetched.
+    """
+    resolution = resolution or get_resolution()
+    manifest = PriceManifest(prices_dir)
+    try:
+        jobs = plan_fetches(snapshots_dir, prices_dir, rebalancing_periods, manifest, now, resolution.step)
+        return run_fetches(group_fetches(jobs), client, resolution, max_workers,
+                           lambda job, columns: store_job(manifest, job, columns))
+    finally:
+        manifest.save()
+
+
+def fetch_price_columns(client, snapshots, rebalancing_periods=REBALANCING_PERIODS, max_workers=8, now=None,
+                        resolution=None, prices_dir=None):
+    """Fetch the prices of every constituent of the snapshots in memory.
+
+    `snapshots` maps each period start to its snapshot DataFrame. Every constituent
+    is requested over its whole period, the client's response cache makes repeated
+    requests cheap. With a `prices_dir` the price files are written and recorded in
+    its manifest as well, like fetch_prices does. Returns {period start: {token id:
+    price file columns}} and the (period, token, reason) failures.
+    """
+    resolution = resolution or get_resolution()
+    manifest = PriceManifest(prices_dir) if prices_dir is not None else None
+    latest = last_complete_timestamp(now, resolution.step)
+    jobs = []
+    for period_start, from_timestamp, to_timestamp in rebalancing_periods:
+        if from_timestamp > latest or period_start not in snapshots:
+            continue
+        if prices_dir is not None:
+            os.makedirs(os.path.join(prices_dir, period_start), exist_ok=True)
+        for token_id in snapshots[period_start]['Coingecko ID']:
+            token_file = os.path.join(prices_dir, period_start, f"{token_id}.csv") if prices_dir is not None else None
+            jobs.append(FetchJob(period_start, token_id, from_timestamp, from_timestamp, min(to_timestamp, latest),
+                                 token_file, False))
+
+    prices = {period_start: {} for period_start in dict.fromkeys(job.period_start for job in jobs)}
+
+    def store(job, columns):
+        if manifest is not None:
+            reason = store_job(manifest, job, columns)
+            if reason is not None:
+                return reason
+        columns = clip_columns(columns, job.from_timestamp, job.to_timestamp)
+        if not len(columns['timestamp']):
+            return "no price data"
+        prices[job.period_start][job.token_id] = columns
+        return None
+
+    try:
+        failures = run_fetches(group_fetches(jobs), client, resolution, max_workers, store)
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return prices, failures
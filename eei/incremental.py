@@ -0,0 +1,264 @@
+"""Incremental updates of index_history.csv.
+
+After a full calculation the state file (data/index_state.json) records what is needed
+to continue the current rebalancing period without recomputing the others: its
+constituents, weights and divisor, the last timestamp written and a fingerprint of
+every earlier period's price files and snapshot. The price files of the current
+period grow as new days are fetched, so only their rows up to the last timestamp
+are fingerprinted. An append run computes only the timestamps after the last one,
+and starts new periods from the last index value. Whenever an input already used,
+the settings or the history file itself changed, the whole history is recomputed
+instead.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from eei.engine import (DAY, chain_link, compute_divisor, compute_period_totals, get_snapshot_data, link_periods,
+                        period_grid, report_missing_prices, save_index_history, weighted_sum)
+from eei.manifest import write_atomic
+from eei.panel import PRICE_FIELDS
+from eei.parallel import compute_period_totals_parallel
+from eei.store import source_fingerprint
+
+STATE_VERSION = 2
+
+
+def file_fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def period_fingerprint(prices_dir, snapshots_dir, period_folder):
+    return {
+        'prices': source_fingerprint(os.path.join(prices_dir, period_folder)),
+        'snapshot': file_fingerprint(os.path.join(snapshots_dir, f"{period_folder}.csv")),
+    }
+
+
+def rows_fingerprint(panel, last_timestamp):
+    """Checksum of the tokens of `panel` and of their rows up to `last_timestamp` (in seconds)."""
+    panel = panel.select(sorted(panel.tokens))
+    rows = panel.timestamps <= last_timestamp * 1000
+    present = panel.present[rows]
+    digest = hashlib.sha256(json.dumps(panel.tokens).encode())
+    digest.update(np.ascontiguousarray(panel.timestamps[rows]).tobytes())
+    digest.update(np.ascontiguousarray(present).tobytes())
+    for name in PRICE_FIELDS:
+        # Absent cells hold NaN, which is left out of the checksum
+        digest.update(np.where(present, panel.field(name)[rows], 0.0).tobytes())
+    return digest.hexdigest()
+
+
+def index_settings(scheme, initial_index_value, step):
+    # Scheme options such as the weight cap are the keywords of the partial built by get_weighting_scheme
+    options = getattr(scheme.get_weights, 'keywords', {})
+    return {'scheme': scheme.name, 'field': scheme.field, 'options': options,
+            'initial_index_value': initial_index_value, 'step': step}
+
+
+def read_state(state_file):
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def format_rows(timestamps, index_values):
+    # Same formatting as save_index_history, so appended and recomputed files are identical
+    rows = pd.DataFrame({"timestamp": timestamps, "index_value": index_values}).to_csv(header=False, index=False)
+    return rows.encode()
+
+
+def write_state(state_file, settings, prices_dir, snapshots_dir, closed_folders, period, history_file, last_row_size):
+    history_size = os.path.getsize(history_file)
+    state = {
+        'version': STATE_VERSION,
+        'settings': settings,
+        'inputs': {folder: period_fingerprint(prices_dir, snapshots_dir, folder) for folder in closed_folders},
+        'period': period,
+        'history_size': history_size,
+        'last_row_offset': history_size - last_row_size,
+    }
+    write_atomic(state_file, lambda f: json.dump(state, f))
+
+
+def period_state(period_folder, start_ts, tokens, weights, total_0, divisor, last_timestamp, snapshots_dir, panel):
+    return {
+        'folder': period_folder,
+        'start_ts': start_ts,
+        'constituents': list(tokens),
+        'weights': [float(weight) for weight in weights],
+        'total_0': total_0,
+        'divisor': divisor,
+        'last_timestamp': last_timestamp,
+        'snapshot': file_fingerprint(os.path.join(snapshots_dir, f"{period_folder}.csv")),
+        'prices': rows_fingerprint(panel, last_timestamp),
+    }
+
+
+def recompute_index_history(rebalancing_periods, prices_dir, snapshots_dir, scheme, history_file, state_file,
+                            initial_index_value=100, step=DAY, max_workers=1):
+    """Calculate the whole history, save it and record the state of the last period.
+
+    With `max_workers` above one the periods are computed in a process pool (see
+    eei.parallel); `rebalancing_periods` must then be loaded through the price store.
+    """
+    if max_workers > 1:
+        period_totals, rebalances = compute_period_totals_parallel(rebalancing_periods, prices_dir, snapshots_dir, scheme,
+                                                                   step, max_workers)
+    else:
+        progress_bar = tqdm(rebalancing_periods, desc="Calculating index", bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}")
+        period_totals, rebalances = compute_period_totals(progress_bar, snapshots_dir, scheme, step)
+    index_history_df = chain_link(period_totals, initial_index_value)
+    save_index_history(index_history_df, history_file)
+
+    linked_periods = list(link_periods(period_totals, initial_index_value))
+    if not linked_periods or linked_periods[-1].period_index != len(rebalancing_periods) - 1:
+        # Without a usable last period there is nothing to continue from
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        return len(index_history_df)
+
+    last = linked_periods[-1]
+    period_folder, start_ts, _, panel = rebalancing_periods[last.period_index]
+    tokens, weights = rebalances[last.period_index]
+    total_0 = float(period_totals[last.period_index][1][0])
+    period = period_state(period_folder, start_ts, tokens, weights, total_0, last.divisor,
+                          int(last.timestamps[-1]), snapshots_dir, panel)
+    closed_folders = [folder for folder, *_ in rebalancing_periods[:last.period_index]]
+    last_row = format_rows(last.timestamps[-1:], last.index_values[-1:])
+    write_state(state_file, index_settings(scheme, initial_index_value, step), prices_dir, snapshots_dir,
+                closed_folders, period, history_file, len(last_row))
+    return len(index_history_df)
+
+
+def check_state(state, rebalancing_periods, prices_dir, snapshots_dir, settings, history_file):
+    """Return why the state cannot be continued, or None."""
+    if state is None:
+        return "no index state"
+    if state['settings'] != settings:
+        return "the index settings changed"
+    if file_fingerprint(history_file) is None or os.path.getsize(history_file) != state['history_size']:
+        return "the index history file changed"
+
+    folders = [folder for folder, *_ in rebalancing_periods]
+    period = state['period']
+    if period['folder'] not in folders:
+        return f"period {period['folder']} is gone"
+    closed_folders = folders[:folders.index(period['folder'])]
+    if list(state['inputs']) != closed_folders:
+        return "the rebalancing periods changed"
+    for folder in closed_folders:
+        if period_fingerprint(prices_dir, snapshots_dir, folder) != state['inputs'][folder]:
+            return f"the inputs of period {folder} changed"
+    if file_fingerprint(os.path.join(snapshots_dir, f"{period['folder']}.csv")) != period['snapshot']:
+        return f"the snapshot of period {period['folder']} changed"
+    return None
+
+
+def append_index_history(rebalancing_periods, prices_dir, snapshots_dir, scheme, history_file, state_file,
+                         initial_index_value=100, step=DAY, max_workers=1):
+    """Append the timestamps after the last one recorded in the state file.
+
+    The current period keeps its recorded weights and divisor; periods that started
+    since are linked to it as in a full calculation, so the file ends up identical
+    to one written by compute_index_history. Falls back to a full recalculation when
+    the state does not match the inputs, with `max_workers` processes. Returns
+    (rows written, reason for a full recalculation or None).
+    """
+    settings = index_settings(scheme, initial_index_value, step)
+    state = read_state(state_file)
+    reason = check_state(state, rebalancing_periods, prices_dir, snapshots_dir, settings, history_file)
+
+    if reason is None:
+        period = state['period']
+        folders = [folder for folder, *_ in rebalancing_periods]
+        current = folders.index(period['folder'])
+        _, start_ts, end_ts, panel = rebalancing_periods[current]
+        last_timestamp = period['last_timestamp']
+        constituents = panel.select(period['constituents'])
+        weights = np.array(period['weights'])
+
+        if start_ts != period['start_ts'] or rows_fingerprint(panel, last_timestamp) != period['prices']:
+            reason = f"the prices of period {period['folder']} changed"
+        elif end_ts < last_timestamp:
+            reason = f"the prices of period {period['folder']} end before the last index value"
+
+    if reason is not None:
+        rows = recompute_index_history(rebalancing_periods, prices_dir, snapshots_dir, scheme, history_file, state_file,
+                                       initial_index_value, step, max_workers)
+        return rows, reason
+
+    # The current period from its last written timestamp on; that row is only recomputed, not written
+    grid = [timestamp for timestamp in period_grid(start_ts, end_ts, step) if timestamp >= last_timestamp]
+    values = weighted_sum(constituents.on_grid(grid), scheme.field, weights) / period['divisor']
+    is_last_period = current == len(rebalancing_periods) - 1
+    new_timestamps = grid[1:] if is_last_period else grid[1:-1]
+    new_values = list(values[1:] if is_last_period else values[1:-1])
+    # A period that ended on the last written timestamp hands that row over to the next period
+    truncate = not is_last_period and end_ts == last_timestamp
+
+    target_price = float(values[-1])
+    period_folder, tokens, divisor, total_0 = period['folder'], period['constituents'], period['divisor'], period['total_0']
+    period_weights, period_start = weights, start_ts
+    previous_panel = panel
+    closed_folders = folders[:current]
+
+    for period_index in range(current + 1, len(rebalancing_periods)):
+        start_date, next_start_ts, next_end_ts, next_panel = rebalancing_periods[period_index]
+        snapshot = get_snapshot_data(snapshots_dir, start_date)
+        if snapshot is None:
+            rows = recompute_index_history(rebalancing_periods, prices_dir, snapshots_dir, scheme, history_file,
+                                           state_file, initial_index_value, step, max_workers)
+            return rows, f"period {start_date} has no snapshot"
+
+        next_grid = period_grid(next_start_ts, next_end_ts, step)
+        next_constituents = next_panel.select(snapshot["Coingecko ID"].tolist()).on_grid(next_grid)
+        report_missing_prices(next_constituents, start_date)
+        next_weights = scheme.get_weights(next_constituents, previous_panel)
+        totals = weighted_sum(next_constituents, scheme.field, next_weights)
+        next_divisor = compute_divisor(float(totals[0]), target_price)
+        if next_divisor == 0:
+            rows = recompute_index_history(rebalancing_periods, prices_dir, snapshots_dir, scheme, history_file,
+                                           state_file, initial_index_value, step, max_workers)
+            return rows, f"the divisor of period {start_date} is zero"
+
+        next_values = totals / next_divisor
+        if period_index == len(rebalancing_periods) - 1:
+            new_timestamps.extend(next_grid)
+            new_values.extend(next_values)
+        else:
+            new_timestamps.extend(next_grid[:-1])
+            new_values.extend(next_values[:-1])
+            target_price = float(next_values[-1])
+
+        closed_folders.append(period_folder)
+        period_folder, tokens, divisor, total_0 = start_date, next_constituents.tokens, next_divisor, float(totals[0])
+        period_weights, period_start = next_weights, next_start_ts
+        previous_panel = next_panel
+
+    if not new_timestamps and not truncate:
+        return 0, None
+
+    with open(history_file, 'r+b') as f:
+        if truncate:
+            f.truncate(state['last_row_offset'])
+        f.seek(0, os.SEEK_END)
+        rows = format_rows(new_timestamps, new_values)
+        f.write(rows)
+
+    last_row = format_rows(new_timestamps[-1:], new_values[-1:]) if new_timestamps else b''
+    period = period_state(period_folder, period_start, tokens, period_weights, total_0, divisor,
+                          int(new_timestamps[-1]) if new_timestamps else last_timestamp, snapshots_dir,
+                          previous_panel)
+    write_state(state_file, settings, prices_dir, snapshots_dir, closed_folders, period, history_file, len(last_row))
+    return len(new_timestamps), None
@@ -0,0 +1,108 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+from eei.manifest import write_atomic
+
+DAY = 86400
+
+# market_chart/range response arrays and the price file columns they become
+RESPONSE_FIELDS = (("prices", "price"), ("market_caps", "market_cap"), ("total_volumes", "total_volume"))
+PRICE_FILE_COLUMNS = ["timestamp"] + [column for _, column in RESPONSE_FIELDS]
+
+# `columns` maps every price file column to an aligned NumPy array, `dropped` maps a
+# reason to the number of points left out
+IngestResult = namedtuple("IngestResult", ["columns", "dropped"])
+
+
+def response_array(token_data, key):
+    # Millisecond timestamps are exact in float64, nulls become NaN
+    points = np.array(token_data.get(key) or [], dtype=np.float64).reshape(-1, 2)
+    return points[:, 0].astype(np.int64), points[:, 1]
+
+
+def unique_points(timestamps, values):
+    # Keep the first point of duplicated timestamps, sorted by timestamp
+    unique_timestamps, first_rows = np.unique(timestamps, return_index=True)
+    return unique_timestamps, values[first_rows], len(timestamps) - len(unique_timestamps)
+
+
+def snap_to_grid(timestamps, values, step):
+    """Move sub-daily points onto the grid of `step` seconds.
+
+    CoinGecko's hourly points come a few seconds to minutes after the hour. Each point
+    is rounded to the nearest grid time, and of the points rounded to the same time the
+    closest one is kept.
+    """
+    step_ms = step * 1000
+    grid = (timestamps + step_ms // 2) // step_ms * step_ms
+    order = np.lexsort((np.abs(timestamps - grid), grid))
+    grid, values = grid[order], values[order]
+    keep = np.ones(len(grid), dtype=bool)
+    keep[1:] = grid[1:] != grid[:-1]
+    return grid[keep], values[keep]
+
+
+def ingest_market_chart(token_data, step=None):
+    """Turn a market_chart/range response into timestamp-aligned columns with a single join.
+
+    Prices and market caps are inner-joined on their timestamps; total volumes are
+    optional and left as NaN where missing. With a sub-daily `step` in seconds, the
+    points are first snapped onto that grid.
+    """
+    dropped = {}
+    series = {}
+    for key, column in RESPONSE_FIELDS:
+        points = response_array(token_data, key)
+        if step is not None and step < DAY:
+            points = snap_to_grid(*points, step)
+        timestamps, values, duplicates = unique_points(*points)
+        if duplicates:
+            dropped[f"duplicate {key}"] = duplicates
+        series[column] = (timestamps, values)
+
+    price_timestamps, prices = series["price"]
+    market_cap_timestamps, market_caps = series["market_cap"]
+    timestamps, price_rows, market_cap_rows = np.intersect1d(price_timestamps, market_cap_timestamps,
+                                                             assume_unique=True, return_indices=True)
+    if len(price_timestamps) > len(timestamps):
+        dropped["prices without market cap"] = len(price_timestamps) - len(timestamps)
+    if len(market_cap_timestamps) > len(timestamps):
+        dropped["market caps without price"] = len(market_cap_timestamps) - len(timestamps)
+
+    volume_timestamps, volumes = series["total_volume"]
+    total_volumes = np.full(len(timestamps), np.nan)
+    if len(volume_timestamps):
+        rows = np.minimum(np.searchsorted(volume_timestamps, timestamps), len(volume_timestamps) - 1)
+        found = volume_timestamps[rows] == timestamps
+        total_volumes[found] = volumes[rows[found]]
+
+    columns = {
+        "timestamp": timestamps,
+        "price": prices[price_rows],
+        "market_cap": market_caps[market_cap_rows],
+        "total_volume": total_volumes,
+    }
+    return IngestResult(columns, dropped)
+
+
+def format_dropped(dropped):
+    return ", ".join(f"{count} {reason}" for reason, count in dropped.items())
+
+
+def clip_columns(columns, from_timestamp, to_timestamp):
+    # Keep the points within [from, to], given in seconds
+    timestamps = columns["timestamp"]
+    keep = (timestamps >= from_timestamp * 1000) & (timestamps <= to_timestamp * 1000)
+    return {name: values[keep] for name, values in columns.items()}
+
+
+def write_price_file(token_file, columns):
+    write_atomic(token_file, lambda f: pd.DataFrame(columns, columns=PRICE_FILE_COLUMNS).to_csv(f, index=False))
+
+
+def append_price_file(token_file, columns):
+    # Older price files have no total_volume column, append only the columns they have
+    with open(token_file) as f:
+        header = f.readline().strip().split(",")
+    pd.DataFrame(columns, columns=header).to_csv(token_file, mode="a", header=False, index=False)
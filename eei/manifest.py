@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path, write):
+    # Write to a temporary file first so a crash never leaves a truncated file behind
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class PriceManifest:
+    """Record of every price file in a prices folder: the requested range, the first
+    and last timestamp actually stored, the row count and a checksum of the file.
+
+    Entries are kept in memory until save() writes the whole manifest.
+    """
+
+    def __init__(self, prices_dir):
+        self.prices_dir = prices_dir
+        self.path = os.path.join(prices_dir, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+
+    def get(self, period_start, token_id):
+        return self.entries.get(period_start, {}).get(token_id)
+
+    def record(self, period_start, token_id, token_file, from_timestamp, to_timestamp):
+        timestamps = pd.read_csv(token_file, usecols=['timestamp'])['timestamp']
+        self.entries.setdefault(period_start, {})[token_id] = {
+            'from': from_timestamp,
+            'to': to_timestamp,
+            'first_timestamp': int(timestamps.iloc[0]) if len(timestamps) else None,
+            'last_timestamp': int(timestamps.iloc[-1]) if len(timestamps) else None,
+            'rows': len(timestamps),
+            'sha256': file_checksum(token_file),
+        }
+
+    def adopt(self, period_start, token_id, token_file, from_timestamp):
+        """Record a price file written before the manifest existed, trusting its own timestamps."""
+        timestamps = pd.read_csv(token_file, usecols=['timestamp'])['timestamp']
+        if not len(timestamps) or int(timestamps.iloc[0]) != from_timestamp * 1000:
+            return None
+        self.record(period_start, token_id, token_file, from_timestamp, int(timestamps.iloc[-1]) // 1000)
+        return self.get(period_start, token_id)
+
+    def verify(self, period_start, token_id, token_file):
+        """Return the manifest entry if the file is unchanged since it was recorded."""
+        entry = self.get(period_start, token_id)
+        if entry is None or not os.path.exists(token_file):
+            return None
+        return entry if file_checksum(token_file) == entry['sha256'] else None
+
+    def save(self):
+        write_atomic(self.path, lambda f: json.dump(self.entries, f, indent=1, sort_keys=True))
@@ -0,0 +1,288 @@
+"""Streaming versions of the index statistics of statistics/descriptive.py.
+
+Every accumulator is updated in O(1) per index value and serializes to JSON, so the
+statistics of an index are kept up to date from the rows appended to its history
+since the last update, without reading the whole file again:
+
+- RunningMoments: Welford's mean and variance
+- P2Quantile: the P-square estimate of a quantile (Jain and Chlamtac, 1985), used
+  for the median; exact up to five observations, approximate after
+- DrawdownTracker: running peak and maximum drawdown
+
+The state of an index is kept next to its history in data/online_statistics.json.
+"""
+import os
+import json
+import math
+import numpy as np
+import pandas as pd
+
+from eei.manifest import write_atomic
+
+STATE_VERSION = 1
+
+
+class RunningMoments:
+    """Mean and sample variance by Welford's algorithm."""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        # ddof=1, like pandas
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+
+class P2Quantile:
+    """Streaming estimate of the `p` quantile with five markers."""
+
+    def __init__(self, p=0.5, heights=None, positions=None, desired=None):
+        self.p = p
+        self.heights = heights or []
+        self.positions = positions or [1, 2, 3, 4, 5]
+        self.desired = desired or [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    @property
+    def count(self):
+        return self.positions[4] if len(self.heights) == 5 else len(self.heights)
+
+    def update(self, value):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+            if (offset >= 1 and self.positions[i + 1] - self.positions[i] > 1) or \
+                    (offset <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (self.positions[i + step] - self.positions[i])
+                heights[i] = height
+                self.positions[i] += step
+
+    def parabolic(self, i, step):
+        n, q = self.positions, self.heights
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.heights:
+            return math.nan
+        if len(self.heights) < 5:
+            return float(np.quantile(self.heights, self.p))
+        return self.heights[2]
+
+    def to_dict(self):
+        return {'p': self.p, 'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+
+class DrawdownTracker:
+    def __init__(self, peak=-math.inf, max_drawdown=0.0):
+        self.peak = peak
+        self.max_drawdown = max_drawdown
+
+    def update(self, value):
+        self.peak = max(self.peak, value)
+        self.max_drawdown = max(self.max_drawdown, 1 - value / self.peak)
+
+    def to_dict(self):
+        return {'peak': self.peak, 'max_drawdown': self.max_drawdown}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+
+def ratio(numerator, denominator):
+    # Division that gives NaN instead of raising on a zero denominator
+    return numerator / denominator if denominator else math.nan
+
+
+class OnlineIndexStatistics:
+    """The metrics of statistics/descriptive.py, updated one index value at a time.
+
+    `risk_free_yield` is the yield of statistics/descriptive.py (in decimal), which its
+    Sharpe and Sortino ratios subtract from every return as is; the annualized Sharpe
+    ratio spreads it over the `periods_per_year`.
+    """
+
+    def __init__(self, periods_per_year=365):
+        self.periods_per_year = periods_per_year
+        self.first_value = None
+        self.last_value = None
+        self.returns = RunningMoments()
+        self.median = P2Quantile(0.5)
+        self.adjusted_returns = RunningMoments()
+        self.downside_returns = RunningMoments()
+        self.annual_adjusted_returns = RunningMoments()
+        self.drawdown = DrawdownTracker()
+
+    def update(self, index_value, risk_free_yield=math.nan):
+        if self.first_value is None:
+            self.first_value = index_value
+        else:
+            daily_return = index_value / self.last_value - 1
+            self.returns.update(daily_return)
+            self.median.update(daily_return)
+            # Returns without a risk-free rate are left out, as pandas skips NaN
+            if not math.isnan(risk_free_yield):
+                adjusted_return = daily_return - risk_free_yield
+                self.adjusted_returns.update(adjusted_return)
+                if adjusted_return < 0:
+                    self.downside_returns.update(adjusted_return)
+                self.annual_adjusted_returns.update(daily_return - risk_free_yield / self.periods_per_year)
+        self.last_value = index_value
+        self.drawdown.update(index_value)
+
+    def summary(self):
+        """The metrics, named as in descriptive_statistics.csv."""
+        total_return = self.last_value / self.first_value - 1 if self.first_value is not None else math.nan
+        annualization_factor = math.sqrt(self.periods_per_year)
+        return {
+            'total_return': total_return,
+            'mean': self.returns.mean if self.returns.count else math.nan,
+            'median': self.median.value(),
+            'std': self.returns.std,
+            'sharpe_ratio': ratio(self.adjusted_returns.mean, self.adjusted_returns.std),
+            'sortino_ratio': ratio(self.adjusted_returns.mean, self.downside_returns.std),
+            'max_drawdown': self.drawdown.max_drawdown,
+            'annualized_return': (1 + total_return) ** (self.periods_per_year / self.returns.count) - 1
+            if self.returns.count else math.nan,
+            'annualized_volatility': self.returns.std * annualization_factor,
+            'annualized_sharpe_ratio': ratio(self.annual_adjusted_returns.mean, self.annual_adjusted_returns.std) * annualization_factor,
+        }
+
+    def to_dict(self):
+        return {
+            'periods_per_year': self.periods_per_year,
+            'first_value': self.first_value,
+            'last_value': self.last_value,
+            'returns': self.returns.to_dict(),
+            'median': self.median.to_dict(),
+            'adjusted_returns': self.adjusted_returns.to_dict(),
+            'downside_returns': self.downside_returns.to_dict(),
+            'annual_adjusted_returns': self.annual_adjusted_returns.to_dict(),
+            'drawdown': self.drawdown.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        statistics = cls(state['periods_per_year'])
+        statistics.first_value = state['first_value']
+        statistics.last_value = state['last_value']
+        for name in ('returns', 'adjusted_returns', 'downside_returns', 'annual_adjusted_returns'):
+            setattr(statistics, name, RunningMoments.from_dict(state[name]))
+        statistics.median = P2Quantile.from_dict(state['median'])
+        statistics.drawdown = DrawdownTracker.from_dict(state['drawdown'])
+        return statistics
+
+
+def read_state(state_file):
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def new_rows(history_file, state):
+    """Return the history rows after the ones the state has seen, and the new file offset.
+
+    If the rows seen so far are no longer where the state left them, the history was
+    rewritten and every row is returned, with None for the state.
+    """
+    with open(history_file, 'rb') as f:
+        if state is not None:
+            f.seek(state['last_row_offset'])
+            if f.read(len(state['last_row'])) != state['last_row'].encode():
+                state = None
+        if state is None:
+            f.seek(0)
+            f.readline()  # header
+        start = f.tell()
+        data = f.read()
+    # Only complete lines, a row still being written is picked up next time
+    data = data[:data.rfind(b'\n') + 1]
+    lines = data.splitlines(keepends=True)
+    return lines, start, state
+
+
+def update_online_statistics(history_file, state_file, risk_free_yields=None, periods_per_year=365):
+    """Feed the rows appended to an index history since the last update into its
+    statistics, save them and return their summary.
+
+    `risk_free_yields` is the yield Series of statistics/descriptive.py, indexed by date.
+    """
+    state = read_state(state_file)
+    if state is not None and state['statistics']['periods_per_year'] != periods_per_year:
+        state = None
+    lines, start, state = new_rows(history_file, state)
+    statistics = OnlineIndexStatistics.from_dict(state['statistics']) if state else OnlineIndexStatistics(periods_per_year)
+
+    if lines:
+        timestamps = np.array([int(line.split(b',')[0]) for line in lines])
+        index_values = [float(line.split(b',')[1]) for line in lines]
+        if risk_free_yields is not None:
+            dates = pd.to_datetime(timestamps, unit='s')
+            yields = risk_free_yields.reindex(dates, method='ffill').to_numpy()
+        else:
+            yields = np.full(len(lines), np.nan)
+        for index_value, risk_free_yield in zip(index_values, yields.tolist()):
+            statistics.update(index_value, risk_free_yield)
+
+        last_row = lines[-1]
+        state = {
+            'version': STATE_VERSION,
+            'last_row': last_row.decode(),
+            'last_row_offset': start + sum(len(line) for line in lines[:-1]),
+            'statistics': statistics.to_dict(),
+        }
+        write_atomic(state_file, lambda f: json.dump(state, f))
+
+    return statistics.summary()
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("price", "market_cap")
+
+
+class PricePanel:
+    """Dense (timestamp x token) price and market cap matrices for one rebalancing period.
+
+    Timestamps are in milliseconds, as stored in the price files. Cells for which a
+    token has no row are flagged in `present` and hold NaN in the value matrices.
+    """
+
+    def __init__(self, tokens, timestamps, values, present, first_ts, last_ts):
+        self.tokens = list(tokens)
+        self.timestamps = timestamps
+        self.values = values
+        self.present = present
+        # First and last timestamp of each token's file, None for empty files
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def field(self, name):
+        return self.values[name]
+
+    def select(self, token_ids):
+        """Return a panel with the given tokens as columns, in the given order.
+
+        Tokens without a price file become all-absent columns.
+        """
+        positions = {token_id: position for position, token_id in enumerate(self.tokens)}
+        columns = np.array([positions.get(token_id, -1) for token_id in token_ids], dtype=np.int64)
+        known = columns >= 0
+
+        present = np.zeros((len(self.timestamps), len(columns)), dtype=bool)
+        present[:, known] = self.present[:, columns[known]]
+        values = {}
+        for name, matrix in self.values.items():
+            selected = np.full(present.shape, np.nan)
+            selected[:, known] = matrix[:, columns[known]]
+            values[name] = selected
+
+        first_ts = [self.first_ts[column] if column >= 0 else None for column in columns]
+        last_ts = [self.last_ts[column] if column >= 0 else None for column in columns]
+        return PricePanel(token_ids, self.timestamps, values, present, first_ts, last_ts)
+
+    def head(self, count):
+        """Return a panel restricted to the first `count` tokens."""
+        values = {name: matrix[:, :count] for name, matrix in self.values.items()}
+        return PricePanel(self.tokens[:count], self.timestamps, values, self.present[:, :count],
+                          self.first_ts[:count], self.last_ts[:count])
+
+    def on_grid(self, timestamps):
+        """Return a panel whose rows are exactly the given timestamps (in seconds)."""
+        grid = np.asarray(timestamps, dtype=np.int64) * 1000
+        rows = np.searchsorted(self.timestamps, grid)
+        rows = np.minimum(rows, max(len(self.timestamps) - 1, 0))
+        found = (self.timestamps[rows] == grid) if len(self.timestamps) else np.zeros(len(grid), dtype=bool)
+
+        present = np.zeros((len(grid), len(self.tokens)), dtype=bool)
+        present[found] = self.present[rows[found]]
+        values = {}
+        for name, matrix in self.values.items():
+            selected = np.full(present.shape, np.nan)
+            selected[found] = matrix[rows[found]]
+            values[name] = selected
+        return PricePanel(self.tokens, grid, values, present, self.first_ts, self.last_ts)
+
+
+def read_price_file(token_prices_file):
+    token_prices = pd.read_csv(token_prices_file)
+    timestamps = token_prices["timestamp"].to_numpy(dtype=np.int64)
+    columns = {name: token_prices[name].to_numpy(dtype=np.float64) for name in PRICE_FIELDS}
+    return timestamps, columns
+
+
+def build_panel(token_series):
+    """Build a PricePanel from {token_id: (timestamps, {field: values})} in file row order."""
+    tokens = list(token_series)
+    all_timestamps = [timestamps for timestamps, _ in token_series.values()]
+    union = np.unique(np.concatenate(all_timestamps)) if all_timestamps else np.empty(0, dtype=np.int64)
+
+    present = np.zeros((len(union), len(tokens)), dtype=bool)
+    values = {name: np.full(present.shape, np.nan) for name in PRICE_FIELDS}
+    first_ts, last_ts = [], []
+
+    for column, token_id in enumerate(tokens):
+        timestamps, columns = token_series[token_id]
+        if len(timestamps) == 0:
+            first_ts.append(None)
+            last_ts.append(None)
+            continue
+        first_ts.append(int(timestamps[0]))
+        last_ts.append(int(timestamps[-1]))
+
+        # Keep the first row for duplicated timestamps, like a boolean filter + values[0] would
+        unique_timestamps, first_rows = np.unique(timestamps, return_index=True)
+        rows = np.searchsorted(union, unique_timestamps)
+        present[rows, column] = True
+        for name in PRICE_FIELDS:
+            values[name][rows, column] = columns[name][first_rows]
+
+    return PricePanel(tokens, union, values, present, first_ts, last_ts)
+
+
+def load_period_panel(period_path):
+    """Parse every price file of a rebalancing period folder exactly once."""
+    price_files = [file for file in os.listdir(period_path) if file.endswith(".csv")]
+    token_series = {}
+    for price_file in price_files:
+        token_series[price_file[:-4]] = read_price_file(os.path.join(period_path, price_file))
+    return build_panel(token_series)
+
+
+def columns_panel(token_columns):
+    """Build a PricePanel from {token_id: price file columns} already in memory."""
+    return build_panel({token_id: (columns["timestamp"], {name: columns[name] for name in PRICE_FIELDS})
+                        for token_id, columns in token_columns.items()})
@@ -0,0 +1,59 @@
+"""Index calculation with the rebalancing periods spread over a process pool.
+
+Apart from the previous period's price history used by some weighting schemes, the
+unnormalized totals of a period do not depend on any other period: only the divisors
+do, and those are a cheap scalar recurrence. The totals are therefore computed in
+parallel and chain-linked afterwards with the same chain_link as the sequential
+path, so both produce identical index values.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+from eei.engine import DAY, chain_link, compute_period, get_snapshot_data
+from eei.store import load_period, store_dir_for
+
+
+def compute_period_task(prices_dir, store_dir, snapshots_dir, scheme, step, period, previous_period):
+    # Workers open their periods from the columnar store by path, no price data is sent between processes
+    start_date, start_ts, end_ts = period
+    snapshot = get_snapshot_data(snapshots_dir, start_date)
+    if snapshot is None:
+        return None, None
+
+    panel = load_period(os.path.join(prices_dir, start_date), os.path.join(store_dir, start_date))
+    previous_panel = None
+    if previous_period is not None:
+        previous_panel = load_period(os.path.join(prices_dir, previous_period), os.path.join(store_dir, previous_period))
+    return compute_period(panel, previous_panel, snapshot, start_date, start_ts, end_ts, scheme, step)
+
+
+def compute_period_totals_parallel(rebalancing_periods, prices_dir, snapshots_dir, scheme, step=DAY, max_workers=None,
+                                   store_dir=None):
+    """compute_period_totals with every period computed in its own process.
+
+    `rebalancing_periods` comes from get_rebalancing_periods(prices_dir, store_dir), so
+    the store of every period is up to date before the workers open it.
+    """
+    store_dir = store_dir or store_dir_for(prices_dir)
+    periods = [(start_date, start_ts, end_ts) for start_date, start_ts, end_ts, _ in rebalancing_periods]
+    if not periods:
+        return [], []
+    previous_periods = [None] + [start_date for start_date, _, _ in periods[:-1]]
+    tasks = [(prices_dir, store_dir, snapshots_dir, scheme, step, period, previous_period)
+             for period, previous_period in zip(periods, previous_periods)]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(tqdm(executor.map(compute_period_task, *zip(*tasks)), total=len(tasks),
+                            desc="Calculating index", bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}"))
+
+    period_totals = [totals for totals, _ in results]
+    rebalances = [rebalance for _, rebalance in results]
+    return period_totals, rebalances
+
+
+def compute_index_history_parallel(rebalancing_periods, prices_dir, snapshots_dir, scheme, initial_index_value=100,
+                                   step=DAY, max_workers=None, store_dir=None):
+    period_totals, _ = compute_period_totals_parallel(rebalancing_periods, prices_dir, snapshots_dir, scheme, step,
+                                                      max_workers, store_dir)
+    return chain_link(period_totals, initial_index_value)
@@ -0,0 +1,102 @@
+"""The index pipeline as functions that pass their data on in memory.
+
+    client = CoinGeckoClient(api_key)
+    snapshots = build_snapshots(client, 10)
+    prices, failures = fetch_prices(client, snapshots)
+    index_history = compute_index(prices, snapshots, 'cw')
+    statistics = describe(index_history)
+
+Snapshots are {period start: snapshot DataFrame}, prices {period start: {token id:
+price file columns}}, and the index history the (timestamp, index_value) DataFrame
+of index_history.csv. No stage reads what the one before wrote: the folders passed
+as `snapshots_dir`, `prices_dir` and `index_history_file` only receive copies, in
+the layout of an index folder. The scripts keep their files as the source of truth
+between runs; data already on disk can be read back with load_snapshots and
+eei.engine.get_rebalancing_periods.
+"""
+import os
+import pandas as pd
+
+from eei.descriptive import describe_index, index_history_frame, read_risk_free_rate_data
+from eei.engine import compute_index_history, save_index_history, validate_rebalancing_periods
+from eei.fetch import REBALANCING_PERIODS, fetch_price_columns
+from eei.panel import columns_panel
+from eei.resolution import get_resolution
+from eei.snapshots import rank_index_snapshots, write_index_snapshot
+from eei.weighting import get_weighting_scheme
+
+HISTORICAL_SNAPSHOTS_DIR = "common/historical_snapshots"
+CLASSIFICATION_FILE = "common/classification.csv"
+
+
+def build_snapshots(client, index_constituents_number, historical_snapshots_folder=HISTORICAL_SNAPSHOTS_DIR,
+                    classification_file=CLASSIFICATION_FILE, max_workers=8, snapshots_dir=None):
+    """The index snapshot of every historical snapshot, as {period start: DataFrame}.
+
+    With a `snapshots_dir` they are also written there, as index_snapshot_generator.py does.
+    """
+    ranked, _ = rank_index_snapshots(client, historical_snapshots_folder, classification_file,
+                                     index_constituents_number, max_workers)
+    snapshots = {}
+    for file, (fieldnames, rows) in ranked.items():
+        snapshots[os.path.splitext(file)[0]] = pd.DataFrame(rows, columns=fieldnames)
+        if snapshots_dir is not None:
+            os.makedirs(snapshots_dir, exist_ok=True)
+            write_index_snapshot(os.path.join(snapshots_dir, file), fieldnames, rows)
+    return snapshots
+
+
+def load_snapshots(snapshots_dir):
+    """The index snapshots written to `snapshots_dir`, as {period start: DataFrame}."""
+    return {os.path.splitext(file)[0]: pd.read_csv(os.path.join(snapshots_dir, file))
+            for file in sorted(os.listdir(snapshots_dir)) if file.endswith('.csv')}
+
+
+def fetch_prices(client, snapshots, rebalancing_periods=REBALANCING_PERIODS, resolution=None, max_workers=8, now=None,
+                 prices_dir=None):
+    """The prices of every constituent of `snapshots`, and the (period, token, reason)
+    of those that could not be fetched.
+
+    With a `prices_dir` the price files and their manifest are also written there,
+    as fetch_prices.py does.
+    """
+    return fetch_price_columns(client, snapshots, rebalancing_periods, max_workers, now, resolution, prices_dir)
+
+
+def price_periods(prices):
+    """The validated (period, start_ts, end_ts, panel) tuples of the fetched `prices`,
+    as eei.engine.get_rebalancing_periods loads them from the price files."""
+    return validate_rebalancing_periods({period_start: columns_panel(token_columns)
+                                         for period_start, token_columns in prices.items()})
+
+
+def compute_index(prices, snapshots, scheme='cw', resolution=None, initial_index_value=100, index_history_file=None,
+                  **weighting_options):
+    """The index history of the `prices` weighted by `scheme` (a name of eei.weighting
+    with its options, or a WeightingScheme).
+
+    `prices` are fetched prices or the rebalancing periods of get_rebalancing_periods.
+    With an `index_history_file` the history is also saved there.
+    """
+    resolution = resolution or get_resolution()
+    if isinstance(scheme, str):
+        scheme = get_weighting_scheme(scheme, **weighting_options)
+    rebalancing_periods = price_periods(prices) if isinstance(prices, dict) else prices
+
+    index_history_df = compute_index_history(rebalancing_periods, None, scheme, initial_index_value, resolution.step,
+                                             snapshots=snapshots)
+    if index_history_file is not None:
+        save_index_history(index_history_df, index_history_file)
+    return index_history_df
+
+
+def describe(index_history, risk_free_rate=None, resolution=None):
+    """The descriptive statistics of an index history, as a row of descriptive_statistics.csv.
+
+    `risk_free_rate` is the frame of eei.descriptive.read_risk_free_rate_data, read
+    from risk-free-rate/risk_free_rate.csv by default.
+    """
+    resolution = resolution or get_resolution()
+    if risk_free_rate is None:
+        risk_free_rate = read_risk_free_rate_data()
+    return describe_index(index_history_frame(index_history), risk_free_rate, resolution.periods_per_year)
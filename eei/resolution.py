@@ -0,0 +1,44 @@
+import os
+from collections import namedtuple
+
+DAY = 86400
+HOUR = 3600
+
+# `step` is the spacing of the index in seconds. `interval` is the interval parameter
+# of market_chart/range; None leaves the granularity to CoinGecko, which returns hourly
+# data for ranges of up to `max_span` seconds. `periods_per_year` annualizes returns,
+# crypto trades every day of the year.
+Resolution = namedtuple("Resolution", ["name", "step", "interval", "max_span", "periods_per_year"])
+
+RESOLUTIONS = {
+    "daily": Resolution("daily", DAY, "daily", None, 365),
+    "hourly": Resolution("hourly", HOUR, None, 90 * DAY, 365 * 24),
+}
+DEFAULT_RESOLUTION = "daily"
+
+
+def get_resolution(name=DEFAULT_RESOLUTION):
+    if name not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {name!r}, expected one of {', '.join(RESOLUTIONS)}")
+    return RESOLUTIONS[name]
+
+
+def file_suffix(resolution):
+    # Daily data keeps the original file names, other resolutions live next to it
+    return "" if resolution.name == DEFAULT_RESOLUTION else f"_{resolution.name}"
+
+
+def prices_dir_for(data_dir, resolution):
+    return os.path.join(data_dir, f"prices{file_suffix(resolution)}")
+
+
+def index_history_file_for(data_dir, resolution):
+    return os.path.join(data_dir, f"index_history{file_suffix(resolution)}.csv")
+
+
+def index_state_file_for(data_dir, resolution):
+    return os.path.join(data_dir, f"index_state{file_suffix(resolution)}.json")
+
+
+def online_statistics_file_for(data_dir, resolution):
+    return os.path.join(data_dir, f"online_statistics{file_suffix(resolution)}.json")
@@ -0,0 +1,210 @@
+"""Rolling-window risk measures of many series at once.
+
+The measures of calculate_summary_statistics and calculate_performance_measures
+(statistics/descriptive.py, comparison/descriptive.py) over trailing windows instead
+of the whole sample. Counts, sums and squares of the returns of every series are
+accumulated once, so the sums over any window are the difference of two rows of the
+cumulative sums and all windows share them. Drawdowns depend on the order of the
+prices within a window; they are combined from power-of-two stretches of prices
+instead, in a number of steps logarithmic in the window length.
+
+The maximum drawdown is measured within each window. Drawdown durations count the
+periods since the last all-time high: the current one and the longest in the window.
+
+Missing values are left out of a window, as pandas skips NaN, and a window is only
+evaluated once the series have been running for its full length.
+"""
+import numpy as np
+import pandas as pd
+
+MEASURES = ['volatility', 'sharpe_ratio', 'sortino_ratio', 'beta', 'max_drawdown', 'max_drawdown_duration',
+            'drawdown_duration']
+
+
+def simple_returns(prices):
+    """Returns of a (periods x series) array over the previous available price, NaN where the price is missing."""
+    previous = pd.DataFrame(prices).ffill().shift(1).to_numpy()
+    return prices / previous - 1
+
+
+def cumulative_sums(values):
+    # Prepended with zeros, so the sum over rows [a, b) is cumulative[b] - cumulative[a]
+    return np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+
+
+def trailing(cumulative, window):
+    """Sums over the `window` rows up to every row of returns.
+
+    The first row of returns is always missing, so windows are full from row `window` on
+    and the rows before are NaN.
+    """
+    sums = np.full((len(cumulative) - 1,) + cumulative.shape[1:], np.nan)
+    sums[window:] = cumulative[window + 1:] - cumulative[1:-window]
+    return sums
+
+
+class CumulativeMoments:
+    """Cumulative count, sum and sum of squares of the non-missing values of every column.
+
+    The values are shifted by their column means first, which keeps the variances
+    from cancelling out in the differences of large sums.
+    """
+
+    def __init__(self, values):
+        valid = ~np.isnan(values)
+        self.center = np.where(valid, values, 0).mean(axis=0)
+        centered = np.where(valid, values - self.center, 0)
+        self.count = cumulative_sums(valid.astype(float))
+        self.sum = cumulative_sums(centered)
+        self.squares = cumulative_sums(centered ** 2)
+
+    def mean_std(self, window):
+        """Mean and sample standard deviation (ddof=1, like pandas) over trailing windows."""
+        count, total, squares = (trailing(cumulative, window) for cumulative in (self.count, self.sum, self.squares))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = (squares - total * mean) / (count - 1)
+        variance[count < 2] = np.nan
+        return mean + self.center, np.sqrt(np.maximum(variance, 0))
+
+
+class CumulativeCovariance:
+    """Cumulative sums for the beta of every column of `values` to `benchmark`, over the
+    periods where both are available."""
+
+    def __init__(self, values, benchmark):
+        both = ~np.isnan(values) & ~np.isnan(benchmark)[:, None]
+        # Centered like CumulativeMoments, the covariances do not depend on the shift
+        x = np.where(both, values - np.where(both, values, 0).mean(axis=0), 0)
+        y = np.where(both, benchmark[:, None] - np.where(both, benchmark[:, None], 0).mean(axis=0), 0)
+        self.count = cumulative_sums(both.astype(float))
+        self.x = cumulative_sums(x)
+        self.y = cumulative_sums(y)
+        self.xy = cumulative_sums(x * y)
+        self.yy = cumulative_sums(y * y)
+
+    def beta(self, window):
+        count, x, y, xy, yy = (trailing(cumulative, window) for cumulative in (self.count, self.x, self.y, self.xy, self.yy))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            beta = (xy - x * y / count) / (yy - y * y / count)
+        beta[count < 2] = np.nan
+        return beta
+
+
+def combine_drawdowns(left, right):
+    """Highest price, lowest price and maximum drawdown of two adjacent stretches of prices."""
+    left_high, left_low, left_drawdown = left
+    right_high, right_low, right_drawdown = right
+    with np.errstate(invalid='ignore'):
+        across = 1 - right_low / left_high
+    return (np.fmax(left_high, right_high), np.fmin(left_low, right_low),
+            np.fmax(np.fmax(left_drawdown, right_drawdown), across))
+
+
+def window_max_drawdowns(prices, window):
+    """Maximum drawdown within the trailing `window` + 1 prices of every row.
+
+    The drawdown of a stretch follows from the highest and lowest price and drawdown of
+    its two halves, so the stretches of every power-of-two length are built by doubling
+    and each window is put together from those of the binary digits of its length.
+    """
+    length = window + 1
+    periods = len(prices)
+    result = np.full(prices.shape, np.nan)
+    if periods < length:
+        return result
+
+    # levels[k]: (high, low, drawdown) of the 2**k prices starting at every row
+    levels = [(prices, prices, np.where(np.isnan(prices), np.nan, 0.0))]
+    while 2 ** len(levels) <= length:
+        size = 2 ** (len(levels) - 1)
+        previous = levels[-1]
+        levels.append(combine_drawdowns(tuple(part[:-size] for part in previous), tuple(part[size:] for part in previous)))
+
+    starts = periods - length + 1
+    combined, offset = None, 0
+    for k in reversed(range(len(levels))):
+        if length & 2 ** k:
+            part = tuple(values[offset:offset + starts] for values in levels[k])
+            combined = part if combined is None else combine_drawdowns(combined, part)
+            offset += 2 ** k
+    result[window:] = combined[2]
+    return result
+
+
+def rolling_max(values, window):
+    """Maximum over the trailing `window` rows of every row.
+
+    Two overlapping stretches of the largest power-of-two length within the window
+    cover it, and their maxima are built by doubling.
+    """
+    result = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return result
+    size, maxima = 1, values
+    while size * 2 <= window:
+        maxima = np.fmax(maxima[:-size], maxima[size:])
+        size *= 2
+    result[window - 1:] = np.fmax(maxima[:len(values) - window + 1], maxima[window - size:])
+    return result
+
+
+def underwater_durations(prices):
+    """Periods since the last all-time high of every row, zero at a new high."""
+    peaks = np.fmax.accumulate(prices, axis=0)
+    positions = np.arange(len(prices))[:, None]
+    with np.errstate(invalid='ignore'):
+        below_peak = prices < peaks
+    last_peak = np.maximum.accumulate(np.where(below_peak, 0, positions), axis=0)
+    return (positions - last_peak).astype(float)
+
+
+def rolling_measures(prices, risk_free_yields, windows, benchmark=None, periods_per_year=365):
+    """Rolling measures of every column of `prices`, a DataFrame of series on a common index.
+
+    `risk_free_yields` is the yield of statistics/descriptive.py (in decimal) on the same
+    index, subtracted from every return for the Sharpe and Sortino ratios as there.
+    `windows` are lengths in periods, `benchmark` the column the betas are measured
+    against. Returns a long DataFrame with a row per timestamp, series and window.
+    """
+    values = prices.to_numpy(dtype=float)
+    returns = simple_returns(values)
+    adjusted_returns = returns - np.asarray(risk_free_yields, dtype=float)[:, None]
+    with np.errstate(invalid='ignore'):
+        downside_returns = np.where(adjusted_returns < 0, adjusted_returns, np.nan)
+
+    # Missing prices keep the last one for the drawdowns
+    prices_filled = prices.ffill().to_numpy(dtype=float)
+    durations = underwater_durations(prices_filled)
+
+    returns_moments = CumulativeMoments(returns)
+    adjusted_moments = CumulativeMoments(adjusted_returns)
+    downside_moments = CumulativeMoments(downside_returns)
+    covariance = CumulativeCovariance(returns, returns[:, prices.columns.get_loc(benchmark)]) if benchmark else None
+    annualization_factor = np.sqrt(periods_per_year)
+
+    frames = []
+    for window in windows:
+        _, std = returns_moments.mean_std(window)
+        adjusted_mean, adjusted_std = adjusted_moments.mean_std(window)
+        _, downside_std = downside_moments.mean_std(window)
+        max_drawdown = window_max_drawdowns(prices_filled, window)
+        max_drawdown_duration = rolling_max(durations, window + 1)
+        drawdown_duration = np.where(np.isnan(max_drawdown_duration), np.nan, durations)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            measures = {
+                'volatility': std * annualization_factor,
+                'sharpe_ratio': adjusted_mean / adjusted_std,
+                'sortino_ratio': adjusted_mean / downside_std,
+                'beta': covariance.beta(window) if covariance else np.full(values.shape, np.nan),
+                'max_drawdown': max_drawdown,
+                'max_drawdown_duration': max_drawdown_duration,
+                'drawdown_duration': drawdown_duration,
+            }
+        frames.append(pd.DataFrame({
+            'timestamp': np.repeat(prices.index, len(prices.columns)),
+            'series': np.tile(prices.columns, len(prices)),
+            'window': window,
+            **{name: measure.ravel() for name, measure in measures.items()},
+        }))
+    return pd.concat(frames, ignore_index=True)
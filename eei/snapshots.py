@@ -0,0 +1,148 @@
+import os
+import csv
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from tqdm import tqdm
+
+from eei.coingecko import CoinGeckoError
+
+# Economic purpose codes of the tokens eligible for the index (see classification.csv)
+ELIGIBLE_ECONOMIC_PURPOSES = {"EEP22NT02", "EEP22TU03", "EEP22NT03"}
+
+
+def get_classification_data(classification_file):
+    classification_data = {}
+    with open(classification_file, "r") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            coingecko_id = row["Coingecko ID"]
+            economic_purpose = row["Economic Purpose"]
+            classification_data[coingecko_id] = economic_purpose
+    return classification_data
+
+
+def passes_local_filters(row, classification_data):
+    """Checks that need no API call: a Coingecko ID, a classification and an eligible economic purpose."""
+    coingecko_id = row["Coingecko ID"]
+    if coingecko_id == "empty":
+        print(f"\033[1;91m\nToken with empty Coingecko ID: {row['Name']}\033[0m")
+        return False
+
+    if coingecko_id not in classification_data:
+        return False
+
+    economic_purpose = classification_data[coingecko_id]
+    if economic_purpose == "":
+        print(f"\033[1;91m\nEconomic purpose is empty for token {row['Name']}\033[0m")
+        return False
+
+    return economic_purpose in ELIGIBLE_ECONOMIC_PURPOSES
+
+
+class EcosystemLookup:
+    """Thread-safe, deduplicated check of the "Ethereum Ecosystem" category.
+
+    Each Coingecko ID is requested at most once, even when several snapshot files ask
+    for it at the same time; later callers wait for the first request.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.results)
+
+    def __call__(self, coingecko_id):
+        with self.lock:
+            future = self.results.get(coingecko_id)
+            is_owner = future is None
+            if is_owner:
+                future = self.results[coingecko_id] = Future()
+
+        if is_owner:
+            try:
+                future.set_result(self.is_ethereum_ecosystem_token(coingecko_id))
+            except Exception as error:
+                future.set_exception(error)
+        return future.result()
+
+    def is_ethereum_ecosystem_token(self, coingecko_id):
+        try:
+            data = self.client.coin(coingecko_id)
+        except CoinGeckoError as error:
+            print(f"\033[1;91m\nCould not look up token {coingecko_id}: {error}\033[0m")
+            return False
+
+        if isinstance(data, list):
+            print(f"\033[1;91m\nNo categories found for token {coingecko_id}\033[0m")
+            return False
+        categories = data.get("categories") or []
+
+        return "Ethereum Ecosystem" in categories
+
+
+def rank_eligible_rows(input_file, index_constituents_number, classification_data, lookup):
+    """Return the header and the first `index_constituents_number` eligible rows of a historical snapshot."""
+    with open(input_file, "r") as f_in:
+        reader = csv.DictReader(f_in)
+        rows = []
+
+        # Rows are ranked, so the API is only asked about locally eligible tokens until N are found
+        for row in reader:
+            if len(rows) >= index_constituents_number:
+                break
+
+            if passes_local_filters(row, classification_data) and lookup(row["Coingecko ID"]):
+                rows.append(row)
+
+        return reader.fieldnames, rows
+
+
+def write_index_snapshot(output_file, fieldnames, rows):
+    with open(output_file, "w") as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def rank_index_snapshots(client, historical_snapshots_folder, classification_file, index_constituents_number,
+                         max_workers=8):
+    """Rank the first `index_constituents_number` eligible tokens of every historical
+    snapshot, processing the files concurrently.
+
+    Returns {file name: (fieldnames, rows)} and the number of distinct tokens looked
+    up through the API.
+    """
+    classification_data = get_classification_data(classification_file)
+    lookup = EcosystemLookup(client)
+    files = sorted(os.listdir(historical_snapshots_folder))
+
+    def process(file):
+        input_file = os.path.join(historical_snapshots_folder, file)
+        return rank_eligible_rows(input_file, index_constituents_number, classification_data, lookup)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        ranked = list(tqdm(executor.map(process, files), total=len(files), desc="Processing files", bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}"))
+
+    return dict(zip(files, ranked)), len(lookup)
+
+
+def generate_index_snapshots(client, historical_snapshots_folder, classification_file, index_snapshots_folders,
+                             max_workers=8):
+    """Write the index snapshots of every historical snapshot.
+
+    `index_snapshots_folders` maps each output folder to its number of constituents.
+    Eligible tokens are ranked once per snapshot date, up to the largest number, and
+    every folder receives the leading rows it needs. Returns the number of distinct
+    tokens looked up through the API.
+    """
+    largest_count = max(index_snapshots_folders.values())
+    ranked, lookups = rank_index_snapshots(client, historical_snapshots_folder, classification_file, largest_count,
+                                           max_workers)
+    for file, (fieldnames, rows) in ranked.items():
+        for index_snapshots_folder, index_constituents_number in index_snapshots_folders.items():
+            write_index_snapshot(os.path.join(index_snapshots_folder, file), fieldnames, rows[:index_constituents_number])
+
+    return lookups
@@ -0,0 +1,286 @@
+"""Local stand-in for the CoinGecko Pro API, for offline runs, load tests and profiling.
+
+Serves /coins/{id}, /coins/{id}/market_chart/range and /key under /api/v3. Responses
+come from, in order of preference:
+
+- recorded fixtures: a response cache folder written by CoinGeckoClient against
+  the real API (e.g. .cache/coingecko), replayed for identical requests
+- the price CSVs of the index folders and comparison/data
+- a deterministic synthetic random walk for any other token
+
+Without interval=daily, ranges of up to 90 days are answered with hourly points a
+few seconds after the hour, interpolated between the daily ones, like CoinGecko's
+automatic granularity.
+
+Latency, rate limiting (HTTP 429 with Retry-After) and server errors are injected
+with a seeded random generator, so runs are reproducible. Start it with
+
+    python -m eei.standin --port 8000 --latency 0.05 --error-rate 0.01
+
+and point the scripts at it with COINGECKO_API_URL=http://127.0.0.1:8000/api/v3
+(or api_url in the [COINGECKO] section of config.ini).
+"""
+import os
+import csv
+import glob
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from eei.coingecko import ResponseCache, TokenBucket
+
+API_PREFIX = '/api/v3/'
+DAY = 86400
+HOUR = 3600
+# Longest range answered with hourly data when no interval is requested
+HOURLY_MAX_SPAN = 90 * DAY
+
+
+class StandInData:
+    """Responses of the stand-in server, from fixtures, local price files or synthetic data."""
+
+    def __init__(self, root='.', fixtures_dir=None, seed=0):
+        self.root = root
+        self.fixtures = ResponseCache(fixtures_dir) if fixtures_dir else None
+        self.seed = seed
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.ecosystem = self.read_ecosystem_tokens()
+
+    def read_ecosystem_tokens(self):
+        # Every token that made it into an index snapshot is in the Ethereum Ecosystem category
+        tokens = set()
+        for snapshot_file in glob.glob(os.path.join(self.root, 'index-*', 'data', 'index_snapshots', '*.csv')):
+            with open(snapshot_file) as f:
+                tokens.update(row['Coingecko ID'] for row in csv.DictReader(f))
+        return tokens
+
+    def fixture(self, endpoint, params):
+        if self.fixtures is None:
+            return None
+        return self.fixtures.get(endpoint, params)
+
+    def load_token(self, token_id):
+        """Merge every local price file of a token into {timestamp ms: (price, market_cap, total_volume)}."""
+        with self.lock:
+            if token_id in self.tokens:
+                return self.tokens[token_id]
+
+        points = {}
+        for price_file in glob.glob(os.path.join(self.root, 'index-*', 'data', 'prices', '*', f'{token_id}.csv')):
+            with open(price_file) as f:
+                for row in csv.DictReader(f):
+                    points[int(row['timestamp'])] = (float(row['price']), float(row['market_cap']),
+                                                     float(row.get('total_volume') or 0))
+        comparison_file = os.path.join(self.root, 'comparison', 'data', f'{token_id}_prices.csv')
+        if not points and os.path.exists(comparison_file):
+            with open(comparison_file) as f:
+                for row in csv.DictReader(f):
+                    points[int(row['timestamp']) * 1000] = (float(row['price']), 0.0, 0.0)
+
+        with self.lock:
+            self.tokens[token_id] = points
+        return points
+
+    def synthetic(self, token_id, from_timestamp, to_timestamp):
+        # Daily geometric random walk, identical for the same token and seed
+        rng = random.Random(zlib.crc32(token_id.encode()) ^ self.seed)
+        price = rng.uniform(0.1, 100)
+        supply = rng.uniform(1e6, 1e9)
+        first_day = 1577836800  # 2020-01-01, so any range of a token sees the same walk
+        points = {}
+        for timestamp in range(first_day, to_timestamp + 1, DAY):
+            price *= 1 + rng.gauss(0, 0.04)
+            if timestamp >= from_timestamp:
+                points[timestamp * 1000] = (price, price * supply, price * supply * rng.uniform(0.01, 0.2))
+        return points
+
+    def hourly(self, token_id, points, from_timestamp, to_timestamp):
+        # Log-linear interpolation between the daily points, stamped up to 90 seconds after the hour
+        rng = random.Random(zlib.crc32(token_id.encode()) ^ self.seed ^ from_timestamp)
+        daily = sorted(points)
+        hourly = {}
+        for start, end in zip(daily, daily[1:]):
+            for hour in range(start, end, HOUR * 1000):
+                if not from_timestamp * 1000 <= hour <= to_timestamp * 1000:
+                    continue
+                fraction = (hour - start) / (end - start)
+                values = tuple(a ** (1 - fraction) * b ** fraction if a > 0 and b > 0 else a
+                               for a, b in zip(points[start], points[end]))
+                hourly[hour + rng.randint(0, 90) * 1000] = values
+        if daily and from_timestamp * 1000 <= daily[-1] <= to_timestamp * 1000:
+            hourly[daily[-1] + rng.randint(0, 90) * 1000] = points[daily[-1]]
+        return hourly
+
+    def market_chart_range(self, token_id, from_timestamp, to_timestamp, interval='daily'):
+        points = self.load_token(token_id) or self.synthetic(token_id, from_timestamp - DAY, to_timestamp + DAY)
+        if interval != 'daily' and to_timestamp - from_timestamp <= HOURLY_MAX_SPAN:
+            points = self.hourly(token_id, points, from_timestamp, to_timestamp)
+        timestamps = sorted(t for t in points if from_timestamp * 1000 <= t <= to_timestamp * 1000)
+        return {
+            'prices': [[t, points[t][0]] for t in timestamps],
+            'market_caps': [[t, points[t][1]] for t in timestamps],
+            'total_volumes': [[t, points[t][2]] for t in timestamps],
+        }
+
+    def coin(self, token_id):
+        categories = ['Ethereum Ecosystem'] if token_id in self.ecosystem else []
+        return {'id': token_id, 'categories': categories}
+
+
+class FaultInjector:
+    """Seeded latency, rate limiting and error injection."""
+
+    def __init__(self, latency=0.0, jitter=0.0, calls_per_minute=None, throttle_rate=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.limiter = TokenBucket(calls_per_minute, burst=max(1, calls_per_minute // 60)) if calls_per_minute else None
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def over_limit(self):
+        return self.limiter is not None and not self.limiter.try_acquire()
+
+    def outcome(self):
+        """Return (delay in seconds, status code to fail with or None)."""
+        with self.lock:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            roll = self.rng.random()
+        if self.over_limit() or roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+def query_params(query):
+    # Numeric parameters as integers, matching the keys of the client's response cache
+    params = {}
+    for key, values in parse_qs(query).items():
+        value = values[-1]
+        params[key] = int(value) if value.lstrip('-').isdigit() else value
+    return params
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data=None, headers=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return self.send_json(404, {'error': 'not found'})
+        endpoint = url.path[len(API_PREFIX):].strip('/')
+        params = query_params(url.query)
+        params.pop('x_cg_pro_api_key', None)
+
+        delay, failure = self.server.faults.outcome()
+        if delay:
+            time.sleep(delay)
+        self.server.count(failure or 200)
+        if failure == 429:
+            return self.send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+        if failure:
+            return self.send_json(failure, {'error': 'injected failure'})
+
+        data = self.server.data.fixture(endpoint, params)
+        if data is not None:
+            return self.send_json(200, data)
+
+        parts = endpoint.split('/')
+        if parts == ['key']:
+            return self.send_json(200, {'plan': 'stand-in', 'monthly_call_credit': None,
+                                        'current_total_monthly_calls': self.server.requests})
+        if len(parts) == 2 and parts[0] == 'coins':
+            return self.send_json(200, self.server.data.coin(parts[1]))
+        if len(parts) == 4 and parts[0] == 'coins' and parts[2:] == ['market_chart', 'range']:
+            if 'from' not in params or 'to' not in params:
+                return self.send_json(400, {'error': 'from and to are required'})
+            return self.send_json(200, self.server.data.market_chart_range(parts[1], params['from'], params['to'],
+                                                                           params.get('interval')))
+        return self.send_json(404, {'error': 'not found'})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data, faults, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.data = data
+        self.faults = faults
+        self.verbose = verbose
+        self.requests = 0
+        self.responses = {}
+        self.counter_lock = threading.Lock()
+
+    def count(self, status):
+        with self.counter_lock:
+            self.requests += 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v3'
+
+
+def start_server(host='127.0.0.1', port=0, root='.', fixtures_dir=None, latency=0.0, jitter=0.0,
+                 calls_per_minute=None, throttle_rate=0.0, error_rate=0.0, seed=0):
+    """Start a stand-in server in a background thread and return it; use `server.api_url` as the base URL."""
+    data = StandInData(root, fixtures_dir, seed)
+    faults = FaultInjector(latency, jitter, calls_per_minute, throttle_rate, error_rate, seed)
+    server = StandInServer((host, port), data, faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the CoinGecko Pro API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--root', default='.', help="repository root with the index folders and comparison/data")
+    parser.add_argument('--fixtures', help="response cache folder to replay recorded responses from")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra latency of up to this many seconds")
+    parser.add_argument('--calls-per-minute', type=int, help="answer 429 beyond this rate, like the real API")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    data = StandInData(args.root, args.fixtures, args.seed)
+    faults = FaultInjector(args.latency, args.jitter, args.calls_per_minute, args.throttle_rate, args.error_rate, args.seed)
+    server = StandInServer((args.host, args.port), data, faults, args.verbose)
+    print(f"Serving a CoinGecko stand-in at {server.api_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Answered {server.requests} requests: {server.responses}")
+
+
+if __name__ == '__main__':
+    main()
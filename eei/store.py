@@ -0,0 +1,127 @@
+"""Columnar, memory-mapped copy of the per-token price CSVs.
+
+Each rebalancing period is stored as a folder of NumPy blocks:
+
+    <store>/<period>/timestamps.npy   union of the period's timestamps (ms, int64)
+    <store>/<period>/price.npy        (timestamp x token) float64
+    <store>/<period>/market_cap.npy   (timestamp x token) float64
+    <store>/<period>/present.npy      (timestamp x token) bool
+    <store>/<period>/index.json       token -> column offset, per-token first/last
+                                      timestamps and the size and mtime of the CSVs
+                                      the blocks were built from
+
+Convert existing price trees with `python -m eei.store <index folder> ...`; other
+resolutions are stored next to the daily data, e.g. data/price_store_hourly.
+"""
+import os
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eei.panel import PRICE_FIELDS, PricePanel, load_period_panel
+
+INDEX_FILE = 'index.json'
+STORE_DIR = 'price_store'
+
+
+def store_dir_for(prices_dir):
+    # The store lives next to the data/prices folder it mirrors, data/prices_hourly gets data/price_store_hourly
+    prices_dir = os.path.normpath(prices_dir)
+    suffix = os.path.basename(prices_dir)[len('prices'):]
+    return os.path.join(os.path.dirname(prices_dir), f'{STORE_DIR}{suffix}')
+
+
+def source_fingerprint(period_path):
+    fingerprint = {}
+    for entry in os.scandir(period_path):
+        if entry.name.endswith('.csv'):
+            stat = entry.stat()
+            fingerprint[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def read_store_index(store_period_path):
+    try:
+        with open(os.path.join(store_period_path, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_store_period(panel, store_period_path, fingerprint):
+    os.makedirs(store_period_path, exist_ok=True)
+    # The index is written last and marks the blocks as complete
+    index_path = os.path.join(store_period_path, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    np.save(os.path.join(store_period_path, 'timestamps.npy'), np.ascontiguousarray(panel.timestamps))
+    for name in PRICE_FIELDS:
+        np.save(os.path.join(store_period_path, f'{name}.npy'), np.ascontiguousarray(panel.field(name)))
+    np.save(os.path.join(store_period_path, 'present.npy'), np.ascontiguousarray(panel.present))
+
+    index = {
+        'columns': {token_id: column for column, token_id in enumerate(panel.tokens)},
+        'first_ts': panel.first_ts,
+        'last_ts': panel.last_ts,
+        'source': fingerprint,
+    }
+    tmp_path = f'{index_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+
+def load_store_period(store_period_path, index=None):
+    """Open a stored period without copying: the blocks are memory-mapped read-only."""
+    index = index or read_store_index(store_period_path)
+    tokens = sorted(index['columns'], key=index['columns'].get)
+    timestamps = np.load(os.path.join(store_period_path, 'timestamps.npy'), mmap_mode='r')
+    values = {name: np.load(os.path.join(store_period_path, f'{name}.npy'), mmap_mode='r') for name in PRICE_FIELDS}
+    present = np.load(os.path.join(store_period_path, 'present.npy'), mmap_mode='r')
+    return PricePanel(tokens, timestamps, values, present, index['first_ts'], index['last_ts'])
+
+
+def load_period(period_path, store_period_path):
+    """Load a period from the store, converting its CSVs first if they changed since the last conversion."""
+    fingerprint = source_fingerprint(period_path)
+    index = read_store_index(store_period_path)
+    if index is not None and index['source'] == fingerprint:
+        return load_store_period(store_period_path, index)
+
+    panel = load_period_panel(period_path)
+    write_store_period(panel, store_period_path, fingerprint)
+    return panel
+
+
+def convert_period(period_path, store_period_path):
+    load_period(period_path, store_period_path)
+
+
+def convert_price_tree(prices_dir, store_dir=None, max_workers=1):
+    """Convert (or refresh) the store of every period folder in a prices folder,
+    in a pool of `max_workers` processes if more than one.
+    """
+    store_dir = store_dir or store_dir_for(prices_dir)
+    periods = sorted(folder for folder in os.listdir(prices_dir) if os.path.isdir(os.path.join(prices_dir, folder)))
+    period_paths = [os.path.join(prices_dir, period_folder) for period_folder in periods]
+    store_period_paths = [os.path.join(store_dir, period_folder) for period_folder in periods]
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(convert_period, period_paths, store_period_paths))
+    else:
+        for period_path, store_period_path in zip(period_paths, store_period_paths):
+            convert_period(period_path, store_period_path)
+    return store_dir
+
+
+if __name__ == '__main__':
+    for index_folder in sys.argv[1:]:
+        data_dir = os.path.join(index_folder, 'data')
+        # data/prices and the folders of other resolutions such as data/prices_hourly
+        for prices_folder in sorted(os.listdir(data_dir)):
+            prices_dir = os.path.join(data_dir, prices_folder)
+            if prices_folder.startswith('prices') and os.path.isdir(prices_dir):
+                store_dir = convert_price_tree(prices_dir)
+                print(f"Converted {prices_dir} to {store_dir}")
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from functools import partial
+import numpy as np
+
+# `field` is the panel column the weights apply to, `get_weights(panel, previous_panel)`
+# returns one weight per constituent of `panel` (already restricted to the snapshot)
+WeightingScheme = namedtuple("WeightingScheme", ["name", "field", "get_weights"])
+
+WEIGHTING_SCHEMES = {}
+
+
+def register_weighting_scheme(name, field):
+    def decorator(get_weights):
+        WEIGHTING_SCHEMES[name] = WeightingScheme(name, field, get_weights)
+        return get_weights
+    return decorator
+
+
+def get_weighting_scheme(name, **options):
+    if name not in WEIGHTING_SCHEMES:
+        raise ValueError(f"Unknown weighting scheme {name!r}, expected one of {', '.join(WEIGHTING_SCHEMES)}")
+    scheme = WEIGHTING_SCHEMES[name]
+    if options:
+        scheme = scheme._replace(get_weights=partial(scheme.get_weights, **options))
+    return scheme
+
+
+def first_row(panel, field):
+    # Values at the rebalancing date, with absent tokens as NaN
+    return np.where(panel.present[0], panel.field(field)[0], np.nan) if len(panel.timestamps) else np.full(len(panel), np.nan)
+
+
+def to_units(panel, target_weights):
+    """Turn target weights into fixed token quantities held over the period."""
+    prices_0 = first_row(panel, "price")
+    valid = np.isfinite(target_weights) & np.isfinite(prices_0) & (prices_0 > 0)
+    weights = np.where(valid, target_weights, 0.0)
+    total = weights.sum()
+    if total == 0:
+        return np.zeros(len(panel))
+    units = np.zeros(len(panel))
+    units[valid] = weights[valid] / total / prices_0[valid]
+    return units
+
+
+def cap_weights(weights, cap):
+    """Cap single-name weights, redistributing the excess pro rata until no weight exceeds the cap."""
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    # A cap below 1 / N cannot be met, fall back to the tightest feasible one
+    cap = max(cap, 1 / np.count_nonzero(weights))
+    capped = np.zeros(len(weights), dtype=bool)
+
+    while True:
+        over = (weights > cap) & ~capped
+        if not over.any():
+            return weights
+        capped |= over
+        excess = 1 - cap * capped.sum()
+        free_total = weights[~capped].sum()
+        weights = np.where(capped, cap, weights * excess / free_total if free_total else 0.0)
+
+
+@register_weighting_scheme("cw", "market_cap")
+def cap_weighted(panel, previous_panel=None):
+    # Every constituent contributes its full market cap
+    return np.ones(len(panel))
+
+
+@register_weighting_scheme("ew", "price")
+def equal_weighted(panel, previous_panel=None):
+    # Every constituent contributes its price times 1 / N
+    token_count = len(panel)
+    equal_weight = 1 / token_count
+    return np.full(token_count, equal_weight)
+
+
+@register_weighting_scheme("capped-cw", "price")
+def capped_cap_weighted(panel, previous_panel=None, cap=0.1):
+    market_caps_0 = first_row(panel, "market_cap")
+    valid = np.isfinite(market_caps_0) & (market_caps_0 > 0)
+    target_weights = np.zeros(len(panel))
+    if valid.any():
+        target_weights[valid] = cap_weights(market_caps_0[valid], cap)
+    return to_units(panel, target_weights)
+
+
+@register_weighting_scheme("sqrt-cw", "price")
+def sqrt_cap_weighted(panel, previous_panel=None):
+    return to_units(panel, np.sqrt(first_row(panel, "market_cap")))
+
+
+@register_weighting_scheme("inverse-volatility", "price")
+def inverse_volatility(panel, previous_panel=None, min_observations=20):
+    """Weight by the inverse standard deviation of the constituents' log returns
+    over the previous rebalancing period. Tokens without enough history get the
+    median volatility of the others; without any history the weights are equal.
+    """
+    volatility = np.full(len(panel), np.nan)
+    if previous_panel is not None and len(previous_panel.timestamps) > 1:
+        history = previous_panel.select(panel.tokens)
+        prices = np.where(history.present, history.field("price"), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(prices), axis=0)
+        observations = np.isfinite(returns).sum(axis=0)
+        enough = observations >= min_observations
+        if enough.any():
+            volatility[enough] = np.nanstd(returns[:, enough], axis=0, ddof=1)
+
+    usable = np.isfinite(volatility) & (volatility > 0)
+    if not usable.any():
+        return to_units(panel, np.ones(len(panel)))
+    volatility[~usable] = np.median(volatility[usable])
+    return to_units(panel, 1 / volatility)
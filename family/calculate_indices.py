@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+import configparser
+from tqdm import tqdm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.engine import load_period_panels, save_index_history
+from eei.family import compute_index_family
+from eei.resolution import get_resolution, index_history_file_for, prices_dir_for
+from eei.store import convert_price_tree, store_dir_for
+from eei.weighting import get_weighting_scheme
+
+config = configparser.ConfigParser()
+config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+config.read(config_path)
+
+CONSTITUENT_COUNTS = [int(count) for count in config['FAMILY']['constituent_counts'].split(',')]
+WEIGHTING_SCHEMES = [scheme.strip() for scheme in config['FAMILY']['weighting_schemes'].split(',')]
+INDEX_FOLDER_PATTERN = config['FAMILY']['index_folder_pattern']
+RESOLUTION = get_resolution(config.get('FAMILY', 'resolution', fallback='daily'))
+
+# The index with the most constituents holds the union of all price files and snapshots
+SOURCE_FOLDER = INDEX_FOLDER_PATTERN.format(scheme=WEIGHTING_SCHEMES[0], count=max(CONSTITUENT_COUNTS))
+INDEX_SNAPSHOTS_DIR = os.path.join(SOURCE_FOLDER, "data", "index_snapshots")
+PRICES_DIR = prices_dir_for(os.path.join(SOURCE_FOLDER, "data"), RESOLUTION)
+STORE_DIR = store_dir_for(PRICES_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate the index history of every index of the family.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes to convert the changed price files into the price store with")
+    args = parser.parse_args()
+
+    schemes = [get_weighting_scheme(name) for name in WEIGHTING_SCHEMES]
+    # The indices share one pass over the periods, only the price store conversion is spread over processes
+    if args.workers > 1:
+        convert_price_tree(PRICES_DIR, STORE_DIR, max_workers=args.workers)
+    period_panels = load_period_panels(PRICES_DIR, STORE_DIR)
+
+    progress_bar = tqdm(sorted(period_panels.items()), desc="Calculating indices",
+                        bar_format="{l_bar}\033[1;32m{bar}\033[0m{r_bar}")
+    index_value = 100
+
+    index_histories = compute_index_family(progress_bar, INDEX_SNAPSHOTS_DIR, CONSTITUENT_COUNTS, schemes,
+                                           index_value, RESOLUTION.step)
+
+    for (scheme_name, count), index_history_df in index_histories.items():
+        index_folder = INDEX_FOLDER_PATTERN.format(scheme=scheme_name, count=count)
+        os.makedirs(os.path.join(index_folder, "data"), exist_ok=True)
+        save_index_history(index_history_df, index_history_file_for(os.path.join(index_folder, "data"), RESOLUTION))
+
+
+# The guard keeps the worker processes from running the calculation again
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import argparse
+import configparser
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.coingecko import CACHE_DIR, CoinGeckoClient
+from eei.snapshots import generate_index_snapshots
+
+config = configparser.ConfigParser()
+config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+config.read(config_path)
+
+CONSTITUENT_COUNTS = [int(count) for count in config['FAMILY']['constituent_counts'].split(',')]
+WEIGHTING_SCHEMES = [scheme.strip() for scheme in config['FAMILY']['weighting_schemes'].split(',')]
+INDEX_FOLDER_PATTERN = config['FAMILY']['index_folder_pattern']
+historical_snapshots_folder = "common/historical_snapshots"
+classification_file = "common/classification.csv"
+
+API_KEY = config.get('COINGECKO', 'api_key')
+CALLS_PER_MINUTE = config.getint('COINGECKO', 'calls_per_minute', fallback=500)
+MAX_WORKERS = config.getint('COINGECKO', 'max_workers', fallback=8)
+CACHE_DIR = config.get('COINGECKO', 'cache_dir', fallback=CACHE_DIR)
+API_URL = config.get('COINGECKO', 'api_url', fallback=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the index snapshots of every index of the family.")
+    parser.parse_args()
+
+    # Every index folder of the family receives the snapshots of its number of constituents
+    index_snapshots_folders = {}
+    for scheme_name in WEIGHTING_SCHEMES:
+        for count in CONSTITUENT_COUNTS:
+            index_folder = INDEX_FOLDER_PATTERN.format(scheme=scheme_name, count=count)
+            index_snapshots_folder = f"{index_folder}/data/index_snapshots"
+            Path(index_snapshots_folder).mkdir(parents=True, exist_ok=True)
+            index_snapshots_folders[index_snapshots_folder] = count
+
+    client = CoinGeckoClient(API_KEY, api_url=API_URL, calls_per_minute=CALLS_PER_MINUTE, pool_size=MAX_WORKERS,
+                             cache_dir=CACHE_DIR)
+    lookups = generate_index_snapshots(client, historical_snapshots_folder, classification_file,
+                                       index_snapshots_folders, max_workers=MAX_WORKERS)
+    print(f"Looked up {lookups} distinct tokens")
+    print(client.summary())
+
+
+if __name__ == '__main__':
+    main()
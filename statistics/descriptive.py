@@ -1,57 +1,17 @@
 import os
+import sys
+import argparse
 import pandas as pd
-import numpy as np
 
-def read_index_history(folder):
-    file_path = os.path.join(folder, 'data', 'index_history.csv')
-    index_history = pd.read_csv(file_path)
-    index_history['timestamp'] = pd.to_datetime(index_history['timestamp'], unit='s')
-    index_history.set_index('timestamp', inplace=True)
-    return index_history
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.assets import load_index_history
+from eei.descriptive import describe_index, read_risk_free_rate_data
+from eei.online import update_online_statistics
+from eei.resolution import RESOLUTIONS, file_suffix, get_resolution, index_history_file_for, online_statistics_file_for
 
-def read_risk_free_rate_data(file_path):
-    risk_free_rate = pd.read_csv(file_path, parse_dates=['Date'], index_col='Date')
-    risk_free_rate['yield'] = risk_free_rate['yield'] / 100  # Convert to decimal
-    return risk_free_rate
 
-def align_risk_free_rate(index_history, risk_free_rate):
-    aligned_risk_free_rate = risk_free_rate.reindex(index_history.index, method='ffill')
-    return aligned_risk_free_rate
-
-def calculate_total_return(index_history):
-    initial_value = index_history['index_value'].iloc[0]
-    final_value = index_history['index_value'].iloc[-1]
-    total_return = (final_value / initial_value) - 1
-    return total_return
-
-def calculate_summary_statistics(index_history):
-    daily_returns = index_history['index_value'].pct_change().dropna()
-    summary_statistics = {
-        'mean': daily_returns.mean(),
-        'median': daily_returns.median(),
-        'std': daily_returns.std(),
-    }
-    return summary_statistics
-
-def calculate_performance_measures(index_history, risk_free_rate):
-    daily_returns = index_history['index_value'].pct_change().dropna()
-    daily_risk_free_rate = risk_free_rate.loc[daily_returns.index, 'yield']
-    
-    # Adjust daily returns for the risk-free rate
-    adjusted_daily_returns = daily_returns - daily_risk_free_rate
-
-    sharpe_ratio = adjusted_daily_returns.mean() / adjusted_daily_returns.std()
-    sortino_ratio = adjusted_daily_returns.mean() / adjusted_daily_returns[adjusted_daily_returns < 0].std()
-
-    drawdowns = 1 - index_history['index_value'] / index_history['index_value'].cummax()
-    max_drawdown = drawdowns.max()
-
-    performance_measures = {
-        'sharpe_ratio': sharpe_ratio,
-        'sortino_ratio': sortino_ratio,
-        'max_drawdown': max_drawdown,
-    }
-    return performance_measures
+def read_index_history(folder, resolution=None):
+    return load_index_history(folder, resolution).to_frame('index_value')
 
 index_folders = [
     'index-cw-10',
@@ -62,29 +22,39 @@ index_folders = [
     'index-ew-30',
 ]
 
-results = []
 
-# Read risk-free rate data
-risk_free_rate_file_path = 'risk-free-rate/risk_free_rate.csv'
-risk_free_rate = read_risk_free_rate_data(risk_free_rate_file_path)
+def main():
+    parser = argparse.ArgumentParser(description="Calculate the descriptive statistics of the indices.")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='daily',
+                        help="resolution of the index histories, annualization follows it")
+    parser.add_argument('--online', action='store_true',
+                        help="update streaming statistics from the index values added since the last run")
+    args = parser.parse_args()
+    resolution = get_resolution(args.resolution)
+
+    results = []
+
+    # Read risk-free rate data
+    risk_free_rate = read_risk_free_rate_data()
+
+    for folder in index_folders:
+        if args.online:
+            # Kept in data/online_statistics.json; the median is a streaming estimate
+            data_dir = os.path.join(folder, 'data')
+            online_statistics = update_online_statistics(index_history_file_for(data_dir, resolution),
+                                                         online_statistics_file_for(data_dir, resolution),
+                                                         risk_free_rate['yield'], resolution.periods_per_year)
+            results.append({'index': folder, **online_statistics})
+            continue
+
+        index_history = read_index_history(folder, resolution)
+        result = {'index': folder, **describe_index(index_history, risk_free_rate, resolution.periods_per_year)}
+        results.append(result)
 
-for folder in index_folders:
-    index_history = read_index_history(folder)
-    
-    # Align risk-free rate data with index_history
-    aligned_risk_free_rate = align_risk_free_rate(index_history, risk_free_rate)
-    
-    summary_statistics = calculate_summary_statistics(index_history)
-    performance_measures = calculate_performance_measures(index_history, aligned_risk_free_rate)
-    total_return = calculate_total_return(index_history)
+    results_df = pd.DataFrame(results)
+    online = '_online' if args.online else ''
+    results_df.to_csv(f'statistics/descriptive_statistics{online}{file_suffix(resolution)}.csv', index=False)
 
-    result = {
-        'index': folder,
-        'total_return': total_return,
-        **summary_statistics,
-        **performance_measures,
-    }
-    results.append(result)
 
-results_df = pd.DataFrame(results)
-results_df.to_csv('statistics/descriptive_statistics.csv', index=False)
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,55 @@
 import os
+import sys
+import argparse
 import pandas as pd
-import numpy as np
-from scipy.stats import pearsonr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.assets import load_index_history
+from eei.correlation import METHODS, correlation_matrix
+from eei.resolution import RESOLUTIONS, file_suffix, get_resolution
 
 # List of index folders
 index_folders = ['index-cw-10', 'index-cw-20', 'index-cw-30', 'index-ew-10', 'index-ew-20', 'index-ew-30']
 
-# Function to load index history
-def load_index_history(folder):
-    file_path = os.path.join(folder, 'data', 'index_history.csv')
-    index_history = pd.read_csv(file_path)
-    index_history["timestamp"] = pd.to_datetime(index_history["timestamp"], unit="s")
-    index_history.set_index("timestamp", inplace=True)
-    return index_history['index_value']
 
-# Load index histories
-index_histories = {folder: load_index_history(folder) for folder in index_folders}
+def main():
+    parser = argparse.ArgumentParser(description="Calculate the correlations between the indices.")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='daily', help="resolution of the index histories")
+    parser.add_argument('--method', choices=METHODS, default='pearson')
+    parser.add_argument('--returns', action='store_true', help="correlate daily returns instead of index levels")
+    parser.add_argument('--pairwise', action='store_true', help="drop missing values per pair instead of per row")
+    args = parser.parse_args()
+    resolution = get_resolution(args.resolution)
+    suffix = file_suffix(resolution)
+    # Pearson results keep their original file names
+    method_suffix = '' if args.method == 'pearson' else f'_{args.method}'
+
+    # Load index histories
+    index_histories = {folder: load_index_history(folder, resolution) for folder in index_folders}
+
+    # Combine index histories into a single DataFrame
+    index_data = pd.concat(index_histories, axis=1)
+    index_data.columns = index_folders
+
+    # Calculate the correlations and p-values, of index levels unless --returns is set
+    corr, p_values = correlation_matrix(index_data, args.method, args.returns, args.pairwise)
 
-# Combine index histories into a single DataFrame
-index_data = pd.concat(index_histories, axis=1)
-index_data.columns = index_folders
+    print(f"{args.method.title()} Correlation:\n", corr)
+    print("\nP-values:\n", p_values)
 
-# Calculate Pearson correlation and p-values
-pearson_corr = index_data.corr(method='pearson')
-p_values = index_data.corr(method=lambda x, y: pearsonr(x, y)[1])  # Calculate p-values using scipy.stats.pearsonr()
+    # Save the correlations and p-values to CSV files
+    corr.to_csv(f'statistics/{args.method}_correlations{suffix}.csv')
+    p_values.to_csv(f'statistics/p_values{method_suffix}{suffix}.csv')
 
-print("Pearson Correlation:\n", pearson_corr)
-print("\nP-values:\n", p_values)
+    # Calculate average pairwise correlation
+    average_pairwise_corr = corr.mean().mean()
+    print("\nAverage Pairwise Correlation:", average_pairwise_corr)
 
-# Save Pearson correlation and p-values to CSV files
-pearson_corr.to_csv('statistics/pearson_correlations.csv')
-p_values.to_csv('statistics/p_values.csv')
+    # Save average pairwise correlation to a CSV file
+    pd.DataFrame([average_pairwise_corr], index=['Average Pairwise Correlation'], columns=['Value']).to_csv(f'statistics/average_pairwise_correlation{method_suffix}{suffix}.csv')
 
-# Calculate average pairwise correlation
-average_pairwise_corr = pearson_corr.mean().mean()
-print("\nAverage Pairwise Correlation:", average_pairwise_corr)
+    print("\nCorrelation matrix, p-values, and average pairwise correlation saved to CSV files.")
 
-# Save average pairwise correlation to a CSV file
-pd.DataFrame([average_pairwise_corr], index=['Average Pairwise Correlation'], columns=['Value']).to_csv('statistics/average_pairwise_correlation.csv')
 
-print("\nCorrelation matrix, p-values, and average pairwise correlation saved to CSV files.")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eei.assets import BENCHMARKS, load_benchmark, load_index_history
+from eei.descriptive import read_risk_free_rate_data
+from eei.resolution import DAY, get_resolution
+from eei.rolling import rolling_measures
+
+index_folders = ['index-cw-10', 'index-cw-20', 'index-cw-30', 'index-ew-10', 'index-ew-20', 'index-ew-30']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate rolling risk measures of the indices and the benchmarks.")
+    parser.add_argument('--windows', type=int, nargs='+', default=[30, 90, 365], help="window lengths in days")
+    parser.add_argument('--benchmark', default='ethereum', help="series the betas are measured against")
+    args = parser.parse_args()
+    # The benchmarks are daily, so are the indices compared with them
+    resolution = get_resolution('daily')
+
+    # The indices and the benchmarks of the comparison folder
+    series = {folder: load_index_history(folder, resolution) for folder in index_folders}
+    series.update({name: load_benchmark(name) for name in BENCHMARKS})
+    prices = pd.concat(series, axis=1).sort_index()
+
+    risk_free_rate = read_risk_free_rate_data()
+    risk_free_yields = risk_free_rate['yield'].reindex(prices.index, method='ffill')
+
+    windows = [days * DAY // resolution.step for days in args.windows]
+    results_df = rolling_measures(prices, risk_free_yields, windows, args.benchmark, resolution.periods_per_year)
+    results_df.dropna(subset=['volatility']).to_csv('statistics/rolling_statistics.csv', index=False)
+
+
+if __name__ == '__main__':
+    main()
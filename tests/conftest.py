@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from eei.coingecko import CoinGeckoClient
+from eei.standin import start_server
+
+
+@pytest.fixture(scope='session')
+def standin():
+    # Serves the committed price files of the index folders and comparison/data
+    server = start_server(root=ROOT_DIR)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(standin):
+    return CoinGeckoClient('test', api_url=standin.api_url, cache_dir=None, calls_per_minute=100000)
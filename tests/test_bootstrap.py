@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eei.bootstrap import bootstrap_comparison, bootstrap_metrics, performance_metrics, resample_indices
+
+PERIODS = 300
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2021-01-01', periods=PERIODS, freq='D')
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.001, 0.04, size=(PERIODS, 3)), axis=0)), index=index,
+                        columns=['a', 'b', 'c'])
+
+
+@pytest.fixture
+def risk_free_yields(prices):
+    return pd.Series(0.0001, index=prices.index)
+
+
+def test_same_seed_gives_the_same_results(prices, risk_free_yields):
+    first = bootstrap_comparison(prices, risk_free_yields, resamples=600, seed=7)
+    second = bootstrap_comparison(prices, risk_free_yields, resamples=600, seed=7)
+    other = bootstrap_comparison(prices, risk_free_yields, resamples=600, seed=8)
+    for frame, same, different in zip(first, second, other):
+        pd.testing.assert_frame_equal(frame, same)
+        assert not frame.equals(different)
+
+
+def test_results_do_not_depend_on_the_workers(prices):
+    returns = prices.pct_change().iloc[1:].to_numpy()
+    yields = np.full(len(returns), 0.0001)
+    sequential = bootstrap_metrics(returns, yields, resamples=600, seed=3)
+    parallel = bootstrap_metrics(returns, yields, resamples=600, seed=3, max_workers=2)
+    for metric, values in sequential.items():
+        assert values.shape == (600, 3)
+        np.testing.assert_array_equal(parallel[metric], values)
+
+
+@pytest.mark.parametrize('method', ['block', 'stationary'])
+def test_resamples_are_made_of_consecutive_rows(method):
+    indices = resample_indices(np.random.default_rng(0), PERIODS, 200, 10, method)
+    assert indices.shape == (200, PERIODS)
+    assert indices.min() >= 0 and indices.max() < PERIODS
+
+    continues = (indices[:, 1:] - indices[:, :-1]) % PERIODS == 1
+    if method == 'block':
+        # A new block starts every 10 rows
+        assert continues[:, np.arange(PERIODS - 1) % 10 != 9].all()
+    else:
+        # Blocks of geometric length with mean 10
+        assert 1 - continues.mean() == pytest.approx(0.1, abs=0.01)
+
+
+def test_performance_metrics_match_pandas(prices, risk_free_yields):
+    returns = prices.pct_change().iloc[1:]
+    metrics = performance_metrics(returns.to_numpy().T, risk_free_yields.iloc[1:].to_numpy())
+
+    adjusted_returns = returns.sub(risk_free_yields.iloc[1:], axis=0)
+    drawdowns = 1 - prices / prices.cummax()
+    np.testing.assert_allclose(metrics['sharpe_ratio'], adjusted_returns.mean() / adjusted_returns.std(), rtol=1e-9)
+    np.testing.assert_allclose(metrics['sortino_ratio'],
+                               adjusted_returns.mean() / adjusted_returns[adjusted_returns < 0].std(), rtol=1e-9)
+    np.testing.assert_allclose(metrics['max_drawdown'], drawdowns.max(), rtol=1e-9)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eei.charts import decimate, lttb
+
+
+def reference_lttb(x, y, threshold):
+    # The loop of Steinarsson's reference implementation
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        next_start, next_end = end, min(int((bucket + 2) * every) + 1, n)
+        next_x, next_y = np.mean(x[next_start:next_end]), np.mean(y[next_start:next_end])
+        areas = [abs((x[previous] - next_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (next_y - y[previous]))
+                 for j in range(start, end)]
+        previous = start + int(np.argmax(areas))
+        selected.append(previous)
+    return selected + [n - 1]
+
+
+@pytest.fixture
+def walk():
+    rng = np.random.default_rng(0)
+    return np.arange(1000, dtype=float), 100 + np.cumsum(rng.normal(0, 1, 1000))
+
+
+def test_lttb_keeps_the_endpoints(walk):
+    selected = lttb(*walk, 50)
+    assert len(selected) == 50
+    assert selected[0] == 0 and selected[-1] == 999
+    assert (np.diff(selected) > 0).all()
+
+
+def test_lttb_keeps_the_extremes():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    y[333], y[666] = 10, -10
+    selected = lttb(x, y, 40)
+    assert 333 in selected and 666 in selected
+
+
+def test_lttb_matches_the_reference_implementation(walk):
+    for threshold in [3, 10, 99, 500]:
+        np.testing.assert_array_equal(lttb(*walk, threshold), reference_lttb(*walk, threshold))
+
+
+def test_short_series_are_kept_whole(walk):
+    np.testing.assert_array_equal(lttb(*walk, 1000), np.arange(1000))
+    series = pd.Series([1.0, np.nan, 3.0], index=pd.date_range('2021-01-01', periods=3))
+    pd.testing.assert_series_equal(decimate(series, 10), series.dropna())
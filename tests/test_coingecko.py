@@ -0,0 +1,134 @@
+import json
+import time
+from contextlib import contextmanager
+import pytest
+
+from eei.assets import ROOT_DIR
+from eei.coingecko import COIN_CACHE_TTL, DAY, OPEN_RANGE_CACHE_TTL, CoinGeckoClient, CoinGeckoError, cache_ttl
+from eei.standin import start_server
+
+# The first rebalancing period of the committed aave prices
+FROM_TIMESTAMP, TO_TIMESTAMP = 1609632000, 1617494400
+
+
+@contextmanager
+def faulty_standin(**faults):
+    server = start_server(root=ROOT_DIR, **faults)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def recording_client(monkeypatch, api_url, **options):
+    """A client that records its retry delays instead of sleeping them."""
+    client = CoinGeckoClient('test', api_url=api_url, cache_dir=None, calls_per_minute=100000, **options)
+    client.delays = []
+    retry_delay = client.retry_delay
+    monkeypatch.setattr(client, 'retry_delay',
+                        lambda attempt, response=None: client.delays.append(retry_delay(attempt, response)) or 0)
+    return client
+
+
+def test_429_waits_for_retry_after(monkeypatch):
+    with faulty_standin(throttle_rate=1.0) as server:
+        client = recording_client(monkeypatch, server.api_url, max_retries=3)
+        with pytest.raises(CoinGeckoError, match='HTTP 429'):
+            client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP)
+
+    assert client.delays == [1.0] * 3
+    assert server.responses == {429: 4}
+    assert client.stats['retries'] == 3
+
+
+def test_server_errors_back_off_exponentially(monkeypatch):
+    with faulty_standin(error_rate=1.0) as server:
+        client = recording_client(monkeypatch, server.api_url, max_retries=5, backoff=0.5, max_backoff=3.0)
+        with pytest.raises(CoinGeckoError, match='HTTP 503'):
+            client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP)
+
+    assert server.responses == {503: 6}
+    # Full jitter below the doubling backoff, capped at max_backoff
+    for delay, bound in zip(client.delays, [0.5, 1.0, 2.0, 3.0, 3.0], strict=True):
+        assert 0 <= delay <= bound
+
+
+def test_retries_recover_the_same_response(monkeypatch, client):
+    expected = client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP)
+
+    with faulty_standin(throttle_rate=0.3, error_rate=0.3, seed=1) as server:
+        flaky_client = recording_client(monkeypatch, server.api_url, max_retries=20)
+        for _ in range(5):
+            assert flaky_client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP) == expected
+
+    assert flaky_client.stats['retries'] == len(flaky_client.delays) > 0
+    assert server.responses[200] == 5
+
+
+def test_client_errors_are_not_retried(client):
+    with pytest.raises(CoinGeckoError, match='HTTP 404'):
+        client.request('unknown')
+    assert client.stats['retries'] == 0
+
+
+def age_cache_entry(client, endpoint, params, seconds):
+    # Pretend the cached response was fetched `seconds` earlier
+    path = client.cache.path(endpoint, params)
+    with open(path) as f:
+        entry = json.load(f)
+    entry['fetched_at'] -= seconds
+    with open(path, 'w') as f:
+        json.dump(entry, f)
+
+
+def test_cache_ttl():
+    now = time.time()
+    assert cache_ttl('coins/aave/market_chart/range', {'from': 0, 'to': int(now) - DAY}) is None
+    assert cache_ttl('coins/aave/market_chart/range', {'from': 0, 'to': int(now)}) == OPEN_RANGE_CACHE_TTL
+    assert cache_ttl('coins/aave', None) == COIN_CACHE_TTL
+    assert cache_ttl('key', None) == 0
+
+
+def test_expired_responses_are_fetched_again(standin, tmp_path):
+    client = CoinGeckoClient('test', api_url=standin.api_url, cache_dir=str(tmp_path), calls_per_minute=100000)
+    requests = standin.requests
+
+    coin = client.coin('aave')
+    age_cache_entry(client, 'coins/aave', None, COIN_CACHE_TTL - 60)
+    assert client.coin('aave') == coin
+    assert standin.requests == requests + 1
+
+    age_cache_entry(client, 'coins/aave', None, 120)
+    assert client.coin('aave') == coin
+    assert standin.requests == requests + 2
+    assert client.stats['cache_hits'] == 1
+
+
+def test_closed_ranges_never_expire(standin, tmp_path):
+    client = CoinGeckoClient('test', api_url=standin.api_url, cache_dir=str(tmp_path), calls_per_minute=100000)
+    params = {'vs_currency': 'usd', 'from': FROM_TIMESTAMP, 'to': TO_TIMESTAMP, 'interval': 'daily'}
+    requests = standin.requests
+
+    data = client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP)
+    age_cache_entry(client, 'coins/aave/market_chart/range', params, 365 * DAY)
+    assert client.market_chart_range('aave', FROM_TIMESTAMP, TO_TIMESTAMP) == data
+    assert standin.requests == requests + 1
+
+
+def test_uncacheable_endpoints_are_always_fetched(standin, tmp_path):
+    client = CoinGeckoClient('test', api_url=standin.api_url, cache_dir=str(tmp_path), calls_per_minute=100000)
+    requests = standin.requests
+    client.get('key')
+    client.get('key')
+    assert standin.requests == requests + 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_servers_do_not_share_cached_responses(standin, tmp_path):
+    standin_client = CoinGeckoClient('test', api_url=standin.api_url, cache_dir=str(tmp_path), calls_per_minute=100000)
+    api_client = CoinGeckoClient('test', cache_dir=str(tmp_path))
+    standin_client.coin('aave')
+
+    assert api_client.cache.get('coins/aave', None) is None
+    assert standin_client.cache.get('coins/aave', None) is not None
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from eei.correlation import correlation_matrix
+
+DATA = pd.DataFrame({
+    'a': [1.0, 2.0, 4.0, 3.0, 5.0, 7.0, 6.0],
+    'b': [2.0, 1.0, 5.0, 4.0, 4.5, 8.0, 9.0],
+    'c': [7.0, 6.5, 5.0, 5.5, 3.0, 2.0, 2.5],
+})
+
+
+def test_exact_relationships():
+    data = pd.DataFrame({'x': [1.0, 2.0, 3.0, 4.0], 'double': [2.0, 4.0, 6.0, 8.0], 'reversed': [4.0, 3.0, 2.0, 1.0]})
+    correlations, p_values = correlation_matrix(data)
+    np.testing.assert_allclose(correlations.to_numpy(), [[1, 1, -1], [1, 1, -1], [-1, -1, 1]])
+    np.testing.assert_array_equal(np.diag(p_values.to_numpy()), 1.0)
+
+
+@pytest.mark.parametrize('method, test', [('pearson', stats.pearsonr), ('spearman', stats.spearmanr)])
+def test_matches_scipy(method, test):
+    correlations, p_values = correlation_matrix(DATA, method)
+    for first in DATA.columns:
+        for second in DATA.columns:
+            if first == second:
+                continue
+            statistic, p_value = test(DATA[first], DATA[second])
+            assert correlations.loc[first, second] == pytest.approx(statistic, rel=1e-12)
+            assert p_values.loc[first, second] == pytest.approx(p_value, rel=1e-9)
+
+
+def test_returns():
+    correlations, _ = correlation_matrix(DATA, returns=True)
+    returns = DATA.pct_change().iloc[1:]
+    np.testing.assert_allclose(correlations.to_numpy(), returns.corr().to_numpy(), rtol=1e-12)
+
+
+def test_missing_values_listwise_and_pairwise():
+    data = DATA.copy()
+    data.loc[0, 'a'] = np.nan
+    data.loc[6, 'c'] = np.nan
+
+    listwise, _ = correlation_matrix(data)
+    complete = data.dropna()
+    assert listwise.loc['b', 'c'] == pytest.approx(stats.pearsonr(complete['b'], complete['c'])[0], rel=1e-12)
+
+    pairwise, _ = correlation_matrix(data, pairwise=True)
+    np.testing.assert_allclose(pairwise.to_numpy(), data.corr().to_numpy(), rtol=1e-12)
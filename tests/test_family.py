@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from eei.engine import compute_index_history, validate_rebalancing_periods
+from eei.family import compute_index_family
+from eei.panel import build_panel
+from eei.weighting import get_weighting_scheme
+
+DAY_MS = 86400000
+RANKING = ['a', 'b', 'c']
+
+
+def make_period(first_day, days, prices, short=()):
+    """A panel of daily prices over `days` days; tokens in `short` miss the last day."""
+    panel = {}
+    for token, price in prices.items():
+        length = days - 1 if token in short else days
+        timestamps = (first_day + np.arange(length, dtype=np.int64)) * DAY_MS
+        values = price * (1 + 0.01 * np.arange(length))
+        panel[token] = (timestamps, {'price': values, 'market_cap': 1000 * values})
+    return build_panel(panel)
+
+
+def test_bad_file_only_drops_the_period_of_its_indices(tmp_path):
+    period_panels = [
+        ('2024-01-01', make_period(0, 4, {'a': 1.0, 'b': 2.0, 'c': 3.0})),
+        # c does not cover the period, as if its fetch failed
+        ('2024-01-04', make_period(3, 4, {'a': 1.5, 'b': 2.5, 'c': 3.5}, short={'c'})),
+        ('2024-01-07', make_period(6, 4, {'a': 2.0, 'b': 3.0, 'c': 4.0})),
+    ]
+    for start_date, _ in period_panels:
+        pd.DataFrame({'Coingecko ID': RANKING}).to_csv(tmp_path / f'{start_date}.csv', index=False)
+
+    schemes = [get_weighting_scheme('cw'), get_weighting_scheme('ew')]
+    family = compute_index_family(period_panels, tmp_path, [2, 3], schemes)
+
+    for scheme in schemes:
+        for count in [2, 3]:
+            # What calculate_index.py computes in a folder holding the top `count` files
+            own_files = {start_date: panel.select(RANKING[:count]) for start_date, panel in period_panels}
+            expected = compute_index_history(validate_rebalancing_periods(own_files), tmp_path, scheme)
+            pd.testing.assert_frame_equal(family[(scheme.name, count)], expected)
+
+    assert len(family[('cw', 2)]) > len(family[('cw', 3)])
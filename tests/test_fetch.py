@@ -0,0 +1,116 @@
+import os
+import pandas as pd
+import pytest
+
+from eei.coingecko import CoinGeckoClient
+from eei.fetch import REBALANCING_PERIODS, FetchJob, fetch_prices, group_fetches, plan_fetches, store_job
+from eei.ingest import ingest_market_chart
+from eei.manifest import PriceManifest
+
+DAY = 86400
+PERIODS = REBALANCING_PERIODS[:2]
+TOKENS = ['uniswap', 'aave']
+# The day after the second rebalancing period ends
+NOW = PERIODS[-1][2] + DAY
+# Ten days into the second rebalancing period
+OPEN_NOW = PERIODS[-1][1] + 10 * DAY
+
+
+@pytest.fixture
+def snapshots_dir(tmp_path):
+    snapshots_dir = tmp_path / 'index_snapshots'
+    snapshots_dir.mkdir()
+    for period_start, _, _ in PERIODS:
+        pd.DataFrame({'Coingecko ID': TOKENS}).to_csv(snapshots_dir / f'{period_start}.csv', index=False)
+    return str(snapshots_dir)
+
+
+def read_price_files(prices_dir):
+    return {(period_start, token_id): open(os.path.join(prices_dir, period_start, f'{token_id}.csv')).read()
+            for period_start, _, _ in PERIODS for token_id in TOKENS}
+
+
+def test_rerun_fetches_nothing(client, standin, snapshots_dir, tmp_path):
+    prices_dir = str(tmp_path / 'prices')
+    assert fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=NOW) == []
+    price_files = read_price_files(prices_dir)
+
+    requests = standin.requests
+    assert fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=NOW) == []
+    assert standin.requests == requests
+    assert read_price_files(prices_dir) == price_files
+
+
+def test_rerun_refetches_missing_and_changed_files(client, standin, snapshots_dir, tmp_path):
+    prices_dir = str(tmp_path / 'prices')
+    fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=NOW)
+    price_files = read_price_files(prices_dir)
+
+    os.remove(os.path.join(prices_dir, PERIODS[0][0], 'uniswap.csv'))
+    with open(os.path.join(prices_dir, PERIODS[1][0], 'aave.csv'), 'a') as f:
+        f.write('1,2,3\n')
+
+    requests = standin.requests
+    assert fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=NOW) == []
+    assert standin.requests == requests + 2
+    assert read_price_files(prices_dir) == price_files
+
+
+def test_open_period_is_extended(client, snapshots_dir, tmp_path):
+    prices_dir = str(tmp_path / 'prices')
+    fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=OPEN_NOW)
+    assert PriceManifest(prices_dir).get(PERIODS[1][0], 'aave')['to'] == OPEN_NOW
+
+    jobs = plan_fetches(snapshots_dir, prices_dir, PERIODS, PriceManifest(prices_dir), now=NOW)
+    assert [(job.period_start, job.extend) for job in jobs] == [(PERIODS[1][0], True)] * len(TOKENS)
+
+    fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=NOW)
+    full_prices_dir = str(tmp_path / 'full_prices')
+    fetch_prices(client, snapshots_dir, full_prices_dir, PERIODS, now=NOW)
+    assert read_price_files(prices_dir) == read_price_files(full_prices_dir)
+
+
+def test_extension_without_points_is_not_planned_again(client, snapshots_dir, tmp_path):
+    prices_dir = str(tmp_path / 'prices')
+    fetch_prices(client, snapshots_dir, prices_dir, PERIODS, now=OPEN_NOW)
+    manifest = PriceManifest(prices_dir)
+    period_start, period_from, period_to = PERIODS[1]
+    token_file = os.path.join(prices_dir, period_start, 'aave.csv')
+    price_file = open(token_file).read()
+
+    # As if the token had been delisted after the first run
+    job = FetchJob(period_start, 'aave', period_from, OPEN_NOW + 1, period_to, token_file, True)
+    assert store_job(manifest, job, ingest_market_chart({}).columns) is None
+
+    assert open(token_file).read() == price_file
+    jobs = plan_fetches(snapshots_dir, prices_dir, PERIODS, manifest, now=NOW)
+    assert [job.token_id for job in jobs] == ['uniswap']
+
+
+def test_refresh_bypasses_the_response_cache(standin, tmp_path):
+    def fetch(refresh):
+        client = CoinGeckoClient('test', api_url=standin.api_url, cache_dir=str(tmp_path / 'cache'),
+                                 calls_per_minute=100000, refresh=refresh)
+        return client.market_chart_range('aave', PERIODS[0][1], PERIODS[0][2])
+
+    requests = standin.requests
+    data = fetch(False)
+    assert fetch(False) == data
+    assert standin.requests == requests + 1
+    assert fetch(True) == data
+    assert standin.requests == requests + 2
+
+
+def test_group_fetches_splits_membership_gaps():
+    jobs = [FetchJob(period_start, token_id, from_timestamp, from_timestamp, to_timestamp, None, False)
+            for period_start, from_timestamp, to_timestamp in REBALANCING_PERIODS[:4]
+            for token_id in (['aave', 'uniswap'] if period_start != '2021-04-04' else ['uniswap'])]
+
+    requests = group_fetches(jobs)
+    spans = sorted((request.token_id, request.from_timestamp, request.to_timestamp, len(request.jobs))
+                   for request in requests)
+    assert spans == [
+        ('aave', REBALANCING_PERIODS[0][1], REBALANCING_PERIODS[0][2], 1),
+        ('aave', REBALANCING_PERIODS[2][1], REBALANCING_PERIODS[3][2], 2),
+        ('uniswap', REBALANCING_PERIODS[0][1], REBALANCING_PERIODS[3][2], 4),
+    ]
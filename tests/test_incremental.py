@@ -0,0 +1,86 @@
+import os
+import shutil
+import pytest
+
+from eei.engine import get_rebalancing_periods
+from eei.incremental import append_index_history, recompute_index_history
+from eei.weighting import get_weighting_scheme
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 2023-02-01, within the last rebalancing period of the committed price data
+CUTOFF_MS = 1675209600000
+
+
+@pytest.fixture
+def index_data(tmp_path):
+    data_dir = tmp_path / 'data'
+    shutil.copytree(os.path.join(ROOT_DIR, 'index-cw-10', 'data'), data_dir,
+                    ignore=shutil.ignore_patterns('price_store*', 'index_history*.csv'))
+    return str(data_dir)
+
+
+def last_period_files(prices_dir):
+    period_dir = os.path.join(prices_dir, sorted(os.listdir(prices_dir))[-1])
+    return sorted(os.path.join(period_dir, file) for file in os.listdir(period_dir) if file.endswith('.csv'))
+
+
+def truncate_price_files(files, cutoff_ms):
+    # Rows are cut as text, so the rows kept are byte for byte those of the full files
+    originals = {}
+    for path in files:
+        with open(path) as f:
+            originals[path] = f.read()
+        lines = originals[path].splitlines(True)
+        with open(path, 'w') as f:
+            f.writelines([lines[0]] + [line for line in lines[1:] if int(line.split(',')[0]) < cutoff_ms])
+    return originals
+
+
+def restore_files(originals):
+    for path, text in originals.items():
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+def calculate(data_dir, history_file, state_file, append=False):
+    prices_dir = os.path.join(data_dir, 'prices')
+    calculate = append_index_history if append else recompute_index_history
+    return calculate(get_rebalancing_periods(prices_dir), prices_dir, os.path.join(data_dir, 'index_snapshots'),
+                     get_weighting_scheme('cw'), history_file, state_file)
+
+
+def test_append_equals_full_recompute(index_data):
+    full_file = os.path.join(index_data, 'index_history_full.csv')
+    calculate(index_data, full_file, os.path.join(index_data, 'index_state_full.json'))
+
+    history_file = os.path.join(index_data, 'index_history.csv')
+    state_file = os.path.join(index_data, 'index_state.json')
+    originals = truncate_price_files(last_period_files(os.path.join(index_data, 'prices')), CUTOFF_MS)
+    calculate(index_data, history_file, state_file)
+    restore_files(originals)
+
+    rows, reason = calculate(index_data, history_file, state_file, append=True)
+    assert reason is None and rows > 0
+    with open(history_file, 'rb') as appended, open(full_file, 'rb') as full:
+        assert appended.read() == full.read()
+    assert calculate(index_data, history_file, state_file, append=True) == (0, None)
+
+
+def test_changed_price_of_current_period_recomputes(index_data):
+    history_file = os.path.join(index_data, 'index_history.csv')
+    state_file = os.path.join(index_data, 'index_state.json')
+    calculate(index_data, history_file, state_file)
+
+    # A price the index already used, in the period the state continues
+    path = last_period_files(os.path.join(index_data, 'prices'))[0]
+    with open(path) as f:
+        lines = f.readlines()
+    timestamp, price, *rest = lines[2].split(',')
+    lines[2] = ','.join([timestamp, repr(float(price) * 1.01)] + rest)
+    with open(path, 'w') as f:
+        f.writelines(lines)
+
+    rows, reason = calculate(index_data, history_file, state_file, append=True)
+    assert reason is not None and 'prices' in reason
+    assert calculate(index_data, history_file, state_file, append=True) == (0, None)
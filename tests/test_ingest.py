@@ -0,0 +1,42 @@
+import numpy as np
+
+from eei.ingest import ingest_market_chart
+
+DAY_MS = 86400000
+HOUR = 3600
+
+
+def test_aligns_columns_on_timestamps():
+    token_data = {
+        'prices': [[0, 1.0], [DAY_MS, 2.0], [DAY_MS, 2.5], [2 * DAY_MS, 3.0]],
+        'market_caps': [[0, 10.0], [DAY_MS, 20.0]],
+        'total_volumes': [[DAY_MS, 5.0]],
+    }
+    columns, dropped = ingest_market_chart(token_data)
+
+    np.testing.assert_array_equal(columns['timestamp'], [0, DAY_MS])
+    np.testing.assert_array_equal(columns['price'], [1.0, 2.0])
+    np.testing.assert_array_equal(columns['market_cap'], [10.0, 20.0])
+    np.testing.assert_array_equal(columns['total_volume'], [np.nan, 5.0])
+    assert dropped == {'duplicate prices': 1, 'prices without market cap': 1}
+
+
+def test_missing_arrays():
+    columns, dropped = ingest_market_chart({'prices': [[0, 1.0]], 'market_caps': None})
+    assert all(len(values) == 0 for values in columns.values())
+    assert dropped == {'prices without market cap': 1}
+
+
+def test_snaps_hourly_points_to_the_hour():
+    hour_ms = HOUR * 1000
+    token_data = {
+        # Points arrive shortly after the hour; of two points near the same hour the closer one is kept
+        'prices': [[30000, 1.0], [hour_ms + 90000, 2.0], [hour_ms + 1000, 2.5]],
+        'market_caps': [[20000, 10.0], [hour_ms + 5000, 20.0]],
+    }
+    columns, dropped = ingest_market_chart(token_data, HOUR)
+
+    np.testing.assert_array_equal(columns['timestamp'], [0, hour_ms])
+    np.testing.assert_array_equal(columns['price'], [1.0, 2.5])
+    np.testing.assert_array_equal(columns['market_cap'], [10.0, 20.0])
+    assert dropped == {}
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from eei.assets import ROOT_DIR
+from eei.descriptive import describe_index, index_history_frame, read_risk_free_rate_data
+from eei.online import DrawdownTracker, P2Quantile, RunningMoments, update_online_statistics
+
+HISTORY_FILE = os.path.join(ROOT_DIR, 'index-cw-30', 'data', 'index_history.csv')
+
+
+def test_running_moments_match_numpy():
+    values = np.random.default_rng(0).lognormal(size=1000)
+    moments = RunningMoments()
+    for value in values:
+        moments.update(value)
+    assert moments.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert moments.variance == pytest.approx(values.var(ddof=1), rel=1e-12)
+
+
+def test_p2_quantile_is_exact_up_to_five_values():
+    median = P2Quantile(0.5)
+    for value in [3.0, 1.0, 4.0, 1.5]:
+        median.update(value)
+        assert median.value() == np.quantile(median.heights, 0.5)
+    assert median.value() == 2.25
+
+
+@pytest.mark.parametrize('p', [0.5, 0.9])
+def test_p2_quantile_estimates_large_samples(p):
+    values = np.random.default_rng(1).standard_normal(20000)
+    quantile = P2Quantile(p)
+    for value in values:
+        quantile.update(value)
+    assert quantile.value() == pytest.approx(np.quantile(values, p), abs=0.02)
+
+
+def test_drawdown_tracker_matches_cummax():
+    values = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.05, size=500)))
+    drawdown = DrawdownTracker()
+    for value in values:
+        drawdown.update(value)
+    assert drawdown.max_drawdown == pytest.approx((1 - values / np.maximum.accumulate(values)).max(), rel=1e-12)
+
+
+def test_online_statistics_match_describe_index(tmp_path):
+    risk_free_rate = read_risk_free_rate_data()
+    summary = update_online_statistics(HISTORY_FILE, str(tmp_path / 'state.json'), risk_free_rate['yield'])
+
+    expected = describe_index(index_history_frame(pd.read_csv(HISTORY_FILE)), risk_free_rate)
+    assert summary.keys() == expected.keys()
+    # The median is a streaming estimate, every other statistic is exact
+    assert summary.pop('median') == pytest.approx(expected.pop('median'), abs=0.05 * expected['std'])
+    for name, value in expected.items():
+        assert summary[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_appended_rows_continue_the_saved_state(tmp_path):
+    risk_free_yields = read_risk_free_rate_data()['yield']
+    lines = open(HISTORY_FILE).read().splitlines(True)
+    history_file, state_file = str(tmp_path / 'index_history.csv'), str(tmp_path / 'state.json')
+
+    with open(history_file, 'w') as f:
+        f.writelines(lines[:200])
+    update_online_statistics(history_file, state_file, risk_free_yields)
+    with open(history_file, 'a') as f:
+        f.writelines(lines[200:])
+    summary = update_online_statistics(history_file, state_file, risk_free_yields)
+
+    assert summary == update_online_statistics(HISTORY_FILE, str(tmp_path / 'full_state.json'), risk_free_yields)
+
+
+def test_rewritten_history_starts_over(tmp_path):
+    risk_free_yields = read_risk_free_rate_data()['yield']
+    lines = open(HISTORY_FILE).read().splitlines(True)
+    history_file, state_file = str(tmp_path / 'index_history.csv'), str(tmp_path / 'state.json')
+
+    # Recalculated values from row 100 on, as after a changed price file
+    with open(history_file, 'w') as f:
+        f.writelines(lines[:100] + [line.replace(',', ',1', 1) for line in lines[100:200]])
+    update_online_statistics(history_file, state_file, risk_free_yields)
+    with open(history_file, 'w') as f:
+        f.writelines(lines)
+
+    assert update_online_statistics(history_file, state_file, risk_free_yields) == \
+        update_online_statistics(HISTORY_FILE, str(tmp_path / 'full_state.json'), risk_free_yields)
@@ -0,0 +1,28 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+
+from eei.assets import ROOT_DIR
+from eei.engine import compute_index_history, get_rebalancing_periods
+from eei.parallel import compute_index_history_parallel
+from eei.store import store_dir_for
+from eei.weighting import get_weighting_scheme
+
+
+@pytest.fixture(scope='module')
+def prices_dir(tmp_path_factory):
+    prices_dir = tmp_path_factory.mktemp('data') / 'prices'
+    shutil.copytree(os.path.join(ROOT_DIR, 'index-cw-10', 'data', 'prices'), prices_dir)
+    return str(prices_dir)
+
+
+@pytest.mark.parametrize('scheme_name', ['cw', 'ew', 'inverse-volatility'])
+def test_parallel_equals_sequential(prices_dir, scheme_name):
+    snapshots_dir = os.path.join(ROOT_DIR, 'index-cw-10', 'data', 'index_snapshots')
+    scheme = get_weighting_scheme(scheme_name)
+    rebalancing_periods = get_rebalancing_periods(prices_dir, store_dir_for(prices_dir))
+
+    sequential = compute_index_history(rebalancing_periods, snapshots_dir, scheme)
+    parallel = compute_index_history_parallel(rebalancing_periods, prices_dir, snapshots_dir, scheme, max_workers=2)
+    pd.testing.assert_frame_equal(parallel, sequential, check_exact=True)
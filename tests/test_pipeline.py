@@ -0,0 +1,36 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from eei.assets import ROOT_DIR
+from eei.pipeline import compute_index, describe, fetch_prices, load_snapshots
+
+# The day after the last rebalancing period ends, so every period is complete
+NOW = 1680480000
+
+
+@pytest.mark.parametrize('scheme', ['cw', 'ew'])
+def test_compute_index_reproduces_index_history(client, scheme):
+    data_dir = os.path.join(ROOT_DIR, f'index-{scheme}-30', 'data')
+    snapshots = load_snapshots(os.path.join(data_dir, 'index_snapshots'))
+    prices, failures = fetch_prices(client, snapshots, now=NOW)
+    assert failures == []
+
+    index_history = compute_index(prices, snapshots, scheme)
+    baseline = pd.read_csv(os.path.join(data_dir, 'index_history.csv'))
+    np.testing.assert_array_equal(index_history['timestamp'].to_numpy(), baseline['timestamp'].to_numpy())
+    # The price files hold the served values rounded to their CSV digits
+    np.testing.assert_allclose(index_history['index_value'].to_numpy(), baseline['index_value'].to_numpy(),
+                               rtol=1e-9)
+
+
+def test_describe_matches_descriptive_statistics():
+    data_dir = os.path.join(ROOT_DIR, 'index-cw-30', 'data')
+    index_history = pd.read_csv(os.path.join(data_dir, 'index_history.csv'))
+    baseline = pd.read_csv(os.path.join(ROOT_DIR, 'statistics', 'descriptive_statistics.csv'), index_col=0)
+
+    statistics = describe(index_history)
+    for name, value in statistics.items():
+        if name in baseline.columns:
+            assert value == pytest.approx(baseline.loc['index-cw-30', name], rel=1e-9)
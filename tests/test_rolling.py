@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from eei.assets import ROOT_DIR, load_index_history
+from eei.descriptive import (align_risk_free_rate, calculate_performance_measures, calculate_summary_statistics,
+                             read_risk_free_rate_data)
+from eei.resolution import get_resolution
+from eei.rolling import rolling_measures
+
+WINDOW = 30
+
+
+@pytest.fixture
+def prices():
+    # Three random walks with a few missing prices, 'c' is the benchmark
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2021-01-01', periods=200, freq='D')
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.04, size=(200, 3)), axis=0)), index=index,
+                          columns=['a', 'b', 'c'])
+    prices.iloc[[50, 51, 120], 1] = np.nan
+    return prices
+
+
+def measure(results, series, name):
+    rows = results[results['series'] == series]
+    return pd.Series(rows[name].to_numpy(), index=rows['timestamp'].to_numpy())
+
+
+def pandas_rolling(values, function):
+    # pandas windows over the returns, evaluated like eei.rolling once the series ran for the full window
+    rolled = function(values.rolling(WINDOW, min_periods=2))
+    rolled.iloc[:WINDOW] = np.nan
+    return rolled
+
+
+def test_rolling_measures_match_pandas(prices):
+    risk_free_yields = pd.Series(np.linspace(0.0001, 0.0003, len(prices)), index=prices.index)
+    results = rolling_measures(prices, risk_free_yields, [WINDOW], benchmark='c')
+
+    returns = prices / prices.ffill().shift(1) - 1
+    benchmark = returns['c']
+    for series in prices.columns:
+        adjusted = returns[series] - risk_free_yields
+        expected = {
+            'volatility': pandas_rolling(returns[series], lambda rolling: rolling.std()) * np.sqrt(365),
+            'sharpe_ratio': pandas_rolling(adjusted, lambda rolling: rolling.mean())
+            / pandas_rolling(adjusted, lambda rolling: rolling.std()),
+            'sortino_ratio': pandas_rolling(adjusted, lambda rolling: rolling.mean())
+            / pandas_rolling(adjusted.where(adjusted < 0), lambda rolling: rolling.std()),
+            'beta': pandas_rolling(returns[series], lambda rolling: rolling.cov(benchmark))
+            / pandas_rolling(benchmark.where(returns[series].notna()), lambda rolling: rolling.var()),
+            'max_drawdown': prices[series].ffill().rolling(WINDOW + 1).apply(
+                lambda window: (1 - window / np.maximum.accumulate(window)).max(), raw=True),
+        }
+        for name, values in expected.items():
+            np.testing.assert_allclose(measure(results, series, name), values.to_numpy(), rtol=1e-9, atol=1e-12,
+                                       err_msg=f'{series} {name}')
+
+
+def test_last_window_equals_the_full_sample_statistics():
+    index_folder = os.path.join(ROOT_DIR, 'index-cw-30')
+    index_history = load_index_history(index_folder, get_resolution('daily')).to_frame('index_value')
+    risk_free_rate = align_risk_free_rate(index_history, read_risk_free_rate_data())
+    # One window over every return of the history
+    results = rolling_measures(index_history, risk_free_rate['yield'], [len(index_history) - 1])
+    last_window = results.iloc[-1]
+
+    summary_statistics = calculate_summary_statistics(index_history)
+    performance_measures = calculate_performance_measures(index_history, risk_free_rate)
+    assert last_window['volatility'] == pytest.approx(summary_statistics['std'] * np.sqrt(365), rel=1e-9)
+    for name in ['sharpe_ratio', 'sortino_ratio', 'max_drawdown']:
+        assert last_window[name] == pytest.approx(performance_measures[name], rel=1e-9), name
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from eei.panel import build_panel
+from eei.weighting import cap_weights, get_weighting_scheme
+
+DAY_MS = 86400000
+
+
+def make_panel(prices, market_caps=None):
+    """A panel of {token: daily prices} (and market caps) from day zero on."""
+    market_caps = market_caps or {token: np.ones(len(values)) for token, values in prices.items()}
+    return build_panel({token: (np.arange(len(values), dtype=np.int64) * DAY_MS,
+                                {'price': np.asarray(values, dtype=float),
+                                 'market_cap': np.asarray(market_caps[token], dtype=float)})
+                        for token, values in prices.items()})
+
+
+def value_shares(panel, units):
+    # Share of every constituent in the value of the index on the rebalancing date
+    values = units * panel.field('price')[0]
+    return values / values.sum()
+
+
+def test_cap_weights_redistributes_the_excess():
+    np.testing.assert_allclose(cap_weights([50, 30, 10, 10], 0.3), [0.3, 0.3, 0.2, 0.2])
+
+
+def test_cap_weights_below_one_over_n_is_equal():
+    np.testing.assert_allclose(cap_weights([50, 30, 10, 10], 0.1), [0.25] * 4)
+
+
+def test_capped_cw_holds_the_capped_weights():
+    panel = make_panel({'a': [2.0, 3.0], 'b': [4.0, 1.0], 'c': [1.0, 1.0], 'd': [5.0, 6.0]},
+                       {'a': [50, 60], 'b': [30, 10], 'c': [10, 10], 'd': [10, 12]})
+    scheme = get_weighting_scheme('capped-cw', cap=0.3)
+    assert scheme.field == 'price'
+    np.testing.assert_allclose(value_shares(panel, scheme.get_weights(panel, None)), [0.3, 0.3, 0.2, 0.2])
+
+
+def test_inverse_volatility_weights():
+    days = 31
+    steps = np.where(np.arange(days) % 2, 1.0, -1.0) * 0.01
+    previous = make_panel({'calm': 10 * np.exp(np.cumsum(steps)), 'wild': 10 * np.exp(np.cumsum(2 * steps))})
+    panel = make_panel({'calm': [10.0, 11.0], 'wild': [20.0, 19.0]})
+
+    units = get_weighting_scheme('inverse-volatility').get_weights(panel, previous)
+    # Half the volatility, twice the weight
+    np.testing.assert_allclose(value_shares(panel, units), [2 / 3, 1 / 3])
+
+
+def test_inverse_volatility_without_history_is_equal():
+    panel = make_panel({'a': [10.0, 11.0], 'b': [20.0, 19.0], 'c': [5.0, 5.0]})
+    units = get_weighting_scheme('inverse-volatility').get_weights(panel, None)
+    np.testing.assert_allclose(value_shares(panel, units), [1 / 3] * 3)
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError, match='Unknown weighting scheme'):
+        get_weighting_scheme('market-cap')